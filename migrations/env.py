@@ -8,6 +8,7 @@ from src.app.config import settings
 from src.app.database import Base
 from src.models.buildings import Building
 from src.models.experiences import Experience
+from src.models.llm_cache import LLMCacheEntry
 from src.models.nodes import PassageNode
 from src.models.passages import Passage
 from src.models.questions import Question
@@ -15,7 +16,7 @@ from src.models.user_castles import UserCastle
 from src.models.node_progresses import UserNodeProgress
 from src.models.user_villages import UserVillage
 from src.models.users import User
-from src.models.wallets import Wallet
+from src.models.wallets import Wallet, WalletBalance
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
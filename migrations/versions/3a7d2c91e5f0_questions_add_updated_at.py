@@ -0,0 +1,31 @@
+"""questions add updated_at
+
+Revision ID: 3a7d2c91e5f0
+Revises: 44f84eef9f07
+Create Date: 2026-10-17 10:12:31.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7d2c91e5f0'
+down_revision: Union[str, Sequence[str], None] = '44f84eef9f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'questions',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('questions', 'updated_at')
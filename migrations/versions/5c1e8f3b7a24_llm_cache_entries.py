@@ -0,0 +1,43 @@
+"""llm cache entries
+
+Revision ID: 5c1e8f3b7a24
+Revises: 3a7d2c91e5f0
+Create Date: 2026-10-17 14:05:47.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8f3b7a24'
+down_revision: Union[str, Sequence[str], None] = '3a7d2c91e5f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'llm_cache_entries',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('namespace', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=64), nullable=False),
+        sa.Column('response', sa.JSON(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_accessed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.create_index('ix_llm_cache_last_accessed', 'llm_cache_entries', ['last_accessed_at'], unique=False)
+    op.create_index('ix_llm_cache_expires', 'llm_cache_entries', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_llm_cache_expires', table_name='llm_cache_entries')
+    op.drop_index('ix_llm_cache_last_accessed', table_name='llm_cache_entries')
+    op.drop_table('llm_cache_entries')
@@ -0,0 +1,53 @@
+"""wallet balances
+
+Revision ID: 8d4b6a0e2f17
+Revises: 5c1e8f3b7a24
+Create Date: 2026-10-17 15:21:09.734611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4b6a0e2f17'
+down_revision: Union[str, Sequence[str], None] = '5c1e8f3b7a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_wallets_user_fund_type', 'wallets', ['user_id', 'fund_type'], unique=False)
+    op.create_table(
+        'wallet_balances',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'fund_type',
+            postgresql.ENUM('COIN', 'CRYSTAL', name='fundtype', create_type=False),
+            nullable=False,
+        ),
+        sa.Column('balance', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'fund_type'),
+    )
+    # backfill from the ledger
+    op.execute(
+        """
+        INSERT INTO wallet_balances (user_id, fund_type, balance)
+        SELECT user_id, fund_type, COALESCE(SUM(fund), 0)
+        FROM wallets
+        WHERE user_id IS NOT NULL AND fund_type IS NOT NULL
+        GROUP BY user_id, fund_type
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('wallet_balances')
+    op.drop_index('ix_wallets_user_fund_type', table_name='wallets')
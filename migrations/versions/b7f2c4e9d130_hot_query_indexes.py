@@ -0,0 +1,50 @@
+"""hot query indexes
+
+Revision ID: b7f2c4e9d130
+Revises: 8d4b6a0e2f17
+Create Date: 2026-10-17 17:02:44.190553
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f2c4e9d130'
+down_revision: Union[str, Sequence[str], None] = '8d4b6a0e2f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial predicate)
+INDEXES = [
+    ('ix_user_node_progresses_user_node', 'user_node_progresses', ['user_id', 'node_id', 'created_at'], None),
+    ('ix_questions_node_order', 'questions', ['node_id', 'order_index'], None),
+    ('ix_passages_village_order', 'passages', ['village_id', 'order_index'], None),
+    ('ix_nodes_shared_regular', 'nodes', ['passage_id', 'id'], 'user_id IS NULL AND is_boss = false'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction; IF NOT EXISTS makes a re-run
+    # after an interrupted build safe (drop any INVALID leftover by hand first)
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
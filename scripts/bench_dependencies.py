@@ -0,0 +1,107 @@
+"""
+Dependency resolution overhead per endpoint.
+
+Resolves every route's dependency graph with FastAPI's own solver against a
+fake authenticated request, without touching the database (sessions are created
+but never used), and reports the number of dependency calls and the CPU time.
+
+    python -m scripts.bench_dependencies [--calls 2000] [--filter /roadmaps]
+"""
+import argparse
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from types import SimpleNamespace
+
+from fastapi.dependencies.utils import solve_dependencies
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+
+from src.app.cache import LRUCacheBackend
+from src.app.config import settings
+from src.app.database import make_engine, make_sessionmaker
+from src.app.db_routing import ReplicaRouter
+from src.app.principals import DecodedTokenCache, UserPrincipal, UserPrincipalCache
+from src.app.utils import create_access_token
+
+USER_ID = 1
+
+
+def _fill_state(app) -> None:
+    sessionmaker = make_sessionmaker(make_engine(settings.db_url))
+    app.state.settings = settings
+    app.state.sessionmaker = sessionmaker
+    # version counters are read while resolving (ETag guards)
+    app.state.cache_backend = LRUCacheBackend()
+    app.state.db_router = ReplicaRouter(sessionmaker, None, app.state.cache_backend)
+    app.state.token_cache = DecodedTokenCache()
+    app.state.user_cache = UserPrincipalCache(ttl_seconds=3600)
+    app.state.user_cache.put(UserPrincipal(id=USER_ID, is_admin=True, has_onboard=True))
+    # singletons are only handed to controllers, never called while resolving
+    for name in (
+            "building_catalog", "roadmap_cache", "openai_service", "generation_cache",
+            "question_generation_queue", "cloudflare_r2", "svg_assets", "status_hub", "tap_aggregator",
+    ):
+        if not hasattr(app.state, name):
+            setattr(app.state, name, SimpleNamespace())
+
+
+def _count_calls(dependant) -> int:
+    return sum(1 + _count_calls(sub) for sub in dependant.dependencies)
+
+
+def _request(app, route: APIRoute, token: str, stack: AsyncExitStack) -> Request:
+    method = sorted(route.methods)[0]
+    return Request({
+        "type": "http",
+        "method": method,
+        "path": route.path,
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "query_string": b"",
+        "path_params": {name: "1" for name in route.param_convertors},
+        "app": app,
+        "state": {},
+        "fastapi_inner_astack": stack,
+        "fastapi_function_astack": stack,
+    })
+
+
+async def _resolve(app, route: APIRoute, token: str) -> None:
+    async with AsyncExitStack() as stack:
+        request = _request(app, route, token, stack)
+        await solve_dependencies(
+            request=request,
+            dependant=route.dependant,
+            dependency_overrides_provider=app,
+            async_exit_stack=stack,
+            embed_body_fields=False,
+        )
+
+
+async def main(calls: int, path_filter: str) -> None:
+    from src.app.main import app
+
+    _fill_state(app)
+    token = create_access_token(subject=str(USER_ID), settings=settings, extra_claims={"id": USER_ID})
+    routes = [
+        r for r in app.routes
+        if isinstance(r, APIRoute) and path_filter in r.path
+    ]
+
+    print(f"{'endpoint':60} {'deps':>5} {'us/call':>9}")
+    for route in sorted(routes, key=lambda r: r.path):
+        await _resolve(app, route, token)  # warm up
+        started = time.process_time()
+        for _ in range(calls):
+            await _resolve(app, route, token)
+        per_call = (time.process_time() - started) / calls * 1e6
+        name = f"{'|'.join(sorted(route.methods))} {route.path}"
+        print(f"{name:60} {_count_calls(route.dependant):5} {per_call:9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--filter", default="", help="only endpoints whose path contains this")
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.filter))
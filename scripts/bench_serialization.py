@@ -0,0 +1,153 @@
+"""
+Response serialization cost of the hot endpoints: model-per-row + response_model vs FastJSON.
+
+"models" is the previous path: the controller builds one Pydantic model per row,
+then FastAPI validates the return value against the route's response_model and
+renders it with JSONResponse. "fast" hands the rows to the route's precompiled
+FastJSON serializer. Rows are synthetic, sized like a busy account.
+
+    python -m scripts.bench_serialization [--iterations 2000] [--rows 30]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fastapi.routing import APIRoute, serialize_response
+from fastapi.responses import JSONResponse
+
+from src.app.constants import BuildingType, FundType, SubjectEnum
+from src.presentations.routers import buildings, collectors, roadmaps
+from src.presentations.schemas.buildings import BuildingCastleUserRead, BuildingVillageUserRead
+from src.presentations.schemas.collectors import TreasureStatus, VillageStatus
+from src.presentations.schemas.nodes import NodeDetailedRead
+from src.presentations.schemas.questions import QuestionRead
+
+
+def _building_rows(n: int, building_type: BuildingType) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "title": f"Building {i}",
+            "type": building_type,
+            "svg": f"https://assets.example.com/buildings/{i:032x}.svg",
+            "treasure_capacity": 300 + i,
+            "speed_production_treasure": 1 + i % 5,
+            "cost": 100 * i or None,
+            "subject": SubjectEnum.MATH if building_type == BuildingType.VILLAGE else None,
+            "next_building_id": i + 1 if i + 1 < n else None,
+            "is_current": i == 3,
+        }
+        for i in range(n)
+    ]
+
+
+def _village_rows(n: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "village_id": i,
+            "village_title": f"Village {i}",
+            "subject": list(SubjectEnum)[i % len(SubjectEnum)],
+            "treasure": {
+                "current_amount": 40 + i,
+                "capacity": 300,
+                "production_rate": 5,
+                "last_collect_date": now,
+                "time_to_full_minutes": 120,
+                "fund_type": FundType.COIN,
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def _node_row(n: int) -> dict:
+    questions = [
+        SimpleNamespace(
+            id=i,
+            node_id=1,
+            type="multiple_choice",
+            content={"text": f"Question {i}?", "options": ["a", "b", "c", "d"], "correct_index": i % 4},
+            order_index=i,
+        )
+        for i in range(n)
+    ]
+    return {
+        "id": 1, "passage_id": 1, "title": "Node", "content": "Lorem ipsum " * 40, "is_boss": False,
+        "config": {"timer": 30}, "pass_score": 70, "reward_coins": 10, "reward_xp": 5,
+        "questions": questions, "questions_status": "ready",
+    }
+
+
+def _as_models(endpoint: str, rows):
+    """What the controllers returned before: one model per row."""
+    if endpoint == "castles":
+        return [BuildingCastleUserRead.model_validate(r) for r in rows]
+    if endpoint == "villages":
+        return [BuildingVillageUserRead.model_validate(r) for r in rows]
+    if endpoint == "villages_status":
+        return [
+            VillageStatus(**{**r, "treasure": TreasureStatus(**r["treasure"])})
+            for r in rows
+        ]
+    return NodeDetailedRead(**{**rows, "questions": [QuestionRead.model_validate(q) for q in rows["questions"]]})
+
+
+async def _models_path(route: APIRoute, endpoint: str, rows) -> bytes:
+    content = await serialize_response(field=route.response_field, response_content=_as_models(endpoint, rows))
+    return JSONResponse(content).body
+
+
+def _percentiles(samples: list[float]) -> tuple[float, float]:
+    cuts = statistics.quantiles(samples, n=100)
+    return cuts[49], cuts[98]
+
+
+async def _measure(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def _route(router, path: str) -> APIRoute:
+    return next(r for r in router.routes if isinstance(r, APIRoute) and r.path.endswith(path))
+
+
+async def main(iterations: int, rows: int) -> None:
+    cases = [
+        ("castles", _route(buildings.router, "/castles"), buildings._castles_json,
+         _building_rows(rows, BuildingType.CASTLE)),
+        ("villages", _route(buildings.router, "/villages"), buildings._villages_json,
+         _building_rows(rows, BuildingType.VILLAGE)),
+        ("villages_status", _route(collectors.router, "/villages"), collectors._villages_json,
+         _village_rows(rows)),
+        ("node", _route(roadmaps.router, "/nodes/{node_id}"), roadmaps._node_json, _node_row(rows)),
+    ]
+
+    print(f"{'endpoint':16} {'models p50':>11} {'p99':>8} {'fast p50':>9} {'p99':>8} {'speedup':>8}  (us)")
+    for endpoint, route, serializer, data in cases:
+        async def models():
+            return await _models_path(route, endpoint, data)
+
+        async def fast():
+            return serializer.response(data).body
+
+        for fn in (models, fast):  # warm up
+            await _measure(fn, 50)
+        m50, m99 = _percentiles(await _measure(models, iterations))
+        f50, f99 = _percentiles(await _measure(fast, iterations))
+        print(f"{endpoint:16} {m50:11.1f} {m99:8.1f} {f50:9.1f} {f99:8.1f} {m50 / f50:7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=30, help="rows per list response / questions per node")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.rows))
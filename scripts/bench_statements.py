@@ -0,0 +1,126 @@
+"""
+Per-call CPU cost of the repository hot statements, before and after declaring them once.
+
+"inline" rebuilds the construct on every call (what the repositories used to do),
+"prebuilt" reuses the module-level statement registered with @hot_statement.
+Both go through SQLAlchemy's compiled cache exactly like Connection.execute does,
+so the numbers are the Python overhead in front of the database round trip.
+
+Every statement is first executed with sample params for each of its binds: compiled
+the way Connection.execute compiles it (bind names as column keys, which is where an
+UPDATE bind named like a column fails) and, with --db, run against the database in a
+transaction that is rolled back. Any failure exits non-zero before benchmarking.
+
+    python -m scripts.bench_statements [--calls 20000] [--db]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Any
+
+from sqlalchemy import Date, DateTime, Enum, String
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.sql import Executable
+
+from src.app.config import settings
+from src.app.database import make_engine
+
+import src.repositories  # noqa: F401  (imports every repository module, filling the registry)
+from src.repositories.statements import HOT_STATEMENTS
+
+
+def _sample(bind) -> Any:
+    type_ = bind.type
+    if isinstance(type_, Enum):
+        value = next(iter(type_.enum_class)) if type_.enum_class else type_.enums[0]
+    elif isinstance(type_, DateTime):
+        value = datetime.now(timezone.utc)
+    elif isinstance(type_, Date):
+        value = date.today()
+    elif isinstance(type_, String):
+        value = "x"
+    else:  # ids, counters and untyped binds
+        value = 1
+    return [value] if bind.expanding else value
+
+
+def sample_params(stmt: Executable, dialect) -> dict[str, Any]:
+    """One value per named bind of the statement (literals SQLAlchemy generated itself are skipped)."""
+    compiled = stmt.compile(dialect=dialect)
+    return {bind.key: _sample(bind) for bind in compiled.binds.values() if not bind.unique}
+
+
+def check_execute_path(stmt: Executable, params: dict[str, Any], dialect) -> None:
+    compiled = stmt.compile(dialect=dialect, column_keys=list(params))
+    compiled.construct_params(params)
+
+
+async def check_database(statements: dict[str, tuple[Executable, dict[str, Any]]]) -> list[str]:
+    engine = make_engine(settings.db_url)
+    failures = []
+    try:
+        for name, (stmt, params) in statements.items():
+            async with engine.connect() as conn:
+                transaction = await conn.begin()
+                try:
+                    await conn.execute(stmt, params)
+                except Exception as e:
+                    failures.append(f"{name}: {e}")
+                finally:
+                    await transaction.rollback()
+    finally:
+        await engine.dispose()
+    return failures
+
+
+def _per_call_us(fn, calls: int) -> float:
+    started = time.process_time()
+    for _ in range(calls):
+        fn()
+    return (time.process_time() - started) / calls * 1e6
+
+
+def main(calls: int, db: bool) -> int:
+    dialect = asyncpg_dialect()
+    compiled_cache: dict = {}
+
+    statements = {}
+    failures = []
+    for name, builder in sorted(HOT_STATEMENTS.items()):
+        stmt = builder()
+        params = sample_params(stmt, dialect)
+        statements[name] = (stmt, params)
+        try:
+            check_execute_path(stmt, params, dialect)
+        except Exception as e:
+            failures.append(f"{name}: {e}")
+    if db and not failures:
+        failures = asyncio.run(check_database(statements))
+    if failures:
+        print("statements failing with their params:", *failures, sep="\n  ", file=sys.stderr)
+        return 1
+    print(f"{len(statements)} statements execute with their params{' on the database' if db else ''}\n")
+
+    def execute_path(stmt, column_keys) -> None:
+        stmt._compile_w_cache(dialect, compiled_cache=compiled_cache, column_keys=column_keys)
+
+    print(f"{'statement':45} {'inline us':>10} {'prebuilt us':>12} {'speedup':>8}")
+    for name, builder in sorted(HOT_STATEMENTS.items()):
+        prebuilt, params = statements[name]
+        keys = sorted(params)
+        execute_path(prebuilt, keys)  # warm the compiled cache
+
+        inline = _per_call_us(lambda: execute_path(builder(), keys), calls)
+        reused = _per_call_us(lambda: execute_path(prebuilt, keys), calls)
+        print(f"{name:45} {inline:10.1f} {reused:12.1f} {inline / reused:7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--db", action="store_true", help="also run every statement on settings.db_url (rolled back)")
+    args = parser.parse_args()
+    sys.exit(main(args.calls, args.db))
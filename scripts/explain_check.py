@@ -0,0 +1,232 @@
+"""
+EXPLAIN-based regression check for the hot repository queries.
+
+Runs the real repository methods against a session stand-in that EXPLAINs every
+statement instead of executing it, then asserts that each plan reads through one
+of the expected indexes. Sequential scans are disabled for the check so small
+(or empty) databases still report whether an index is usable at all.
+
+    python -m scripts.explain_check           # against the configured database
+    python -m scripts.explain_check --seed    # seed sample rows first (rolled back)
+
+Exits with status 1 if any statement misses its indexes.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.app.config import settings
+from src.app.constants import BuildingType, FundType, SubjectEnum
+from src.app.database import make_engine
+from src.models.buildings import Building
+from src.models.node_progresses import UserNodeProgress
+from src.models.nodes import PassageNode
+from src.models.passages import Passage
+from src.models.questions import Question
+from src.models.user_villages import UserVillage
+from src.models.users import User
+from src.models.wallets import WalletBalance
+from src.repositories import (
+    PassageRepository,
+    QuestionRepository,
+    UserNodeProgressRepository,
+    UserVillageRepository,
+    WalletRepository,
+)
+
+INDEX_SCAN_TYPES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+class _EmptyResult:
+    """Enough of the Result API for repository methods to finish after an EXPLAIN."""
+
+    def scalars(self):
+        return self
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return []
+
+    def __iter__(self):
+        return iter(())
+
+    def first(self):
+        return None
+
+    def one_or_none(self):
+        return None
+
+    def scalar(self):
+        return None
+
+    def scalar_one_or_none(self):
+        return None
+
+
+class ExplainSession:
+    def __init__(self, conn: AsyncConnection):
+        self._conn = conn
+        self.plans: list[dict[str, Any]] = []
+
+    async def execute(self, stmt, *args, **kwargs):
+        sql = str(stmt.compile(dialect=self._conn.dialect, compile_kwargs={"literal_binds": True}))
+        result = await self._conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = result.scalar()
+        self.plans.append((json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"])
+        return _EmptyResult()
+
+    async def scalar(self, stmt, *args, **kwargs):
+        await self.execute(stmt)
+        return None
+
+
+def _index_scans(plan: dict[str, Any]) -> set[str]:
+    found = set()
+    if plan.get("Node Type") in INDEX_SCAN_TYPES:
+        found.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        found |= _index_scans(child)
+    return found
+
+
+@dataclass
+class Check:
+    name: str
+    run: Callable[[ExplainSession], Awaitable[Any]]
+    # every group must be satisfied by at least one of its indexes
+    expected: list[set[str]] = field(default_factory=list)
+
+
+CHECKS = [
+    Check(
+        "WalletRepository.get_balance",
+        lambda s: WalletRepository(s).get_balance(1, FundType.COIN),
+        [{"wallet_balances_pkey"}],
+    ),
+    Check(
+        "UserNodeProgressRepository.get_completed_node_ids",
+        lambda s: UserNodeProgressRepository(s).get_completed_node_ids(1, [1, 2, 3]),
+        [{"ix_user_node_progresses_user_node"}],
+    ),
+    Check(
+        "UserNodeProgressRepository.get_all_attempts",
+        lambda s: UserNodeProgressRepository(s).get_all_attempts(1, 1),
+        [{"ix_user_node_progresses_user_node"}],
+    ),
+    Check(
+        "UserVillageRepository.get_village_by_user",
+        lambda s: UserVillageRepository(s).get_village_by_user(1, 1),
+        [{"uq_user_village"}],
+    ),
+    Check(
+        "QuestionRepository.get_by_node_id",
+        lambda s: QuestionRepository(s).get_by_node_id(1),
+        [{"ix_questions_node_order"}],
+    ),
+    Check(
+        "PassageRepository.village_passages",
+        lambda s: PassageRepository(s).village_passages(1),
+        [{"ix_passages_village_order"}],
+    ),
+    Check(
+        "PassageRepository.get_village_roadmap",
+        lambda s: PassageRepository(s).get_village_roadmap(1),
+        [
+            {"ix_passages_village_order", "ix_passages_village_id"},
+            {"ix_nodes_passage_user", "ix_nodes_shared_regular", "ix_nodes_passage", "ix_nodes_passage_id"},
+        ],
+    ),
+]
+
+
+async def seed(conn: AsyncConnection, users: int = 200, passages: int = 40, nodes_per_passage: int = 10) -> None:
+    user_ids = (await conn.execute(
+        insert(User).returning(User.id),
+        [
+            {"email": f"explain-{i}@example.com", "full_name": "explain", "has_onboard": True, "is_admin": False}
+            for i in range(users)
+        ],
+    )).scalars().all()
+    village_id = (await conn.execute(
+        insert(Building).values(
+            title="explain village",
+            type=BuildingType.VILLAGE,
+            subject=SubjectEnum.ENGLISH,
+            treasure_capacity=300,
+            speed_production_treasure=1,
+        ).returning(Building.id)
+    )).scalar_one()
+    passage_ids = (await conn.execute(
+        insert(Passage).returning(Passage.id),
+        [{"village_id": village_id, "title": f"p{i}", "order_index": i + 1} for i in range(passages)],
+    )).scalars().all()
+    node_ids = (await conn.execute(
+        insert(PassageNode).returning(PassageNode.id),
+        [
+            {"passage_id": p, "title": f"n{i}", "is_boss": False, "config": {}}
+            for p in passage_ids
+            for i in range(nodes_per_passage)
+        ],
+    )).scalars().all()
+    await conn.execute(
+        insert(Question),
+        [
+            {"node_id": n, "type": "multiple_choice", "content": {}, "order_index": i + 1}
+            for n in node_ids
+            for i in range(5)
+        ],
+    )
+    await conn.execute(insert(UserVillage), [{"user_id": u, "village_id": village_id} for u in user_ids])
+    await conn.execute(
+        insert(WalletBalance),
+        [{"user_id": u, "fund_type": FundType.COIN, "balance": 0} for u in user_ids],
+    )
+    await conn.execute(
+        insert(UserNodeProgress),
+        [
+            {"user_id": u, "node_id": n, "accuracy": 1.0, "xp": 0, "correct_answer": 1}
+            for u in user_ids
+            for n in random.sample(node_ids, 20)
+        ],
+    )
+    for table in ("users", "buildings", "passages", "nodes", "questions",
+                  "user_villages", "wallet_balances", "user_node_progresses"):
+        await conn.exec_driver_sql(f"ANALYZE {table}")
+
+
+async def main(with_seed: bool) -> int:
+    engine = make_engine(settings.db_url)
+    failures = 0
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            if with_seed:
+                await seed(conn)
+            await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for check in CHECKS:
+                session = ExplainSession(conn)
+                await check.run(session)
+                used = set().union(*(_index_scans(plan) for plan in session.plans))
+                missing = [group for group in check.expected if not group & used]
+                status = "ok" if not missing else "MISSING " + ", ".join(sorted(set().union(*missing)))
+                failures += bool(missing)
+                print(f"{check.name:55} {status}  (used: {', '.join(sorted(used)) or '-'})")
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="insert sample rows before checking (rolled back)")
+    sys.exit(asyncio.run(main(parser.parse_args().seed)))
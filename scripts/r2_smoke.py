@@ -0,0 +1,84 @@
+"""
+Round trip against the configured R2 endpoint or a local S3 stand-in.
+
+    docker compose --profile storage up -d minio
+    R2_ENDPOINT_URL=http://localhost:9000 CLOUDFLARE_ACCESS_KEY_ID=minioadmin \\
+    CLOUDFLARE_SECRET_KEY_ID=minioadmin CLOUDFLARE_BUCKET_NAME=koala \\
+    CLOUDFLARE_PUBLIC_BASE_URL=http://localhost:9000/koala python -m scripts.r2_smoke
+
+Uploads a batch concurrently through one shared client, reads every object back,
+deletes the batch and exits non-zero on any mismatch.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from src.app.cloudflare_r2 import CloudflareR2Service, R2Config, R2Upload
+from src.app.config import settings
+
+
+async def main(count: int) -> int:
+    service = CloudflareR2Service(
+        R2Config(
+            account_id=settings.CLOUDFLARE_ACCOUNT_ID,
+            access_key_id=settings.CLOUDFLARE_ACCESS_KEY_ID,
+            secret_access_key=settings.CLOUDFLARE_SECRET_KEY_ID,
+            bucket_name=settings.CLOUDFLARE_BUCKET_NAME,
+            public_base_url=settings.CLOUDFLARE_PUBLIC_BASE_URL,
+            endpoint_override=settings.R2_ENDPOINT_URL,
+            max_pool_connections=settings.R2_MAX_POOL_CONNECTIONS,
+            upload_concurrency=settings.R2_UPLOAD_CONCURRENCY,
+        )
+    )
+    await service.start()
+    client = service._get_client()
+    bucket = settings.CLOUDFLARE_BUCKET_NAME
+    try:
+        if settings.R2_ENDPOINT_URL:
+            # local stand-ins start empty
+            try:
+                await client.head_bucket(Bucket=bucket)
+            except client.exceptions.ClientError:
+                await client.create_bucket(
+                    Bucket=bucket,
+                    CreateBucketConfiguration={"LocationConstraint": "auto"},
+                )
+
+        uploads = [
+            R2Upload(
+                key=service.build_key(f"smoke-{i}", "svg", prefix="smoke"),
+                body=f"<svg id='{i}'/>".encode(),
+                content_type="image/svg+xml",
+            )
+            for i in range(count)
+        ]
+        started = time.perf_counter()
+        urls = await service.upload_many(uploads)
+        elapsed = time.perf_counter() - started
+        print(f"uploaded {count} objects in {elapsed * 1000:.0f} ms")
+
+        failures = 0
+        for upload, url in zip(uploads, urls):
+            if service.key_from_url(url) != upload.key:
+                print(f"url does not map back to its key: {url}")
+                failures += 1
+                continue
+            obj = await client.get_object(Bucket=bucket, Key=upload.key)
+            async with obj["Body"] as stream:
+                body = await stream.read()
+            if body != upload.body or obj["ContentType"] != upload.content_type:
+                print(f"mismatch for {upload.key}")
+                failures += 1
+
+        await service.delete_many([u.key for u in uploads])
+        print("ok" if not failures else f"{failures} failures")
+        return 1 if failures else 0
+    finally:
+        await service.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=32)
+    sys.exit(asyncio.run(main(parser.parse_args().count)))
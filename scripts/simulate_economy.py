@@ -0,0 +1,47 @@
+"""
+Whole-population treasure accrual: what every castle and village holds now, or after N hours.
+
+Streams user castles and villages over a server-side cursor and runs the batch
+accrual engine chunk by chunk, so memory stays flat for millions of rows.
+Read-only; nothing is collected or written.
+
+    python -m scripts.simulate_economy                # as of now
+    python -m scripts.simulate_economy --hours 24     # if nobody collects for a day
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from src.app.config import settings
+from src.app.constants import FundType
+from src.app.database import make_engine, make_sessionmaker
+from src.app.treasure import accrue_population
+from src.repositories import UserCastleRepository, UserVillageRepository
+
+
+async def main(hours: float, chunk_size: int) -> None:
+    engine = make_engine(settings.db_url)
+    sessionmaker = make_sessionmaker(engine)
+    at = datetime.now(timezone.utc) + timedelta(hours=hours)
+    report = {"at": at.isoformat()}
+    try:
+        for name, fund_type, repository_cls in (
+                ("castles", FundType.CRYSTAL, UserCastleRepository),
+                ("villages", FundType.COIN, UserVillageRepository),
+        ):
+            async with sessionmaker() as session:
+                rows = repository_cls(session).stream_treasure_rows(chunk_size)
+                summary = await accrue_population(rows, at)
+            report[name] = {"fund_type": fund_type, **summary.as_dict()}
+    finally:
+        await engine.dispose()
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=0.0, help="simulate this many hours from now")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.hours, args.chunk_size))
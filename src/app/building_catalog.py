@@ -0,0 +1,200 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.cache import CacheBackend
+from src.app.constants import BuildingType, SubjectEnum
+from src.models.buildings import Building
+from src.repositories import BuildingRepository
+
+ChainKey = tuple[BuildingType, SubjectEnum | None]
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogBuilding:
+    id: int
+    title: str
+    type: BuildingType
+    svg: str | None
+    treasure_capacity: int
+    speed_production_treasure: int
+    cost: int | None
+    subject: SubjectEnum | None
+    next_building_id: int | None
+
+    @classmethod
+    def from_model(cls, building: Building) -> "CatalogBuilding":
+        return cls(
+            id=building.id,
+            title=building.title,
+            type=building.type,
+            svg=building.svg,
+            treasure_capacity=building.treasure_capacity,
+            speed_production_treasure=building.speed_production_treasure,
+            cost=building.cost,
+            subject=building.subject,
+            next_building_id=building.next_building_id,
+        )
+
+
+def chain_key(building_type: BuildingType, subject: SubjectEnum | None = None) -> ChainKey:
+    return building_type, subject if building_type == BuildingType.VILLAGE else None
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogSnapshot:
+    """Immutable view of the catalog; readers keep using the one they got even if a reload swaps it."""
+    version: int
+    buildings: dict[int, CatalogBuilding] = field(default_factory=dict)
+    chains: dict[ChainKey, tuple[CatalogBuilding, ...]] = field(default_factory=dict)
+    positions: dict[int, int] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, version: int, buildings: Iterable[CatalogBuilding]) -> "CatalogSnapshot":
+        by_id = {b.id: b for b in sorted(buildings, key=lambda b: b.id)}
+
+        groups: dict[ChainKey, list[CatalogBuilding]] = {}
+        for building in by_id.values():
+            groups.setdefault(chain_key(building.type, building.subject), []).append(building)
+
+        chains: dict[ChainKey, tuple[CatalogBuilding, ...]] = {}
+        positions: dict[int, int] = {}
+        for key, group in groups.items():
+            chain = _walk_chain(group)
+            chains[key] = tuple(chain)
+            positions.update({b.id: i for i, b in enumerate(chain)})
+
+        return cls(version=version, buildings=by_id, chains=chains, positions=positions)
+
+    def get(self, building_id: int) -> CatalogBuilding | None:
+        return self.buildings.get(building_id)
+
+    def chain(self, building_type: BuildingType, subject: SubjectEnum | None = None) -> tuple[CatalogBuilding, ...]:
+        return self.chains.get(chain_key(building_type, subject), ())
+
+    def list(self, building_type: BuildingType, subject: SubjectEnum | None = None) -> tuple[CatalogBuilding, ...]:
+        """Like `chain`, but villages without a subject means every subject's chain."""
+        if building_type == BuildingType.VILLAGE and subject is None:
+            keys = sorted(
+                (key for key in self.chains if key[0] == BuildingType.VILLAGE and key[1] is not None),
+                key=lambda key: key[1].value,
+            )
+            return tuple(b for key in keys for b in self.chains[key])
+        return self.chain(building_type, subject)
+
+    def position(self, building_id: int) -> int | None:
+        return self.positions.get(building_id)
+
+    def first(self, building_type: BuildingType, subject: SubjectEnum | None = None) -> CatalogBuilding | None:
+        chain = self.chain(building_type, subject)
+        return chain[0] if chain else None
+
+    def last(self, building_type: BuildingType, subject: SubjectEnum | None = None) -> CatalogBuilding | None:
+        chain = self.chain(building_type, subject)
+        return chain[-1] if chain else None
+
+    def next(self, building_id: int) -> CatalogBuilding | None:
+        return self._neighbour(building_id, 1)
+
+    def prev(self, building_id: int) -> CatalogBuilding | None:
+        return self._neighbour(building_id, -1)
+
+    def next_for(
+            self,
+            building_type: BuildingType,
+            current_id: int | None,
+            subject: SubjectEnum | None = None,
+    ) -> CatalogBuilding | None:
+        """Building a user moves to next: the chain head if they have none yet."""
+        if current_id is None:
+            return self.first(building_type, subject)
+        return self.next(current_id)
+
+    def _neighbour(self, building_id: int, step: int) -> CatalogBuilding | None:
+        building = self.buildings.get(building_id)
+        if building is None:
+            return None
+        chain = self.chain(building.type, building.subject)
+        index = self.positions[building_id] + step
+        return chain[index] if 0 <= index < len(chain) else None
+
+
+def _walk_chain(group: list[CatalogBuilding]) -> list[CatalogBuilding]:
+    """
+    Order a (type, subject) group by its next_building_id links, starting from the
+    building nobody points to. Buildings not reachable from a head (broken links,
+    cycles) are appended in id order so they never disappear from listings.
+    """
+    by_id = {b.id: b for b in group}
+    pointed_to = {b.next_building_id for b in group if b.next_building_id in by_id}
+
+    chain: list[CatalogBuilding] = []
+    seen: set[int] = set()
+    for head in (b for b in group if b.id not in pointed_to):
+        current = head
+        while current is not None and current.id not in seen:
+            chain.append(current)
+            seen.add(current.id)
+            current = by_id.get(current.next_building_id)
+
+    chain.extend(b for b in group if b.id not in seen)
+    return chain
+
+
+class BuildingCatalog:
+    """
+    In-process copy of the castle/village catalog.
+    The version counter lives in the shared cache backend: an admin mutation bumps it
+    after commit, and every process reloads the next time it sees a newer version.
+    A snapshot older than `max_age_seconds` is reloaded regardless, since a per-process
+    backend ("memory") never shows a process the bumps made by the others.
+    The catalog is for reads; writes to a chain go through BuildingRepository.lock_chain.
+    """
+    VERSION_KEY = "building_catalog:version"
+
+    def __init__(
+            self,
+            sessionmaker: async_sessionmaker[AsyncSession],
+            backend: CacheBackend,
+            max_age_seconds: float = 30.0,
+    ):
+        self._sessionmaker = sessionmaker
+        self._backend = backend
+        self._max_age = max_age_seconds
+        self._snapshot: CatalogSnapshot | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_current(self, version: int) -> bool:
+        return (
+            self._snapshot is not None
+            and self._snapshot.version == version
+            and time.monotonic() - self._loaded_at < self._max_age
+        )
+
+    async def get(self) -> CatalogSnapshot:
+        version = await self._backend.get_counter(self.VERSION_KEY)
+        snapshot = self._snapshot
+        if self._is_current(version):
+            return snapshot
+        return await self.reload(version)
+
+    async def reload(self, version: int | None = None) -> CatalogSnapshot:
+        if version is None:
+            version = await self._backend.get_counter(self.VERSION_KEY)
+        async with self._lock:
+            if self._is_current(version):
+                return self._snapshot
+            async with self._sessionmaker() as session:
+                buildings = await BuildingRepository(session).get_catalog()
+            snapshot = CatalogSnapshot.build(version, (CatalogBuilding.from_model(b) for b in buildings))
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+            return snapshot
+
+    async def invalidate(self) -> None:
+        version = await self._backend.incr(self.VERSION_KEY)
+        await self.reload(version)
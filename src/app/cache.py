@@ -0,0 +1,222 @@
+import json
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+from src.app.config import Settings
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Any | None: ...
+
+    async def set(self, key: str, value: Any, ttl_seconds: int | None = None) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def incr(self, key: str) -> int: ...
+
+    async def get_counter(self, key: str) -> int: ...
+
+    async def counter_epoch(self) -> str:
+        """Changes whenever the counters may have restarted from zero; pair it with counter values."""
+        ...
+
+
+class TTLCache:
+    """Size-bounded LRU with optional per-entry TTL."""
+
+    def __init__(self, max_size: int = 10_000, ttl_seconds: float | None = None):
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._items: OrderedDict[Any, tuple[float | None, Any]] = OrderedDict()
+
+    def get(self, key: Any) -> Any | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any, ttl_seconds: float | None = None) -> None:
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else self._ttl_seconds
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        self._items[key] = (expires_at, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def delete(self, key: Any) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class LRUCacheBackend:
+    """
+    In-process LRU with per-entry TTL.
+    Counters live outside the LRU so a version is never evicted and reused.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self._items = TTLCache(max_size=max_size)
+        self._counters: dict[str, int] = {}
+        # counters die with the process, so every instance is a new epoch
+        self._epoch = secrets.token_hex(8)
+
+    async def get(self, key: str) -> Any | None:
+        return self._items.get(key)
+
+    async def set(self, key: str, value: Any, ttl_seconds: int | None = None) -> None:
+        self._items.set(key, value, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        self._items.delete(key)
+
+    async def incr(self, key: str) -> int:
+        value = self._counters.get(key, 0) + 1
+        self._counters[key] = value
+        return value
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def counter_epoch(self) -> str:
+        return self._epoch
+
+
+class RedisCacheBackend:
+    """
+    Shared backend over a redis.asyncio-compatible client.
+    Values are stored as JSON so every worker reads the same snapshot.
+    """
+    EPOCH_KEY = "counters:epoch"
+
+    def __init__(self, client: Any, prefix: str = "koala:"):
+        self._client = client
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Any | None:
+        raw = await self._client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: int | None = None) -> None:
+        await self._client.set(self._prefix + key, json.dumps(value, default=str), ex=ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self._prefix + key)
+
+    async def incr(self, key: str) -> int:
+        return int(await self._client.incr(self._prefix + key))
+
+    async def get_counter(self, key: str) -> int:
+        raw = await self._client.get(self._prefix + key)
+        return int(raw) if raw is not None else 0
+
+    async def counter_epoch(self) -> str:
+        # stored beside the counters: a flushed or restarted Redis loses both together
+        key = self._prefix + self.EPOCH_KEY
+        raw = await self._client.get(key)
+        if raw is None:
+            await self._client.set(key, secrets.token_hex(8), nx=True)  # first writer wins
+            raw = await self._client.get(key)
+        return raw.decode() if isinstance(raw, bytes) else str(raw)
+
+
+class LocalRedisClient:
+    """Dict-backed stand-in for redis.asyncio.Redis (get/set/delete/incr) for local runs and tests."""
+
+    def __init__(self):
+        self._data: dict[str, tuple[float | None, str]] = {}
+
+    async def get(self, key: str) -> str | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ex: int | None = None, nx: bool = False) -> bool | None:
+        if nx and await self.get(key) is not None:
+            return None
+        self._data[key] = (time.monotonic() + ex if ex else None, str(value))
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        expires_at = self._data[key][0] if key in self._data else None
+        self._data[key] = (expires_at, str(value))
+        return value
+
+    async def aclose(self) -> None:
+        self._data.clear()
+
+
+def make_cache_backend(settings: Settings) -> CacheBackend:
+    backend = settings.CACHE_BACKEND
+    if backend == "memory":
+        return LRUCacheBackend(max_size=settings.CACHE_MAX_SIZE)
+    if backend == "local":
+        return RedisCacheBackend(LocalRedisClient())
+    if backend == "redis":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        if not settings.REDIS_URL:
+            raise RuntimeError("CACHE_BACKEND=redis requires REDIS_URL")
+        return RedisCacheBackend(redis_asyncio.from_url(settings.REDIS_URL))
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+
+class RoadmapCache:
+    """
+    Roadmap snapshots keyed by (user_id, village_id, content_version).
+    Admin content edits bump the global content version; a user's submit bumps
+    that user's generation, so stale snapshots are simply never read again.
+    """
+    CONTENT_VERSION_KEY = "roadmap:content_version"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = 600):
+        self._backend = backend
+        self._ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _user_generation_key(user_id: int) -> str:
+        return f"roadmap:user_generation:{user_id}"
+
+    async def key(self, user_id: int, village_id: int) -> str:
+        """
+        Read the versions once, before the roadmap is loaded, and pass the key to both
+        `get` and `set`: a write committed while the roadmap was built then bumps a
+        version past this key instead of having the pre-write roadmap stored under it.
+        """
+        content_version = await self._backend.get_counter(self.CONTENT_VERSION_KEY)
+        user_generation = await self._backend.get_counter(self._user_generation_key(user_id))
+        return f"roadmap:{user_id}:{village_id}:{content_version}:{user_generation}"
+
+    async def get(self, key: str) -> list[dict[str, Any]] | None:
+        return await self._backend.get(key)
+
+    async def set(self, key: str, snapshot: list[dict[str, Any]]) -> None:
+        await self._backend.set(key, snapshot, self._ttl_seconds)
+
+    async def invalidate_user(self, user_id: int) -> None:
+        await self._backend.incr(self._user_generation_key(user_id))
+
+    async def bump_content_version(self) -> None:
+        await self._backend.incr(self.CONTENT_VERSION_KEY)
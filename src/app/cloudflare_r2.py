@@ -1,8 +1,18 @@
+import asyncio
 import uuid
+from contextlib import AsyncExitStack
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, AsyncIterator
 
 import aioboto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from src.app.errors import PayloadTooLargeException
+
+DEFAULT_PUBLIC_BASE_URL = "https://pub-6e27f01380fe441daf5372813946fbcd.r2.dev"
+# S3/R2 minimum size of every multipart part except the last
+MULTIPART_PART_SIZE = 5 * 1024 * 1024
 
 
 @dataclass(frozen=True, slots=True)
@@ -11,28 +21,83 @@ class R2Config:
     access_key_id: str
     secret_access_key: str
     bucket_name: str
+    # objects are served from here (r2.dev subdomain or a custom domain)
+    public_base_url: str = DEFAULT_PUBLIC_BASE_URL
+    # S3-compatible endpoint override, e.g. a local MinIO
+    endpoint_override: str | None = None
+    max_pool_connections: int = 20
+    upload_concurrency: int = 8
+    connect_timeout_seconds: float = 5.0
+    read_timeout_seconds: float = 30.0
+    max_attempts: int = 3
+    presign_expires_seconds: int = 900
 
     @property
     def endpoint_url(self) -> str:
-        return f"https://{self.account_id}.r2.cloudflarestorage.com"
+        return self.endpoint_override or f"https://{self.account_id}.r2.cloudflarestorage.com"
+
+
+@dataclass(frozen=True, slots=True)
+class R2Object:
+    key: str
+    size: int
+    content_type: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class R2Upload:
+    key: str
+    body: bytes
+    content_type: str
+    extra: dict[str, Any] | None = None
 
 
 class CloudflareR2Service:
+    """
+    Process-wide R2 client. `start` opens one S3 client (and its connection pool)
+    for the lifetime of the app, `aclose` releases it on shutdown.
+    """
+
     def __init__(self, cfg: R2Config):
         self._cfg = cfg
-        self._session = aioboto3.session.Session()
+        self._exit_stack: AsyncExitStack | None = None
         self._client = None
+        self._upload_semaphore = asyncio.Semaphore(cfg.upload_concurrency)
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        exit_stack = AsyncExitStack()
+        self._client = await exit_stack.enter_async_context(
+            aioboto3.Session().client(
+                "s3",
+                endpoint_url=self._cfg.endpoint_url,
+                aws_access_key_id=self._cfg.access_key_id,
+                aws_secret_access_key=self._cfg.secret_access_key,
+                region_name="auto",
+                config=Config(
+                    max_pool_connections=self._cfg.max_pool_connections,
+                    connect_timeout=self._cfg.connect_timeout_seconds,
+                    read_timeout=self._cfg.read_timeout_seconds,
+                    retries={"max_attempts": self._cfg.max_attempts, "mode": "standard"},
+                ),
+            )
+        )
+        self._exit_stack = exit_stack
+
+    async def aclose(self) -> None:
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._exit_stack = None
+        self._client = None
+
+    @property
+    def presign_expires_seconds(self) -> int:
+        return self._cfg.presign_expires_seconds
 
-    async def _get_client(self):
+    def _get_client(self):
         if self._client is None:
-            async with self._session.client(
-                    "s3",
-                    endpoint_url=self._cfg.endpoint_url,
-                    aws_access_key_id=self._cfg.access_key_id,
-                    aws_secret_access_key=self._cfg.secret_access_key,
-                    region_name="auto"
-            ) as client:
-                self._client = client
+            raise RuntimeError("CloudflareR2Service is not started")
         return self._client
 
     @staticmethod
@@ -42,23 +107,131 @@ class CloudflareR2Service:
         key = f"{media_name}-{uuid.uuid4()}.{media_type}" if media_type else media_name
         return f"{prefix.strip().strip('/')}/{key}".lstrip("/") if prefix else key
 
+    def public_url(self, key: str) -> str:
+        return f"{self._cfg.public_base_url.rstrip('/')}/{key}"
+
+    def key_from_url(self, url: str) -> str:
+        base = self._cfg.public_base_url.rstrip("/") + "/"
+        if url.startswith(base):
+            return url[len(base):]
+        # objects uploaded under another public host
+        return url.rsplit("/", 1)[-1]
+
     async def upload_bytes(
             self,
             *,
             key: str,
             body: bytes,
             content_type: str,
+            extra: dict[str, Any] | None = None,
     ) -> str:
-        client = await self._get_client()
         kwargs: dict[str, Any] = {
             "Bucket": self._cfg.bucket_name,
             "Key": key,
             "Body": body,
             "ContentType": content_type,
+            **(extra or {}),
         }
-        await client.put_object(**kwargs)
-        return f"https://pub-6e27f01380fe441daf5372813946fbcd.r2.dev/{key}"
+        async with self._upload_semaphore:
+            await self._get_client().put_object(**kwargs)
+        return self.public_url(key)
+
+    async def upload_many(self, uploads: list[R2Upload]) -> list[str]:
+        """Upload concurrently (bounded by upload_concurrency); returns public URLs in input order."""
+        return list(await asyncio.gather(*(
+            self.upload_bytes(key=u.key, body=u.body, content_type=u.content_type, extra=u.extra)
+            for u in uploads
+        )))
+
+    async def presign_put(self, *, key: str, content_type: str) -> str:
+        """URL the client PUTs the object to directly; the same Content-Type header must be sent."""
+        return await self._get_client().generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self._cfg.bucket_name, "Key": key, "ContentType": content_type},
+            ExpiresIn=self._cfg.presign_expires_seconds,
+        )
+
+    async def head(self, key: str) -> R2Object | None:
+        try:
+            meta = await self._get_client().head_object(Bucket=self._cfg.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return R2Object(key=key, size=meta["ContentLength"], content_type=meta.get("ContentType"))
+
+    async def read(self, key: str) -> bytes:
+        response = await self._get_client().get_object(Bucket=self._cfg.bucket_name, Key=key)
+        async with response["Body"] as body:
+            return await body.read()
+
+    async def upload_stream(
+            self,
+            *,
+            key: str,
+            chunks: AsyncIterator[bytes],
+            content_type: str,
+            max_bytes: int | None = None,
+            part_size: int = MULTIPART_PART_SIZE,
+    ) -> int:
+        """
+        Multipart upload from an async byte stream holding at most one part in memory.
+        Aborts the upload (nothing is stored) on any error or when `max_bytes` is exceeded.
+        Returns the number of bytes stored.
+        """
+        client = self._get_client()
+        created = await client.create_multipart_upload(
+            Bucket=self._cfg.bucket_name,
+            Key=key,
+            ContentType=content_type,
+        )
+        upload_id = created["UploadId"]
+        parts: list[dict[str, Any]] = []
+        buffer = bytearray()
+        total = 0
+
+        async def flush(data: bytes) -> None:
+            part_number = len(parts) + 1
+            uploaded = await client.upload_part(
+                Bucket=self._cfg.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+            parts.append({"PartNumber": part_number, "ETag": uploaded["ETag"]})
+
+        try:
+            async for chunk in chunks:
+                total += len(chunk)
+                if max_bytes is not None and total > max_bytes:
+                    raise PayloadTooLargeException(f"Upload exceeds {max_bytes} bytes")
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    await flush(bytes(buffer[:part_size]))
+                    del buffer[:part_size]
+            if buffer or not parts:
+                await flush(bytes(buffer))
+            await client.complete_multipart_upload(
+                Bucket=self._cfg.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            await client.abort_multipart_upload(Bucket=self._cfg.bucket_name, Key=key, UploadId=upload_id)
+            raise
+        return total
 
     async def delete_file(self, *, key: str) -> None:
-        client = await self._get_client()
-        await client.delete_object(Bucket=self._cfg.bucket_name, Key=key)
+        await self._get_client().delete_object(Bucket=self._cfg.bucket_name, Key=key)
+
+    async def delete_many(self, keys: list[str]) -> None:
+        if not keys:
+            return
+        # DeleteObjects takes at most 1000 keys per request
+        for i in range(0, len(keys), 1000):
+            await self._get_client().delete_objects(
+                Bucket=self._cfg.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys[i:i + 1000]], "Quiet": True},
+            )
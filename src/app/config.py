@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 
 from pydantic_settings import BaseSettings
 
@@ -13,8 +14,56 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_PORT: int
     POSTGRES_PASSWORD: str
+    # Streaming replica for read-only endpoints; unset keeps every query on the primary
+    POSTGRES_REPLICA_HOST: Optional[str] = None
+    POSTGRES_REPLICA_PORT: Optional[int] = None
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 2.0
+    # a lag probe slower than this counts as a failed one (reads go to the primary)
+    DB_REPLICA_LAG_CHECK_TIMEOUT_SECONDS: float = 1.0
+    # after a user's write their reads stay on the primary this long
+    DB_READ_YOUR_WRITES_SECONDS: int = 10
 
     OPENAI_API_KEY: str
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    OPENAI_MAX_CONCURRENCY: int = 8
+    OPENAI_MAX_CONNECTIONS: int = 20
+    OPENAI_TIMEOUT_SECONDS: float = 60.0
+    OPENAI_MAX_RETRIES: int = 3
+    OPENAI_RETRY_BACKOFF_SECONDS: float = 0.5
+    OPENAI_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    OPENAI_CIRCUIT_RESET_SECONDS: float = 30.0
+    # Background question generation
+    QUESTION_GENERATION_WORKERS: int = 4
+    QUESTION_GENERATION_QUEUE_SIZE: int = 1000
+    # 0 disables the periodic pre-warm pass
+    QUESTION_PREWARM_INTERVAL_SECONDS: float = 0
+    QUESTION_PREWARM_LOOKAHEAD: int = 3
+    QUESTION_PREWARM_ACTIVE_DAYS: int = 7
+    # Onboarding node generation: passages per LLM request / requests in flight
+    NODE_GENERATION_CHUNK_SIZE: int = 4
+    NODE_GENERATION_CONCURRENCY: int = 4
+    # Content-addressed LLM output cache (Postgres)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 50_000
+    LLM_CACHE_EVICTION_INTERVAL_SECONDS: float = 3600
+    # Answer chat completions locally instead of calling OpenAI (offline runs/tests)
+    OPENAI_FAKE_TRANSPORT: bool = False
+    # DB pool, per uvicorn worker: keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) under max_connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # "always" | "idle" (ping only connections idle longer than DB_POOL_PRE_PING_IDLE_SECONDS) | "never"
+    DB_POOL_PRE_PING: str = "idle"
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 60.0
+    # SQLAlchemy compiled-statement cache and asyncpg prepared statements per connection
+    DB_QUERY_CACHE_SIZE: int = 1200
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    # 0 disables
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_SLOW_QUERY_MS: float = 500.0
     SECRET_KEY: str
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 300
@@ -24,6 +73,13 @@ class Settings(BaseSettings):
 
     CLOUDFLARE_SECRET_KEY_ID: str
     CLOUDFLARE_BUCKET_NAME: str
+    CLOUDFLARE_PUBLIC_BASE_URL: str = "https://pub-6e27f01380fe441daf5372813946fbcd.r2.dev"
+    # S3-compatible endpoint override for local runs (e.g. MinIO at http://localhost:9000)
+    R2_ENDPOINT_URL: Optional[str] = None
+    R2_MAX_POOL_CONNECTIONS: int = 20
+    R2_UPLOAD_CONCURRENCY: int = 8
+    R2_PRESIGN_EXPIRES_SECONDS: int = 900
+    BUILDING_SVG_MAX_BYTES: int = 2 * 1024 * 1024
 
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
@@ -36,6 +92,26 @@ class Settings(BaseSettings):
     # Frontend URL for web app redirects
     FRONTEND_URL: str = "http://localhost:3000"
 
+    # Cache: "memory" (per-process LRU), "redis" (shared) or "local" (in-process redis stand-in)
+    CACHE_BACKEND: str = "memory"
+    CACHE_MAX_SIZE: int = 10_000
+    REDIS_URL: Optional[str] = None
+    ROADMAP_CACHE_TTL_SECONDS: int = 600
+    # upper bound on how stale a worker's building catalog gets when it misses a version bump
+    BUILDING_CATALOG_MAX_AGE_SECONDS: float = 30.0
+    # > 0: castle taps are answered from memory and written once per window per user (write-behind);
+    # 0 (default) writes every tap in its own request
+    TAP_FLUSH_INTERVAL_SECONDS: float = 0
+    # failed flushes of the same taps before they are dead-lettered (logged and dropped)
+    TAP_FLUSH_MAX_ATTEMPTS: int = 5
+    # open status streams re-check the shared counters (writes on other workers) this often
+    STATUS_STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # Authenticated user snapshots and verified access tokens (per process)
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10_000
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+
     class Config:
         extra = "ignore"
         env_file = BASE_DIR / ".env"
@@ -50,6 +126,18 @@ class Settings(BaseSettings):
             self.POSTGRES_DB
         )
 
+    @property
+    def replica_db_url(self) -> str | None:
+        if not self.POSTGRES_REPLICA_HOST:
+            return None
+        return "postgresql+asyncpg://{}:{}@{}:{}/{}".format(
+            self.POSTGRES_USER,
+            self.POSTGRES_PASSWORD,
+            self.POSTGRES_REPLICA_HOST,
+            self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT,
+            self.POSTGRES_DB
+        )
+
     @property
     def alembic_db_url(self) -> str:
         return "postgresql://{}:{}@{}:{}/{}".format(
@@ -48,6 +48,17 @@ class QuestionType(StrEnum):
     TREND_ARROW = "trend_arrow"  # Выбрать направление тренда (⬆️⬇️)
 
 
+MAX_TAPS_PER_DAY = 10
+COINS_PER_TAP = 5
+
+
+class TapRejection(StrEnum):
+    """Why record_taps applied nothing."""
+    NO_CASTLE = "no_castle"
+    LIMIT_REACHED = "limit_reached"
+    DAY_PASSED = "day_passed"  # the counter already belongs to a later UTC day (a late write-behind flush)
+
+
 class FundType(StrEnum):
     COIN = "coin"
     CRYSTAL = "crystal"
@@ -330,6 +341,12 @@ PROMPTS = {
     """
 }
 
+SVG_CONTENT_TYPE = "image/svg+xml"
+BUILDING_SVG_PREFIX = "buildings"
+
 STATUS_LOCKED = "locked"
 STATUS_AVAILABLE = "available"
 STATUS_COMPLETED = "completed"
+
+QUESTIONS_STATUS_READY = "ready"
+QUESTIONS_STATUS_PENDING = "pending"
@@ -0,0 +1,182 @@
+from functools import cached_property
+from typing import Any, cast
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.datastructures import State
+
+from src.app.building_catalog import BuildingCatalog
+from src.app.cache import RoadmapCache
+from src.app.cloudflare_r2 import CloudflareR2Service
+from src.app.config import Settings
+from src.app.db_routing import ReplicaRouter
+from src.app.grading import GradingEngine
+from src.app.llm_cache import GenerationCache
+from src.app.openai_service import OpenAIService
+from src.app.passage_node_generator import PassageNodeGenerator
+from src.app.principals import UserPrincipalCache
+from src.app.question_generator import QuestionGenerationQueue
+from src.app.status_hub import StatusHub
+from src.app.tap_aggregator import TapAggregator
+from src.app.svg_assets import SvgAssetStore
+from src.app.uow import UoW
+from src.repositories import (
+    BuildingRepository,
+    PassageNodeRepository,
+    PassageRepository,
+    QuestionRepository,
+    UserCastleRepository,
+    UserNodeProgressRepository,
+    UserRepository,
+    UserVillageRepository,
+    WalletRepository,
+)
+
+
+class _Deferred:
+    """Stands in for a per-request member of the container and builds it on first attribute access."""
+    __slots__ = ("_container", "_name")
+
+    def __init__(self, container: "RequestContainer", name: str):
+        self._container = container
+        self._name = name
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(getattr(self._container, self._name), item)
+
+
+class _DeferredView:
+    def __init__(self, container: "RequestContainer"):
+        self._container = container
+
+    def __getattr__(self, name: str) -> Any:
+        if isinstance(getattr(RequestContainer, name, None), cached_property):
+            return _Deferred(self._container, name)
+        return getattr(self._container, name)
+
+
+class RequestContainer:
+    """
+    Per-request dependency graph over one session.
+    Repositories and per-request services are built on first access and reused for
+    the rest of the request; process-wide singletons are read from app.state.
+    A controller factory resolves only this container, not one Depends per collaborator,
+    and hands the controller `deferred` members: a repository or service is only built
+    when a controller method first calls it.
+    """
+
+    def __init__(self, session: AsyncSession, state: State):
+        self.session = session
+        self._state = state
+        self.uow = UoW(session=session)
+
+    @property
+    def deferred(self) -> "RequestContainer":
+        """The same members, but repositories and services come as stand-ins built on first use."""
+        return cast(RequestContainer, _DeferredView(self))
+
+    # --- repositories ---
+    @cached_property
+    def user_repository(self) -> UserRepository:
+        return UserRepository(session=self.session)
+
+    @cached_property
+    def building_repository(self) -> BuildingRepository:
+        return BuildingRepository(session=self.session)
+
+    @cached_property
+    def passage_repository(self) -> PassageRepository:
+        return PassageRepository(session=self.session)
+
+    @cached_property
+    def passage_node_repository(self) -> PassageNodeRepository:
+        return PassageNodeRepository(session=self.session)
+
+    @cached_property
+    def user_castle_repository(self) -> UserCastleRepository:
+        return UserCastleRepository(session=self.session)
+
+    @cached_property
+    def user_village_repository(self) -> UserVillageRepository:
+        return UserVillageRepository(session=self.session)
+
+    @cached_property
+    def question_repository(self) -> QuestionRepository:
+        return QuestionRepository(session=self.session)
+
+    @cached_property
+    def user_node_progress_repository(self) -> UserNodeProgressRepository:
+        return UserNodeProgressRepository(session=self.session)
+
+    @cached_property
+    def wallet_repository(self) -> WalletRepository:
+        return WalletRepository(session=self.session)
+
+    # --- per-request services ---
+    @cached_property
+    def grading_engine(self) -> GradingEngine:
+        return GradingEngine(question_repository=self.question_repository)
+
+    @cached_property
+    def passage_node_generator(self) -> PassageNodeGenerator:
+        settings = self._state.settings
+        return PassageNodeGenerator(
+            node_repository=self.passage_node_repository,
+            openai_service=self.openai_service,
+            chunk_size=settings.NODE_GENERATION_CHUNK_SIZE,
+            max_concurrency=settings.NODE_GENERATION_CONCURRENCY,
+            generation_cache=self.generation_cache,
+        )
+
+    # --- process-wide singletons ---
+    @property
+    def settings(self) -> Settings:
+        return self._state.settings
+
+    @property
+    def sessionmaker(self) -> async_sessionmaker[AsyncSession]:
+        """Primary sessions for work outside the request transaction (after-commit hooks)."""
+        return self._state.sessionmaker
+
+    @property
+    def db_router(self) -> ReplicaRouter:
+        return self._state.db_router
+
+    @property
+    def building_catalog(self) -> BuildingCatalog:
+        return self._state.building_catalog
+
+    @property
+    def status_hub(self) -> StatusHub:
+        return self._state.status_hub
+
+    @property
+    def tap_aggregator(self) -> TapAggregator | None:
+        return self._state.tap_aggregator
+
+    @property
+    def roadmap_cache(self) -> RoadmapCache:
+        return self._state.roadmap_cache
+
+    @property
+    def cloudflare_r2(self) -> CloudflareR2Service:
+        return self._state.cloudflare_r2
+
+    @property
+    def svg_assets(self) -> SvgAssetStore:
+        return self._state.svg_assets
+
+    @property
+    def user_cache(self) -> UserPrincipalCache:
+        return self._state.user_cache
+
+    @property
+    def openai_service(self) -> OpenAIService:
+        return self._state.openai_service
+
+    @property
+    def generation_cache(self) -> GenerationCache:
+        return self._state.generation_cache
+
+    @property
+    def question_generation_queue(self) -> QuestionGenerationQueue:
+        return self._state.question_generation_queue
@@ -1,15 +1,72 @@
+from dataclasses import dataclass
+
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
+from src.app.db_instrumentation import (
+    PRE_PING_ALWAYS,
+    PRE_PING_IDLE,
+    PRE_PING_NEVER,
+    InstrumentedQueuePool,
+    PoolMetrics,
+    install_idle_pre_ping,
+    install_slow_query_log,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class DatabaseConfig:
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout_seconds: float = 30.0
+    pool_recycle_seconds: int = 1800
+    # "always" pings on every checkout, "idle" only after pre_ping_idle_seconds in the pool, "never" trusts recycle
+    pre_ping: str = PRE_PING_IDLE
+    pre_ping_idle_seconds: float = 60.0
+    # compiled SQL per engine; must hold every distinct statement shape the app issues
+    query_cache_size: int = 1200
+    # asyncpg prepared statements per connection (0 behind pgbouncer in transaction mode)
+    prepared_statement_cache_size: int = 500
+    # server-side statement_timeout, 0 disables
+    statement_timeout_ms: int = 0
+    # log statements slower than this, 0 disables
+    slow_query_ms: float = 500.0
+
+
+def make_engine(db_uri: str, cfg: DatabaseConfig = DatabaseConfig()) -> AsyncEngine:
+    if cfg.pre_ping not in (PRE_PING_ALWAYS, PRE_PING_IDLE, PRE_PING_NEVER):
+        raise ValueError(f"Unknown pre-ping strategy: {cfg.pre_ping}")
 
-def make_engine(db_uri: str) -> AsyncEngine:
-    return create_async_engine(
+    connect_args: dict = {"prepared_statement_cache_size": cfg.prepared_statement_cache_size}
+    if cfg.statement_timeout_ms:
+        connect_args["server_settings"] = {"statement_timeout": str(cfg.statement_timeout_ms)}
+
+    engine = create_async_engine(
         db_uri,
-        pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
+        poolclass=InstrumentedQueuePool,
+        pool_size=cfg.pool_size,
+        max_overflow=cfg.max_overflow,
+        pool_timeout=cfg.pool_timeout_seconds,
+        pool_recycle=cfg.pool_recycle_seconds,
+        pool_pre_ping=cfg.pre_ping == PRE_PING_ALWAYS,
+        query_cache_size=cfg.query_cache_size,
+        connect_args=connect_args,
     )
 
+    metrics = PoolMetrics()
+    engine.pool.metrics = metrics
+    if cfg.pre_ping == PRE_PING_IDLE:
+        install_idle_pre_ping(engine.sync_engine, cfg.pre_ping_idle_seconds, metrics)
+    if cfg.slow_query_ms:
+        install_slow_query_log(engine.sync_engine, cfg.slow_query_ms, metrics)
+    return engine
+
+
+def pool_metrics(engine: AsyncEngine) -> dict:
+    """Current pool gauges and checkout wait histogram of an engine built by make_engine."""
+    pool = engine.pool
+    return pool.metrics.snapshot(pool)
+
 
 def make_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
     return async_sessionmaker(
@@ -0,0 +1,131 @@
+import bisect
+import logging
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+logger = logging.getLogger(__name__)
+
+# upper bounds of the checkout wait histogram, milliseconds
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+PRE_PING_ALWAYS = "always"
+PRE_PING_IDLE = "idle"
+PRE_PING_NEVER = "never"
+
+_CHECKIN_AT = "checked_in_at"
+_QUERY_STARTED = "query_started_at"
+
+
+class PoolMetrics:
+    """Checkout wait histogram, pool timeouts and slow-query counters for one engine."""
+
+    def __init__(self):
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.timeouts = 0
+        self.slow_queries = 0
+        self.pings_failed = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+        self.wait_count += 1
+        self.wait_total_ms += ms
+        self.wait_max_ms = max(self.wait_max_ms, ms)
+
+    def snapshot(self, pool: Pool) -> dict[str, Any]:
+        buckets = {f"le_{bound}ms": 0 for bound in WAIT_BUCKETS_MS}
+        buckets["le_inf"] = 0
+        cumulative = 0
+        for key, count in zip(buckets, self.wait_buckets):
+            cumulative += count
+            buckets[key] = cumulative
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "timeouts": self.timeouts,
+            "pings_failed": self.pings_failed,
+            "slow_queries": self.slow_queries,
+            "wait": {
+                "count": self.wait_count,
+                "avg_ms": round(self.wait_total_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                "max_ms": round(self.wait_max_ms, 3),
+                "buckets": buckets,
+            },
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that reports how long each checkout waited for a connection."""
+    metrics: PoolMetrics | None = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait(time.perf_counter() - started)
+
+    def recreate(self) -> Pool:
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def install_idle_pre_ping(engine: Engine, idle_seconds: float, metrics: PoolMetrics) -> None:
+    """
+    Ping only connections that sat in the pool longer than `idle_seconds`;
+    a failed ping makes the pool drop the connection and check out a fresh one.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info[_CHECKIN_AT] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get(_CHECKIN_AT)
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            alive = engine.dialect.do_ping(dbapi_connection)
+        except Exception:
+            alive = False
+        if not alive:
+            metrics.pings_failed += 1
+            raise exc.DisconnectionError("connection failed idle pre-ping")
+
+
+def install_slow_query_log(engine: Engine, threshold_ms: float, metrics: PoolMetrics) -> None:
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_QUERY_STARTED, []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info[_QUERY_STARTED].pop()) * 1000
+        if elapsed_ms >= threshold_ms:
+            metrics.slow_queries += 1
+            logger.warning("Slow query (%.1f ms): %s", elapsed_ms, " ".join(statement.split())[:1000])
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # keep the timing stack balanced when a statement fails
+        if context.connection is not None and context.cursor is not None:
+            started = context.connection.info.get(_QUERY_STARTED)
+            if started:
+                started.pop()
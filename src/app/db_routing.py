@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.cache import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaRouter:
+    """
+    Chooses the sessionmaker for read-only requests.
+    Reads go to the replica unless it is missing, unreachable or lagging more than
+    `max_lag_seconds`, or the user wrote within the last `sticky_seconds`
+    (read-your-writes; the marker lives in the cache backend, shared by workers with CACHE_BACKEND=redis).
+    One request at a time probes the lag, for at most `lag_check_timeout_seconds`;
+    the others go by the last measurement meanwhile, so an unreachable replica never
+    holds up a request.
+    """
+
+    def __init__(
+            self,
+            primary: async_sessionmaker[AsyncSession],
+            replica: async_sessionmaker[AsyncSession] | None,
+            backend: CacheBackend,
+            max_lag_seconds: float = 5.0,
+            lag_check_seconds: float = 2.0,
+            sticky_seconds: int = 10,
+            lag_check_timeout_seconds: float = 1.0,
+    ):
+        self._primary = primary
+        self._replica = replica
+        self._backend = backend
+        self._max_lag_seconds = max_lag_seconds
+        self._lag_check_seconds = lag_check_seconds
+        self._sticky_seconds = sticky_seconds
+        self._lag_check_timeout = lag_check_timeout_seconds
+        self._lag: float | None = None
+        self._lag_checked_at = float("-inf")
+        self._lag_lock = asyncio.Lock()
+
+    @property
+    def primary(self) -> async_sessionmaker[AsyncSession]:
+        return self._primary
+
+    @staticmethod
+    def _sticky_key(user_id: int) -> str:
+        return f"db:read_your_writes:{user_id}"
+
+    async def mark_write(self, user_id: int) -> None:
+        if self._replica is not None:
+            await self._backend.set(self._sticky_key(user_id), 1, self._sticky_seconds)
+
+    async def read_sessionmaker(self, user_id: int | None = None) -> async_sessionmaker[AsyncSession]:
+        if self._replica is None:
+            return self._primary
+        if user_id is not None and await self._backend.get(self._sticky_key(user_id)) is not None:
+            return self._primary
+        if not await self.replica_is_fresh():
+            return self._primary
+        return self._replica
+
+    async def replica_is_fresh(self) -> bool:
+        if time.monotonic() - self._lag_checked_at >= self._lag_check_seconds and not self._lag_lock.locked():
+            async with self._lag_lock:
+                self._lag = await self._measure_lag()
+                self._lag_checked_at = time.monotonic()
+        return self._lag is not None and self._lag <= self._max_lag_seconds
+
+    async def _measure_lag(self) -> float | None:
+        try:
+            return await asyncio.wait_for(self._query_lag(), self._lag_check_timeout)
+        except Exception:
+            logger.warning("Replica lag check failed, reading from primary", exc_info=True)
+            return None
+
+    async def _query_lag(self) -> float:
+        async with self._replica() as session:
+            return float(await session.scalar(REPLICA_LAG_SQL))
@@ -31,6 +31,16 @@ class BadRequestException(BaseError):
     status_code = 400
 
 
+class PayloadTooLargeException(BaseError):
+    message = "Payload Too Large"
+    status_code = 413
+
+
+class ServiceUnavailableException(BaseError):
+    message = "Service Unavailable"
+    status_code = 503
+
+
 class InsufficientFundsError(BaseError):
     message = "Insufficient Funds"
     status_code = 403
@@ -0,0 +1,243 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from src.models.questions import Question
+from src.presentations.schemas.questions import (
+    MultipleChoiceContent,
+    FindErrorContent,
+    StrikeOutContent,
+    OrderingContent,
+    HighlightContent,
+    SwipeDecisionContent,
+    FillGapContent,
+    MatchingContent,
+    GraphPointContent,
+    TrendArrowContent,
+    SliderValueContent,
+)
+from src.presentations.schemas.submits import SubmitContentType
+from src.repositories import QuestionRepository
+
+ANSWER_KEY_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class AnswerKey:
+    question_id: int
+    question_type: str
+    key: Any
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionGrader:
+    compile: Callable[[dict[str, Any]], Any]
+    grade: Callable[[Any, Any], float]
+
+
+GRADERS: dict[str, QuestionGrader] = {}
+
+
+def register_grader(question_type: str, compile_key: Callable[[dict[str, Any]], Any]):
+    """Register `grade(user_answer, key) -> float` for a question type."""
+
+    def decorator(grade: Callable[[Any, Any], float]) -> Callable[[Any, Any], float]:
+        GRADERS[question_type] = QuestionGrader(compile=compile_key, grade=grade)
+        return grade
+
+    return decorator
+
+
+def normalize_answer(text: str) -> str:
+    """Typed answers are compared without surrounding whitespace and case."""
+    return text.strip().casefold()
+
+
+# --------- ANSWER KEYS ---------
+def _compile_multiple_choice(content: dict) -> frozenset[str]:
+    return frozenset(o.id for o in MultipleChoiceContent(**content).options if o.is_correct)
+
+
+def _compile_find_error(content: dict) -> int:
+    return FindErrorContent(**content).error_index
+
+
+def _compile_strike_out(content: dict) -> frozenset[int]:
+    return frozenset(StrikeOutContent(**content).correct_ids_to_remove)
+
+
+def _compile_ordering(content: dict) -> tuple[str, ...]:
+    return tuple(OrderingContent(**content).correct_order)
+
+
+def _compile_highlight(content: dict) -> str:
+    return normalize_answer(HighlightContent(**content).correct_phrase)
+
+
+def _compile_swipe_decision(content: dict) -> str:
+    return SwipeDecisionContent(**content).correct_swipe
+
+
+def _compile_fill_gap(content: dict) -> str:
+    return normalize_answer(FillGapContent(**content).correct_answer)
+
+
+def _compile_matching(content: dict) -> frozenset[tuple[str, str]]:
+    return frozenset((p.left, p.right) for p in MatchingContent(**content).pairs)
+
+
+def _compile_graph_point(content: dict) -> tuple[float, float, float]:
+    graph_point = GraphPointContent(**content)
+    r = float(graph_point.radius)
+    return float(graph_point.target_x), float(graph_point.target_y), r * r
+
+
+def _compile_trend_arrow(content: dict) -> str:
+    return TrendArrowContent(**content).correct_trend
+
+
+def _compile_slider_value(content: dict) -> float:
+    return SliderValueContent(**content).correct_value
+
+
+# --------- GRADERS ---------
+@register_grader("multiple_choice", _compile_multiple_choice)
+def _grade_multiple_choice(user_answer, correct_ids: frozenset[str]) -> float:
+    if not correct_ids:
+        return 0.0
+    selected_ids = {o.id for o in user_answer.options}
+    return len(correct_ids & selected_ids) / len(correct_ids)
+
+
+@register_grader("find_error", _compile_find_error)
+def _grade_find_error(user_answer, error_index: int) -> float:
+    return 1.0 if user_answer.error_index == error_index else 0.0
+
+
+@register_grader("strike_out", _compile_strike_out)
+def _grade_strike_out(user_answer, correct: frozenset[int]) -> float:
+    if not correct:
+        return 0.0
+    return len(correct & set(user_answer.removed_ids)) / len(correct)
+
+
+@register_grader("ordering", _compile_ordering)
+def _grade_ordering(user_answer, correct_order: tuple[str, ...]) -> float:
+    return 1.0 if tuple(user_answer.ordered_items) == correct_order else 0.0
+
+
+@register_grader("highlight", _compile_highlight)
+def _grade_highlight(user_answer, correct_phrase: str) -> float:
+    return 1.0 if normalize_answer(user_answer.selected_phrase) == correct_phrase else 0.0
+
+
+@register_grader("swipe_decision", _compile_swipe_decision)
+def _grade_swipe_decision(user_answer, correct_swipe: str) -> float:
+    return 1.0 if user_answer.swipe == correct_swipe else 0.0
+
+
+@register_grader("fill_gap", _compile_fill_gap)
+def _grade_fill_gap(user_answer, correct_answer: str) -> float:
+    return 1.0 if normalize_answer(user_answer.answer) == correct_answer else 0.0
+
+
+@register_grader("matching", _compile_matching)
+def _grade_matching(user_answer, correct_pairs: frozenset[tuple[str, str]]) -> float:
+    if not correct_pairs:
+        return 0.0
+    user_pairs = {(m.left, m.right) for m in user_answer.matches}
+    return len(user_pairs & correct_pairs) / len(correct_pairs)
+
+
+@register_grader("graph_point", _compile_graph_point)
+def _grade_graph_point(user_answer, target: tuple[float, float, float]) -> float:
+    target_x, target_y, radius_sq = target
+    dx = float(user_answer.x) - target_x
+    dy = float(user_answer.y) - target_y
+    return 1.0 if (dx * dx + dy * dy) <= radius_sq else 0.0
+
+
+@register_grader("trend_arrow", _compile_trend_arrow)
+def _grade_trend_arrow(user_answer, correct_trend: str) -> float:
+    return 1.0 if user_answer.trend == correct_trend else 0.0
+
+
+@register_grader("slider_value", _compile_slider_value)
+def _grade_slider_value(user_answer, correct_value: float) -> float:
+    return 1.0 if user_answer.value == correct_value else 0.0
+
+
+# --------- CACHE ---------
+class AnswerKeyCache:
+    """LRU of compiled answer keys, invalidated by the question's `updated_at`."""
+
+    def __init__(self, max_size: int = ANSWER_KEY_CACHE_SIZE):
+        self._max_size = max_size
+        self._items: OrderedDict[int, tuple[datetime | None, AnswerKey]] = OrderedDict()
+
+    def get(self, question: Question) -> AnswerKey | None:
+        cached = self._items.get(question.id)
+        if cached is None or cached[0] != question.updated_at:
+            return None
+        self._items.move_to_end(question.id)
+        return cached[1]
+
+    def put(self, question: Question, answer_key: AnswerKey) -> None:
+        self._items[question.id] = (question.updated_at, answer_key)
+        self._items.move_to_end(question.id)
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, question_id: int) -> None:
+        self._items.pop(question_id, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+answer_key_cache = AnswerKeyCache()
+
+
+# --------- ENGINE ---------
+class GradingEngine:
+    def __init__(
+            self,
+            question_repository: QuestionRepository,
+            cache: AnswerKeyCache = answer_key_cache,
+    ):
+        self._question_repository = question_repository
+        self._cache = cache
+
+    async def grade(self, node_id: int, submissions: Sequence[SubmitContentType]) -> float:
+        question_ids = [s.question_id for s in submissions]
+        questions = await self._question_repository.get_by_node_and_ids(node_id, question_ids)
+        answer_keys = {q.id: self._answer_key(q) for q in questions}
+
+        point: float = 0.0
+        for submission in submissions:
+            answer_key = answer_keys.get(submission.question_id)
+            if answer_key is None or answer_key.question_type != submission.question_type:
+                continue
+            grader = GRADERS.get(answer_key.question_type)
+            if grader is None:
+                continue
+            point += grader.grade(submission.content, answer_key.key)
+        return point
+
+    def _answer_key(self, question: Question) -> AnswerKey | None:
+        answer_key = self._cache.get(question)
+        if answer_key is not None:
+            return answer_key
+
+        grader = GRADERS.get(question.type)
+        if grader is None:
+            return None
+
+        answer_key = AnswerKey(
+            question_id=question.id,
+            question_type=question.type,
+            key=grader.compile(question.content),
+        )
+        self._cache.put(question, answer_key)
+        return answer_key
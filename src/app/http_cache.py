@@ -0,0 +1,35 @@
+import hashlib
+from typing import Iterable
+
+from src.app.cache import CacheBackend
+
+# stored copies are fine for browsers, nginx and CDNs, but every reuse is revalidated
+# against us with the requester's credentials, so auth still runs before a 304
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class NotModified(Exception):
+    """Raised by the ETag dependency before the endpoint runs; answered with an empty 304."""
+
+    def __init__(self, etag: str, cache_control: str):
+        self.etag = etag
+        self.cache_control = cache_control
+
+
+async def version_etag(backend: CacheBackend, resource: str, version_keys: Iterable[str]) -> str:
+    """
+    Strong ETag of a resource whose content only changes when one of the counters is bumped.
+    The counter epoch is part of the digest: counters that restarted from zero (process-local
+    backend after a deploy, flushed Redis) never reproduce an ETag handed out before.
+    """
+    versions = [str(await backend.get_counter(key)) for key in version_keys]
+    epoch = await backend.counter_epoch()
+    digest = hashlib.sha256(f"{resource}|{epoch}|{'.'.join(versions)}".encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
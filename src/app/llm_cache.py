@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.repositories import LLMCacheRepository
+
+logger = logging.getLogger(__name__)
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(value: str | None) -> str:
+    """Case- and whitespace-insensitive form of free text used in cache keys."""
+    return _WHITESPACE_RE.sub(" ", value or "").strip().casefold()
+
+
+def make_cache_key(namespace: str, template_version: str, model: str, inputs: dict[str, Any]) -> str:
+    payload = json.dumps(
+        [namespace, template_version, model, inputs],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+
+
+class GenerationCache:
+    """
+    Content-addressed store of structured LLM outputs in Postgres.
+    Entries expire after `ttl_seconds`; `evict` also trims the table down to the
+    `max_entries` most recently used rows. Cache failures never fail generation.
+    """
+
+    def __init__(
+            self,
+            sessionmaker: async_sessionmaker[AsyncSession],
+            model: str,
+            ttl_seconds: int | None = None,
+            max_entries: int = 50_000,
+            enabled: bool = True,
+    ):
+        self._sessionmaker = sessionmaker
+        self._model = model
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._enabled = enabled
+        self._stats: defaultdict[str, CacheStats] = defaultdict(CacheStats)
+
+    def key(self, namespace: str, template_version: str, inputs: dict[str, Any]) -> str:
+        return make_cache_key(namespace, template_version, self._model, inputs)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {namespace: asdict(stats) for namespace, stats in self._stats.items()}
+
+    async def get_many(self, namespace: str, keys: list[str]) -> dict[str, dict[str, Any]]:
+        if not self._enabled or not keys:
+            return {}
+        try:
+            async with self._sessionmaker() as session:
+                async with session.begin():
+                    found = await LLMCacheRepository(session).touch_many(keys, datetime.now(timezone.utc))
+        except SQLAlchemyError:
+            logger.exception("LLM cache lookup failed")
+            self._stats[namespace].errors += 1
+            return {}
+        self._stats[namespace].hits += len(found)
+        self._stats[namespace].misses += len(set(keys)) - len(found)
+        return found
+
+    async def put_many(self, namespace: str, responses: dict[str, dict[str, Any]]) -> None:
+        if not self._enabled or not responses:
+            return
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self._ttl_seconds) if self._ttl_seconds else None
+        try:
+            async with self._sessionmaker() as session:
+                async with session.begin():
+                    repository = LLMCacheRepository(session)
+                    for key, response in responses.items():
+                        await repository.put(key, namespace, self._model, response, now, expires_at)
+        except SQLAlchemyError:
+            logger.exception("LLM cache write failed")
+            self._stats[namespace].errors += 1
+
+    async def get_or_generate(
+            self,
+            namespace: str,
+            template_version: str,
+            inputs: dict[str, Any],
+            response_format: type[ResponseT],
+            produce: Callable[[], Awaitable[ResponseT]],
+            cacheable: Callable[[ResponseT], bool] | None = None,
+    ) -> ResponseT:
+        key = self.key(namespace, template_version, inputs)
+        cached = (await self.get_many(namespace, [key])).get(key)
+        if cached is not None:
+            return response_format.model_validate(cached)
+
+        response = await produce()
+        if cacheable is not None and not cacheable(response):
+            return response
+        await self.put_many(namespace, {key: response.model_dump(mode="json")})
+        return response
+
+    async def evict(self) -> int:
+        if not self._enabled:
+            return 0
+        async with self._sessionmaker() as session:
+            async with session.begin():
+                repository = LLMCacheRepository(session)
+                removed = await repository.delete_expired(datetime.now(timezone.utc))
+                removed += await repository.delete_least_recently_used(self._max_entries)
+        return removed
+
+
+async def run_eviction_loop(cache: GenerationCache, interval_seconds: float) -> None:
+    while True:
+        try:
+            removed = await cache.evict()
+            logger.info("LLM cache eviction removed %s entries, stats: %s", removed, cache.stats())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("LLM cache eviction failed")
+        await asyncio.sleep(interval_seconds)
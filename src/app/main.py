@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from authlib.integrations.starlette_client import OAuth
@@ -5,14 +6,29 @@ from fastapi import FastAPI, APIRouter, HTTPException
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.requests import Request
+from starlette.responses import Response
 
+from src.app.building_catalog import BuildingCatalog
+from src.app.cache import make_cache_backend, RoadmapCache
+from src.app.cloudflare_r2 import CloudflareR2Service, R2Config
 from src.app.config import settings
-from src.app.database import make_engine, make_sessionmaker
+from src.app.constants import BUILDING_SVG_PREFIX, MAX_TAPS_PER_DAY, COINS_PER_TAP
+from src.app.database import DatabaseConfig, make_engine, make_sessionmaker
+from src.app.db_routing import ReplicaRouter
 from src.app.errors import BaseError
+from src.app.http_cache import NotModified
+from src.app.llm_cache import GenerationCache, run_eviction_loop
+from src.app.openai_service import OpenAIConfig, OpenAIService
+from src.app.question_generator import QuestionGenerationQueue, run_prewarm_loop
+from src.app.principals import UserPrincipalCache, DecodedTokenCache
+from src.app.status_hub import StatusHub
+from src.app.tap_aggregator import TapAggregator
+from src.app.svg_assets import SvgAssetStore
 from src.presentations.routers import (
     auth,
     buildings,
     collectors,
+    dashboard,
     nodes,
     onboards,
     passages,
@@ -20,7 +36,8 @@ from src.presentations.routers import (
     questions,
     roadmaps,
     users,
-    submits
+    submits,
+    system,
 )
 
 
@@ -28,9 +45,99 @@ from src.presentations.routers import (
 async def lifespan(app: FastAPI):
     app.state.settings = settings
 
-    engine = make_engine(settings.db_url)
+    db_config = DatabaseConfig(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout_seconds=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle_seconds=settings.DB_POOL_RECYCLE_SECONDS,
+        pre_ping=settings.DB_POOL_PRE_PING,
+        pre_ping_idle_seconds=settings.DB_POOL_PRE_PING_IDLE_SECONDS,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        prepared_statement_cache_size=settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        statement_timeout_ms=settings.DB_STATEMENT_TIMEOUT_MS,
+        slow_query_ms=settings.DB_SLOW_QUERY_MS,
+    )
+    engine = make_engine(settings.db_url, db_config)
     app.state.engine = engine
     app.state.sessionmaker = make_sessionmaker(engine)
+    replica_engine = make_engine(settings.replica_db_url, db_config) if settings.replica_db_url else None
+    app.state.replica_engine = replica_engine
+
+    app.state.cache_backend = make_cache_backend(settings)
+    app.state.db_router = ReplicaRouter(
+        app.state.sessionmaker,
+        make_sessionmaker(replica_engine) if replica_engine else None,
+        app.state.cache_backend,
+        max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+        lag_check_seconds=settings.DB_REPLICA_LAG_CHECK_SECONDS,
+        lag_check_timeout_seconds=settings.DB_REPLICA_LAG_CHECK_TIMEOUT_SECONDS,
+        sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+    )
+    app.state.roadmap_cache = RoadmapCache(
+        app.state.cache_backend,
+        ttl_seconds=settings.ROADMAP_CACHE_TTL_SECONDS,
+    )
+    app.state.building_catalog = BuildingCatalog(
+        app.state.sessionmaker,
+        app.state.cache_backend,
+        max_age_seconds=settings.BUILDING_CATALOG_MAX_AGE_SECONDS,
+    )
+    app.state.status_hub = StatusHub(app.state.cache_backend)
+    app.state.tap_aggregator = None
+    if settings.TAP_FLUSH_INTERVAL_SECONDS > 0:
+        app.state.tap_aggregator = TapAggregator(
+            app.state.sessionmaker,
+            app.state.status_hub,
+            max_taps_per_day=MAX_TAPS_PER_DAY,
+            coins_per_tap=COINS_PER_TAP,
+            flush_interval_seconds=settings.TAP_FLUSH_INTERVAL_SECONDS,
+            max_attempts=settings.TAP_FLUSH_MAX_ATTEMPTS,
+        )
+        await app.state.tap_aggregator.start()
+    app.state.user_cache = UserPrincipalCache(
+        ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+        max_size=settings.USER_CACHE_MAX_SIZE,
+    )
+    app.state.token_cache = DecodedTokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+
+    app.state.openai_service = OpenAIService(
+        OpenAIConfig(
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.OPENAI_MODEL,
+            max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            timeout_seconds=settings.OPENAI_TIMEOUT_SECONDS,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            retry_backoff_seconds=settings.OPENAI_RETRY_BACKOFF_SECONDS,
+            circuit_failure_threshold=settings.OPENAI_CIRCUIT_FAILURE_THRESHOLD,
+            circuit_reset_seconds=settings.OPENAI_CIRCUIT_RESET_SECONDS,
+            fake_transport=settings.OPENAI_FAKE_TRANSPORT,
+        )
+    )
+
+    app.state.generation_cache = GenerationCache(
+        app.state.sessionmaker,
+        model=settings.OPENAI_MODEL,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        enabled=settings.LLM_CACHE_ENABLED,
+    )
+
+    app.state.cloudflare_r2 = CloudflareR2Service(
+        R2Config(
+            account_id=settings.CLOUDFLARE_ACCOUNT_ID,
+            access_key_id=settings.CLOUDFLARE_ACCESS_KEY_ID,
+            secret_access_key=settings.CLOUDFLARE_SECRET_KEY_ID,
+            bucket_name=settings.CLOUDFLARE_BUCKET_NAME,
+            public_base_url=settings.CLOUDFLARE_PUBLIC_BASE_URL,
+            endpoint_override=settings.R2_ENDPOINT_URL,
+            max_pool_connections=settings.R2_MAX_POOL_CONNECTIONS,
+            upload_concurrency=settings.R2_UPLOAD_CONCURRENCY,
+            presign_expires_seconds=settings.R2_PRESIGN_EXPIRES_SECONDS,
+        )
+    )
+    await app.state.cloudflare_r2.start()
+    app.state.svg_assets = SvgAssetStore(app.state.cloudflare_r2, BUILDING_SVG_PREFIX)
 
     oauth = OAuth()
     oauth.register(
@@ -45,14 +152,61 @@ async def lifespan(app: FastAPI):
     )
     app.state.oauth = oauth
 
+    question_generation_queue = QuestionGenerationQueue(
+        app.state.sessionmaker,
+        app.state.openai_service,
+        workers=settings.QUESTION_GENERATION_WORKERS,
+        max_queue_size=settings.QUESTION_GENERATION_QUEUE_SIZE,
+        generation_cache=app.state.generation_cache,
+        backend=app.state.cache_backend,
+    )
+    await question_generation_queue.start()
+    app.state.question_generation_queue = question_generation_queue
+
+    background_tasks: list[asyncio.Task] = []
+    if settings.LLM_CACHE_ENABLED:
+        background_tasks.append(
+            asyncio.create_task(
+                run_eviction_loop(
+                    app.state.generation_cache,
+                    interval_seconds=settings.LLM_CACHE_EVICTION_INTERVAL_SECONDS,
+                )
+            )
+        )
+    if settings.QUESTION_PREWARM_INTERVAL_SECONDS > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_prewarm_loop(
+                    question_generation_queue,
+                    interval_seconds=settings.QUESTION_PREWARM_INTERVAL_SECONDS,
+                    lookahead=settings.QUESTION_PREWARM_LOOKAHEAD,
+                    active_days=settings.QUESTION_PREWARM_ACTIVE_DAYS,
+                )
+            )
+        )
+
     yield
 
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await question_generation_queue.stop()
+    if app.state.tap_aggregator is not None:
+        # before the engine goes away: accepted taps are written, not dropped
+        await app.state.tap_aggregator.stop()
+    await app.state.openai_service.aclose()
+    await app.state.cloudflare_r2.aclose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    await engine.dispose()
+
 
 def create_app() -> FastAPI:
     v1_api = APIRouter(prefix="/api/v1")
     # Auth & User routers
     v1_api.include_router(auth.router)
     v1_api.include_router(users.router)
+    v1_api.include_router(dashboard.router)
     v1_api.include_router(onboards.router)
 
     # Game mechanics routers
@@ -67,6 +221,8 @@ def create_app() -> FastAPI:
     v1_api.include_router(nodes.router)
     v1_api.include_router(questions.router)
 
+    v1_api.include_router(system.router)
+
     app = FastAPI(lifespan=lifespan, swagger_ui_parameters={"withCredentials": True})
     app.include_router(v1_api)
     return app
@@ -97,6 +253,11 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(NotModified)
+async def not_modified_handler(_: Request, exc: NotModified):
+    return Response(status_code=304, headers={"ETag": exc.etag, "Cache-Control": exc.cache_control})
+
+
 @app.exception_handler(BaseError)
 async def bad_request_handler(_: Request, exc: BaseError):
     raise HTTPException(status_code=exc.status_code, detail=exc.message)
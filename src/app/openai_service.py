@@ -1,21 +1,177 @@
-from typing import List, Dict, Any
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable
 
-from openai import AsyncOpenAI, BaseModel
+import httpx
+from openai import AsyncOpenAI, BaseModel, APIConnectionError, APIStatusError, APITimeoutError
+
+from src.app.errors import ServiceUnavailableException
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True, slots=True)
+class OpenAIConfig:
+    api_key: str
+    model: str = "gpt-4o-mini"
+    max_concurrency: int = 8
+    max_connections: int = 20
+    timeout_seconds: float = 60.0
+    max_retries: int = 3
+    retry_backoff_seconds: float = 0.5
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+    fake_transport: bool = False
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. Once `reset_seconds` have passed
+    it is half-open: exactly one call goes through as a probe while every other caller is
+    still rejected, until the probe's success closes the circuit or its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> bool:
+        """Raise while open; returns True when this call is the half-open probe."""
+        if self._opened_at is None:
+            return False
+        if self._probing or time.monotonic() - self._opened_at < self._reset_seconds:
+            raise ServiceUnavailableException("AI service is temporarily unavailable")
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probing or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """The probe ended without a verdict (a non-retryable error, cancellation): let the next call probe."""
+        self._probing = False
+
+
+def _fake_value(schema: dict[str, Any], defs: dict[str, Any]) -> Any:
+    if "$ref" in schema:
+        return _fake_value(defs[schema["$ref"].split("/")[-1]], defs)
+    if "anyOf" in schema:
+        return _fake_value(schema["anyOf"][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {
+            name: _fake_value(prop, defs)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    return {"array": [], "string": "", "integer": 0, "number": 0, "boolean": False}.get(schema_type)
+
+
+def default_fake_responder(payload: dict[str, Any]) -> str:
+    """Return the smallest JSON document that satisfies the requested structured output schema."""
+    response_format = payload.get("response_format") or {}
+    schema = (response_format.get("json_schema") or {}).get("schema")
+    if not schema:
+        return ""
+    return json.dumps(_fake_value(schema, schema.get("$defs", {})))
+
+
+def make_fake_transport(
+        responder: Callable[[dict[str, Any]], str] = default_fake_responder,
+) -> httpx.MockTransport:
+    """Offline transport answering chat completions with `responder(request_json)`."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content or b"{}")
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": responder(payload)},
+                    }
+                ],
+            },
+        )
+
+    return httpx.MockTransport(handler)
 
 
 class OpenAIService:
-    def __init__(self, api_key: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    """
+    Process-wide OpenAI client: one pooled HTTP client, a global concurrency limit,
+    exponential-backoff retries on 429/5xx and a circuit breaker.
+    """
+
+    def __init__(
+            self,
+            cfg: OpenAIConfig,
+            transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self._cfg = cfg
+        if transport is None and cfg.fake_transport:
+            transport = make_fake_transport()
+        self._http_client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(cfg.timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_connections,
+            ),
+        )
+        self.client = AsyncOpenAI(
+            api_key=cfg.api_key,
+            http_client=self._http_client,
+            timeout=cfg.timeout_seconds,
+            max_retries=0,
+        )
+        self._semaphore = asyncio.Semaphore(cfg.max_concurrency)
+        self._circuit = CircuitBreaker(cfg.circuit_failure_threshold, cfg.circuit_reset_seconds)
+
+    @property
+    def model(self) -> str:
+        return self._cfg.model
+
+    async def aclose(self) -> None:
+        await self.client.close()
+        await self._http_client.aclose()
 
     async def request(
             self,
             messages: List[Dict[str, str]],
             response_format: BaseModel,
     ) -> Any:
-        completion = await self.client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
-            messages=messages,
-            response_format=response_format,
+        completion = await self._call(
+            lambda: self.client.beta.chat.completions.parse(
+                model=self._cfg.model,
+                messages=messages,
+                response_format=response_format,
+            )
         )
         response = completion.choices[0].message.parsed
         return response
@@ -23,11 +179,49 @@ class OpenAIService:
     async def request_raw(
             self,
             messages: List[Dict[str, str]],
-            model: str = "gpt-4o-mini",
+            model: str | None = None,
     ) -> str:
         """Make a raw chat completion request and return the content as string."""
-        completion = await self.client.chat.completions.create(
-            model=model,
-            messages=messages,
+        completion = await self._call(
+            lambda: self.client.chat.completions.create(
+                model=model or self._cfg.model,
+                messages=messages,
+            )
         )
         return completion.choices[0].message.content or ""
+
+    async def _call(self, make_request: Callable[[], Any]) -> Any:
+        probe = self._circuit.before_call()
+        try:
+            return await self._call_with_retries(make_request)
+        finally:
+            if probe:
+                self._circuit.release_probe()
+
+    async def _call_with_retries(self, make_request: Callable[[], Any]) -> Any:
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    result = await make_request()
+            except (APIConnectionError, APITimeoutError, APIStatusError) as e:
+                if not self._is_retryable(e):
+                    raise
+                if attempt >= self._cfg.max_retries:
+                    self._circuit.record_failure()
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            self._circuit.record_success()
+            return result
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        base = self._cfg.retry_backoff_seconds * (2 ** attempt)
+        return base + random.uniform(0, self._cfg.retry_backoff_seconds)
@@ -1,8 +1,10 @@
+import asyncio
 from dataclasses import dataclass
-from typing import List, Sequence
+from typing import AsyncIterator, List, Sequence
 
 from pydantic import BaseModel
 
+from src.app.llm_cache import GenerationCache
 from src.app.openai_service import OpenAIService
 from src.models.nodes import PassageNode
 from src.presentations.schemas.onboards import PassageOnboard
@@ -39,6 +41,10 @@ Return nodes in the order they should be studied (easier concepts first, buildin
 
 IMPORTANT: Only use passage_ids that are provided in the input. Do not invent new passage_ids."""
 
+NODE_CACHE_NAMESPACE = "passage_nodes"
+# bump when NODE_GENERATION_PROMPT or the request payload change
+NODE_PROMPT_VERSION = "1"
+
 
 @dataclass
 class GenerationResult:
@@ -46,29 +52,134 @@ class GenerationResult:
     nodes: Sequence[PassageNode]
 
 
+def chunk_passages(passages: List[PassageOnboard], chunk_size: int) -> list[List[PassageOnboard]]:
+    chunk_size = max(chunk_size, 1)
+    return [passages[i:i + chunk_size] for i in range(0, len(passages), chunk_size)]
+
+
 class PassageNodeGenerator:
+    """
+    Splits passages into chunks of `chunk_size` and asks the model for each chunk
+    concurrently (at most `max_concurrency` in flight). The repository session is not
+    safe for concurrent use, so chunk results are written one at a time as they arrive.
+    Nodes are cached per (passage_id, user_level): only uncached passages reach the model.
+    """
+
     def __init__(
             self,
             node_repository: PassageNodeRepository,
             openai_service: OpenAIService,
+            chunk_size: int = 4,
+            max_concurrency: int = 4,
+            generation_cache: GenerationCache | None = None,
     ):
         self._node_repository = node_repository
         self._openai_service = openai_service
+        self._generation_cache = generation_cache
+        self._chunk_size = chunk_size
+        self._semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        self._write_lock = asyncio.Lock()
 
     async def generate(
             self,
             passages: List[PassageOnboard],
             user_id: int | None = None,
     ) -> GenerationResult:
+        nodes: list[PassageNode] = []
+        async for chunk_result in self.iter_generate(passages, user_id):
+            nodes.extend(chunk_result.nodes)
+        return GenerationResult(nodes_created=len(nodes), nodes=nodes)
+
+    async def iter_generate(
+            self,
+            passages: List[PassageOnboard],
+            user_id: int | None = None,
+    ) -> AsyncIterator[GenerationResult]:
+        """Yield each chunk's persisted nodes as soon as that chunk is written."""
         if not passages:
-            return GenerationResult(nodes_created=0, nodes=[])
+            return
 
-        response = await self._request_ai_generation(passages)
+        cached, missing = await self._lookup_cached(passages)
+        tasks = [
+            asyncio.create_task(self._generate_chunk(chunk, user_id))
+            for chunk in chunk_passages(missing, self._chunk_size)
+        ]
+        if cached.nodes:
+            tasks.append(asyncio.create_task(self._write(cached, passages, user_id)))
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _generate_chunk(
+            self,
+            passages: List[PassageOnboard],
+            user_id: int | None,
+    ) -> GenerationResult:
+        async with self._semaphore:
+            response = await self._request_ai_generation(passages)
 
         if not response.nodes:
             return GenerationResult(nodes_created=0, nodes=[])
 
-        return await self._persist_nodes(response, passages, user_id)
+        await self._store_cached(response, passages)
+        return await self._write(response, passages, user_id)
+
+    async def _write(
+            self,
+            response: NodeAIResponse,
+            passages: List[PassageOnboard],
+            user_id: int | None,
+    ) -> GenerationResult:
+        async with self._write_lock:
+            return await self._persist_nodes(response, passages, user_id)
+
+    def _cache_key(self, passage: PassageOnboard) -> str:
+        return self._generation_cache.key(
+            NODE_CACHE_NAMESPACE,
+            NODE_PROMPT_VERSION,
+            {"passage_id": passage.passage_id, "user_level": passage.user_level.value},
+        )
+
+    async def _lookup_cached(
+            self,
+            passages: List[PassageOnboard],
+    ) -> tuple[NodeAIResponse, List[PassageOnboard]]:
+        if self._generation_cache is None:
+            return NodeAIResponse(nodes=[]), passages
+
+        keys = {p.passage_id: self._cache_key(p) for p in passages}
+        found = await self._generation_cache.get_many(NODE_CACHE_NAMESPACE, list(keys.values()))
+
+        cached_nodes: list[NodeModel] = []
+        missing: List[PassageOnboard] = []
+        for passage in passages:
+            entry = found.get(keys[passage.passage_id])
+            if entry is None:
+                missing.append(passage)
+            else:
+                cached_nodes.extend(NodeAIResponse.model_validate(entry).nodes)
+        return NodeAIResponse(nodes=cached_nodes), missing
+
+    async def _store_cached(self, response: NodeAIResponse, passages: List[PassageOnboard]) -> None:
+        if self._generation_cache is None:
+            return
+
+        by_passage: dict[int, list[NodeModel]] = {}
+        for node in response.nodes:
+            by_passage.setdefault(node.passage_id, []).append(node)
+
+        await self._generation_cache.put_many(
+            NODE_CACHE_NAMESPACE,
+            {
+                self._cache_key(passage): NodeAIResponse(nodes=by_passage[passage.passage_id]).model_dump(mode="json")
+                for passage in passages
+                if passage.passage_id in by_passage
+            },
+        )
 
     async def _request_ai_generation(
             self,
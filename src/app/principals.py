@@ -0,0 +1,59 @@
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from src.app.cache import TTLCache
+from src.models.users import User
+
+
+@dataclass(frozen=True, slots=True)
+class UserPrincipal:
+    id: int
+    is_admin: bool
+    has_onboard: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            is_admin=bool(user.is_admin),
+            has_onboard=bool(user.has_onboard),
+        )
+
+
+class UserPrincipalCache:
+    """
+    Short-lived per-process snapshots of authenticated users.
+    Writers that change principal fields call `invalidate`; other workers
+    converge within `ttl_seconds`.
+    """
+
+    def __init__(self, ttl_seconds: float = 30, max_size: int = 10_000):
+        self._items = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def get(self, user_id: int) -> UserPrincipal | None:
+        return self._items.get(user_id)
+
+    def put(self, principal: UserPrincipal) -> None:
+        self._items.set(principal.id, principal)
+
+    def invalidate(self, user_id: int) -> None:
+        self._items.delete(user_id)
+
+
+class DecodedTokenCache:
+    """LRU of verified access-token payloads keyed by the raw token; entries never outlive `exp`."""
+
+    def __init__(self, max_size: int = 10_000):
+        self._items = TTLCache(max_size=max_size)
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        return self._items.get(token)
+
+    def put(self, token: str, payload: dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        if exp is None:
+            return
+        ttl_seconds = exp - time.time()
+        if ttl_seconds > 0:
+            self._items.set(token, payload, ttl_seconds)
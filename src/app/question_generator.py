@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, List
+
+from pydantic import BaseModel, Field
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.cache import CacheBackend
+from src.app.constants import PROMPTS, QuestionType
+from src.app.llm_cache import GenerationCache, normalize_text
+from src.app.openai_service import OpenAIService
+from src.repositories import PassageNodeRepository, QuestionRepository
+
+logger = logging.getLogger(__name__)
+
+# namespace for pg advisory locks taken while inserting generated questions
+QUESTION_GENERATION_LOCK_NS = 7301
+
+QUESTION_CACHE_NAMESPACE = "node_questions"
+# bump when PROMPTS or build_question_messages change
+QUESTION_PROMPT_VERSION = "1"
+
+
+class GeneratedQuestion(BaseModel):
+    type: QuestionType
+    text: str
+    content: dict[str, Any]
+
+
+class ListNodeRelationsResponse(BaseModel):
+    questions: List[GeneratedQuestion] = Field(
+        ...,
+        description="List of generated questions for the lesson node"
+    )
+
+
+def build_question_messages(context: dict[str, Any]) -> list[dict[str, str]]:
+    subject = context["subject"].value if context.get("subject") else "english"
+    user_prompt = f"""
+                    GENERATE LESSON CONTENT:
+                    - **Title:** {context["title"]}
+                    - **Node Content:** {context["content"] or "General vocabulary"}
+                    - **Subject:** {subject}
+                    - **Passage:** {context["passage_title"]}
+                    """
+    return [
+        {
+            "role": "system",
+            "content": PROMPTS.get(subject),
+        },
+        {
+            "role": "user",
+            "content": json.dumps(user_prompt, ensure_ascii=False),
+        }
+    ]
+
+
+def question_cache_inputs(context: dict[str, Any]) -> dict[str, Any]:
+    """Nodes with the same title/content in the same subject and passage share questions."""
+    return {
+        "subject": context["subject"].value if context.get("subject") else "english",
+        "title": normalize_text(context["title"]),
+        "content": normalize_text(context["content"]),
+        "passage_title": normalize_text(context["passage_title"]),
+    }
+
+
+def generated_questions_version_key(node_id: int) -> str:
+    """Bumped when the queue fills a node, so cached question lists of that node go stale."""
+    return f"questions:generated_version:{node_id}"
+
+
+class QuestionGenerationQueue:
+    """
+    Generates questions for nodes off the request path.
+    Jobs are single-flight per node_id inside the process; across processes the
+    insert runs under a pg advisory lock and re-checks that the node is still empty.
+    """
+
+    def __init__(
+            self,
+            sessionmaker: async_sessionmaker[AsyncSession],
+            openai_service: OpenAIService,
+            workers: int = 4,
+            max_queue_size: int = 1000,
+            generation_cache: GenerationCache | None = None,
+            backend: CacheBackend | None = None,
+    ):
+        self._sessionmaker = sessionmaker
+        self._backend = backend
+        self._openai_service = openai_service
+        self._generation_cache = generation_cache
+        self._workers_count = workers
+        self._queue: asyncio.Queue[int] = asyncio.Queue(maxsize=max_queue_size)
+        self._in_flight: set[int] = set()
+        self._workers: list[asyncio.Task] = []
+
+    def is_pending(self, node_id: int) -> bool:
+        return node_id in self._in_flight
+
+    def enqueue(self, node_id: int) -> bool:
+        if node_id in self._in_flight:
+            return True
+        try:
+            self._queue.put_nowait(node_id)
+        except asyncio.QueueFull:
+            logger.warning("Question generation queue is full, node %s not scheduled", node_id)
+            return False
+        self._in_flight.add(node_id)
+        return True
+
+    async def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"question-generation-{i}")
+            for i in range(self._workers_count)
+        ]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def prewarm(self, lookahead: int, active_days: int) -> int:
+        """Schedule the next `lookahead` unanswered nodes of every user active in the last `active_days`."""
+        active_since = datetime.now(timezone.utc) - timedelta(days=active_days)
+        async with self._sessionmaker() as session:
+            node_ids = await PassageNodeRepository(session).get_upcoming_nodes_without_questions(
+                active_since=active_since,
+                per_user_limit=lookahead,
+            )
+        return sum(self.enqueue(node_id) for node_id in node_ids)
+
+    async def _worker(self) -> None:
+        while True:
+            node_id = await self._queue.get()
+            try:
+                await self.generate(node_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Question generation failed for node %s", node_id)
+            finally:
+                self._in_flight.discard(node_id)
+                self._queue.task_done()
+
+    async def generate(self, node_id: int) -> int:
+        async with self._sessionmaker() as session:
+            if await QuestionRepository(session).count_by_node_id(node_id):
+                return 0
+            context = await PassageNodeRepository(session).get_generation_context(node_id)
+        if context is None:
+            return 0
+
+        # no session is held while waiting for the model
+        response = await self._request_questions(context)
+        if not response.questions:
+            return 0
+
+        async with self._sessionmaker() as session:
+            async with session.begin():
+                locked = await session.scalar(
+                    select(func.pg_try_advisory_xact_lock(QUESTION_GENERATION_LOCK_NS, node_id))
+                )
+                question_repository = QuestionRepository(session)
+                if not locked or await question_repository.count_by_node_id(node_id):
+                    return 0
+                created = await question_repository.bulk_create([
+                    {
+                        "node_id": node_id,
+                        "type": q.type.value,
+                        "content": {"text": q.text, **q.content},
+                        "order_index": i,
+                    }
+                    for i, q in enumerate(response.questions, start=1)
+                ])
+        if self._backend is not None:
+            await self._backend.incr(generated_questions_version_key(node_id))
+        return len(created)
+
+    async def _request_questions(self, context: dict[str, Any]) -> ListNodeRelationsResponse:
+        async def produce() -> ListNodeRelationsResponse:
+            return await self._openai_service.request(
+                messages=build_question_messages(context),
+                response_format=ListNodeRelationsResponse,
+            )
+
+        if self._generation_cache is None:
+            return await produce()
+        return await self._generation_cache.get_or_generate(
+            QUESTION_CACHE_NAMESPACE,
+            QUESTION_PROMPT_VERSION,
+            question_cache_inputs(context),
+            ListNodeRelationsResponse,
+            produce,
+            cacheable=lambda response: bool(response.questions),
+        )
+
+
+async def run_prewarm_loop(
+        queue: QuestionGenerationQueue,
+        interval_seconds: float,
+        lookahead: int,
+        active_days: int,
+) -> None:
+    while True:
+        try:
+            scheduled = await queue.prewarm(lookahead=lookahead, active_days=active_days)
+            if scheduled:
+                logger.info("Scheduled %s nodes for question pre-generation", scheduled)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Question pre-warm pass failed")
+        await asyncio.sleep(interval_seconds)
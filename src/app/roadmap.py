@@ -0,0 +1,99 @@
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from src.app.constants import STATUS_LOCKED, STATUS_AVAILABLE, STATUS_COMPLETED
+
+
+@dataclass(frozen=True, slots=True)
+class RoadmapNode:
+    id: int
+    title: str
+    content: str | None
+    config: dict[str, Any]
+    pass_score: int | None
+    reward_coins: int | None
+
+
+@dataclass(slots=True)
+class RoadmapPassage:
+    id: int
+    title: str
+    order_index: int
+    nodes: list[RoadmapNode] = field(default_factory=list)
+    boss: RoadmapNode | None = None
+
+    @property
+    def node_ids(self) -> list[int]:
+        ids = [n.id for n in self.nodes]
+        if self.boss is not None:
+            ids.append(self.boss.id)
+        return ids
+
+
+def resolve_roadmap(
+        passages: Iterable[RoadmapPassage],
+        completed_node_ids: set[int],
+) -> list[dict[str, Any]]:
+    """
+    Compute locked/available/completed statuses for a village roadmap.
+    Passages must be ordered by order_index and their nodes by id.
+    """
+    response_passages = []
+    is_passage_unlocked = True
+    for passage in passages:
+        passage_status = STATUS_AVAILABLE if is_passage_unlocked else STATUS_LOCKED
+        passage_data = {
+            "id": passage.id,
+            "title": passage.title,
+            "order_index": passage.order_index,
+            "status": passage_status,
+            "nodes": [],
+            "boss": None,
+        }
+
+        is_node_unlocked = passage_status != STATUS_LOCKED
+        completed_nodes_count = 0
+
+        for node in passage.nodes:
+            is_completed = node.id in completed_node_ids
+            is_locked = not is_node_unlocked
+            passage_data["nodes"].append({
+                "id": node.id,
+                "title": node.title,
+                "content": node.content,
+                "is_completed": is_completed,
+                "is_locked": is_locked,
+                "is_current": not is_locked and not is_completed,
+            })
+
+            if is_completed:
+                completed_nodes_count += 1
+            else:
+                is_node_unlocked = False
+
+        all_nodes_finished = completed_nodes_count == len(passage.nodes)
+        is_boss_unlocked = passage_status != STATUS_LOCKED and all_nodes_finished
+
+        if passage.boss is not None:
+            boss_completed = passage.boss.id in completed_node_ids
+            passage_data["boss"] = {
+                "id": passage.boss.id,
+                "title": passage.boss.title,
+                "content": passage.boss.content,
+                "config": passage.boss.config,
+                "is_completed": boss_completed,
+                "is_locked": not is_boss_unlocked,
+                "pass_score": passage.boss.pass_score,
+                "reward_coins": passage.boss.reward_coins,
+            }
+            passage_finished = boss_completed
+        else:
+            passage_finished = all_nodes_finished
+
+        if passage_finished:
+            passage_data["status"] = STATUS_COMPLETED
+        is_passage_unlocked = passage_finished
+
+        response_passages.append(passage_data)
+
+    return response_passages
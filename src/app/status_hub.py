@@ -0,0 +1,59 @@
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator
+
+from src.app.building_catalog import BuildingCatalog
+from src.app.cache import CacheBackend
+
+
+class StatusHub:
+    """
+    Per-process fan-out for the status stream.
+    Writers call `publish(user_id)` (or `broadcast()` for catalog changes) after commit;
+    every open stream of that user in this process wakes at once and reloads.
+    Each publish also bumps a per-user counter in the cache backend, so streams held
+    by other workers see the change on their next heartbeat via `versions`.
+    A subscriber is a bare Event: bursts of writes coalesce into one reload.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self._backend = backend
+        self._subscribers: dict[int, set[asyncio.Event]] = defaultdict(set)
+
+    @staticmethod
+    def version_key(user_id: int) -> str:
+        return f"status:version:{user_id}"
+
+    @contextmanager
+    def subscribe(self, user_id: int) -> Iterator[asyncio.Event]:
+        event = asyncio.Event()
+        self._subscribers[user_id].add(event)
+        try:
+            yield event
+        finally:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(event)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    async def publish(self, user_id: int) -> None:
+        await self._backend.incr(self.version_key(user_id))
+        for event in self._subscribers.get(user_id, ()):
+            event.set()
+
+    async def broadcast(self) -> None:
+        """Wake every stream; the catalog version itself is bumped by BuildingCatalog.invalidate."""
+        for subscribers in self._subscribers.values():
+            for event in subscribers:
+                event.set()
+
+    async def versions(self, user_id: int) -> tuple[int, int]:
+        return (
+            await self._backend.get_counter(self.version_key(user_id)),
+            await self._backend.get_counter(BuildingCatalog.VERSION_KEY),
+        )
+
+    def __len__(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+
+from src.app.cloudflare_r2 import CloudflareR2Service, R2Upload
+from src.app.constants import SVG_CONTENT_TYPE
+from src.app.errors import BadRequestException
+
+try:
+    import brotli
+except ImportError:  # optional, only the gzip variant is produced without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# content-addressed keys never change content, so clients and the CDN may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+SVG_PRECISION = 3
+GZIP_SUFFIX = ".gz"
+BROTLI_SUFFIX = ".br"
+
+_PROLOG = re.compile(rb"<\?xml.*?\?>|<!DOCTYPE[^>\[]*(\[.*?\])?\s*>", re.S | re.I)
+_COMMENT = re.compile(rb"<!--.*?-->", re.S)
+_EDITOR_ELEMENT = re.compile(rb"<(metadata|sodipodi:namedview)\b[^>]*?(/>|>.*?</\1\s*>)", re.S)
+_EDITOR_ATTRIBUTE = re.compile(rb"\s(?:inkscape|sodipodi):[\w.-]+\s*=\s*(\"[^\"]*\"|'[^']*')")
+_NAMESPACE = re.compile(rb"\sxmlns:([\w.-]+)\s*=\s*(\"[^\"]*\"|'[^']*')")
+_ATTRIBUTE = re.compile(rb"\s+([\w:-]+)\s*=\s*(\"[^\"]*\"|'[^']*')")
+_NUMBER = re.compile(rb"-?\d*\.\d+(?:[eE][-+]?\d+)?")
+_BETWEEN_TAGS = re.compile(rb">\s+<")
+_TAG_END = re.compile(rb"\s+(/?>)")
+_WHITESPACE = re.compile(rb"\s+")
+
+# attributes whose values are only numbers, lengths and path/transform syntax
+_NUMERIC_ATTRIBUTES = frozenset({
+    b"d", b"points", b"viewBox", b"transform", b"gradientTransform", b"patternTransform",
+    b"x", b"y", b"x1", b"y1", b"x2", b"y2", b"cx", b"cy", b"r", b"rx", b"ry", b"fx", b"fy",
+    b"dx", b"dy", b"width", b"height", b"offset", b"opacity", b"fill-opacity", b"stroke-opacity",
+    b"stop-opacity", b"stroke-width", b"stroke-miterlimit", b"stroke-dashoffset", b"stroke-dasharray",
+    b"font-size", b"stdDeviation",
+})
+
+
+def _round_number(match: re.Match) -> bytes:
+    text = match.group()
+    if b"e" in text.lower() or len(text.partition(b".")[2]) <= SVG_PRECISION:
+        return text
+    rounded = f"{float(text):.{SVG_PRECISION}f}".rstrip("0").rstrip(".")
+    return (rounded if rounded not in ("-0", "") else "0").encode()
+
+
+def _normalize_attribute(match: re.Match) -> bytes:
+    name, quoted = match.groups()
+    value = _WHITESPACE.sub(b" ", quoted[1:-1]).strip()
+    if name in _NUMERIC_ATTRIBUTES:
+        value = _NUMBER.sub(_round_number, value)
+    return b' ' + name + b'="' + value.replace(b'"', b"&quot;") + b'"'
+
+
+def optimize_svg(data: bytes) -> bytes:
+    """
+    Minify and normalize SVG markup: drop the XML prolog, comments and editor metadata,
+    unused namespace declarations, whitespace between tags and excess numeric precision.
+    Equal artwork exported with different whitespace or precision yields the same bytes.
+    """
+    svg = data.strip()
+    svg = _PROLOG.sub(b"", svg)
+    svg = _COMMENT.sub(b"", svg)
+    svg = _EDITOR_ELEMENT.sub(b"", svg)
+    svg = _EDITOR_ATTRIBUTE.sub(b"", svg)
+    svg = _ATTRIBUTE.sub(_normalize_attribute, svg)
+    declared = {m.group(1) for m in _NAMESPACE.finditer(svg)}
+    undeclared = _NAMESPACE.sub(b"", svg)
+    for name in declared:
+        if not re.search(rb"[<\s/]" + re.escape(name) + rb":", undeclared):
+            svg = re.sub(rb"\sxmlns:" + re.escape(name) + rb'="[^"]*"', b"", svg)
+    svg = _TAG_END.sub(rb"\1", svg)
+    svg = _BETWEEN_TAGS.sub(b"><", svg).strip()
+    if not svg.startswith(b"<svg"):
+        raise BadRequestException("File is not an SVG")
+    return svg
+
+
+def content_key(svg: bytes, prefix: str) -> str:
+    return f"{prefix.strip('/')}/{hashlib.sha256(svg).hexdigest()[:32]}.svg"
+
+
+@dataclass(frozen=True, slots=True)
+class SvgAsset:
+    key: str
+    url: str
+    size: int
+
+
+class SvgAssetStore:
+    """
+    Optimized SVGs under content-hash keys, each with precompressed `.gz` (and `.br`
+    when brotli is installed) siblings. Identical artwork is stored once.
+    """
+
+    def __init__(self, r2: CloudflareR2Service, prefix: str):
+        self._r2 = r2
+        self._prefix = prefix
+
+    def is_asset_key(self, key: str) -> bool:
+        return re.fullmatch(re.escape(self._prefix.strip("/")) + r"/[0-9a-f]{32}\.svg", key) is not None
+
+    async def put(self, data: bytes) -> SvgAsset:
+        svg = optimize_svg(data)
+        key = content_key(svg, self._prefix)
+        if await self._r2.head(key) is None:
+            variants = [R2Upload(key + GZIP_SUFFIX, gzip.compress(svg, 9, mtime=0), SVG_CONTENT_TYPE, {
+                "ContentEncoding": "gzip", "CacheControl": IMMUTABLE_CACHE_CONTROL,
+            })]
+            if brotli is not None:
+                variants.append(R2Upload(key + BROTLI_SUFFIX, brotli.compress(svg), SVG_CONTENT_TYPE, {
+                    "ContentEncoding": "br", "CacheControl": IMMUTABLE_CACHE_CONTROL,
+                }))
+            await self._r2.upload_many(variants)
+            # the plain object goes last: once it exists, the variants do too
+            await self._r2.upload_bytes(
+                key=key,
+                body=svg,
+                content_type=SVG_CONTENT_TYPE,
+                extra={"CacheControl": IMMUTABLE_CACHE_CONTROL},
+            )
+        return SvgAsset(key=key, url=self._r2.public_url(key), size=len(svg))
+
+    async def discard(self, url: str) -> None:
+        """Delete an asset (and its variants) nothing references anymore; failures are only logged."""
+        key = self._r2.key_from_url(url)
+        keys = [key, key + GZIP_SUFFIX, key + BROTLI_SUFFIX] if self.is_asset_key(key) else [key]
+        try:
+            await self._r2.delete_many(keys)
+        except Exception:
+            logger.warning("Failed to delete superseded SVG %s", key, exc_info=True)
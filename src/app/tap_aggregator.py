@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.constants import FundType, TapRejection
+from src.app.status_hub import StatusHub
+from src.repositories import UserCastleRepository, WalletRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _TapState:
+    day: date
+    used: int  # taps used on `day`: what the DB had when loaded plus everything accepted since
+    pending: int = 0  # accepted, not yet handed to a flush
+    in_flight: int = 0  # handed to the running flush, not yet committed
+    failures: int = 0  # consecutive failed flushes of these taps
+    last_seen: float = 0.0
+
+
+class TapAggregator:
+    """
+    Write-behind for castle taps.
+    A tap is checked against an in-memory daily counter (loaded from user_castles on a
+    user's first tap) and answered at once; every `flush_interval_seconds` each user's
+    accepted taps become one guarded user_castles update plus one ledger row and one
+    balance upsert, each user in its own savepoint of one transaction.
+    The flush goes through `record_taps`, which re-checks the daily limit under a row
+    lock, so taps accepted by several workers for one user are clamped to the limit and
+    only the taps it applied are credited. Taps flushed after another worker already
+    moved the counter to the next UTC day are still credited (the client was told so)
+    without touching the new day's counter. Taps whose flush failed are retried next
+    window and dead-lettered (logged and dropped) after `max_attempts`; `stop()` flushes
+    whatever is left, so only a hard kill loses taps.
+    Until a flush, only this worker knows the taps: status reads add `unflushed_taps` and
+    `unflushed_coins`, and reads served by another worker lag by up to one window.
+    """
+
+    def __init__(
+            self,
+            sessionmaker: async_sessionmaker[AsyncSession],
+            status_hub: StatusHub,
+            max_taps_per_day: int,
+            coins_per_tap: int,
+            flush_interval_seconds: float = 1.0,
+            idle_seconds: float = 300.0,
+            max_attempts: int = 5,
+    ):
+        self._sessionmaker = sessionmaker
+        self._status_hub = status_hub
+        self._max_taps = max_taps_per_day
+        self._coins_per_tap = coins_per_tap
+        self._flush_interval = flush_interval_seconds
+        self._idle_seconds = idle_seconds
+        self._max_attempts = max_attempts
+        self._states: dict[int, _TapState] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def tap(
+            self,
+            user_id: int,
+            requested: int,
+            today: date,
+            load: Callable[[], Awaitable[dict[str, Any] | None]],
+    ) -> tuple[int, int] | None:
+        """
+        Accept up to `requested` taps. `load` returns the user's castle row (taps_used_today,
+        last_tap_reset_date) and is only awaited when the counter is not in memory.
+        Returns (taps accepted, taps used today) or None if the user has no castle.
+        """
+        while (state := self._states.get(user_id)) is not None and state.day != today:
+            # yesterday's taps go out under yesterday's date before today's counter is loaded
+            if state.pending or state.in_flight:
+                await self.flush()
+            else:
+                del self._states[user_id]
+        if state is None:
+            castle = await load()
+            if castle is None:
+                return None
+            used = (castle["taps_used_today"] or 0) if castle["last_tap_reset_date"] == today else 0
+            # another tap of this user may have loaded the counter while we awaited
+            state = self._states.get(user_id)
+            if state is None or state.day != today:
+                state = self._states[user_id] = _TapState(day=today, used=used)
+
+        accepted = max(0, min(requested, self._max_taps - state.used))
+        state.used += accepted
+        state.pending += accepted
+        state.last_seen = time.monotonic()
+        return accepted, state.used
+
+    def unflushed_taps(self, user_id: int, day: date) -> int:
+        """Taps accepted on `day` that the user_castles counter does not show yet."""
+        state = self._states.get(user_id)
+        return 0 if state is None or state.day != day else state.pending + state.in_flight
+
+    def unflushed_coins(self, user_id: int) -> int:
+        """Coins granted by accepted taps that the wallet balance does not show yet."""
+        state = self._states.get(user_id)
+        return 0 if state is None else (state.pending + state.in_flight) * self._coins_per_tap
+
+    async def flush(self) -> int:
+        """Write every user's pending taps; returns the number of taps applied."""
+        async with self._flush_lock:
+            # castle rows are locked in user_id order, so concurrent flushes of several workers cannot deadlock
+            batch = {user_id: state for user_id, state in sorted(self._states.items()) if state.pending}
+            for state in batch.values():
+                state.in_flight, state.pending = state.pending, 0
+            if not batch:
+                self._evict_idle()
+                return 0
+
+            results: dict[int, tuple[int, int] | TapRejection] = {}
+            try:
+                async with self._sessionmaker() as session:
+                    castles = UserCastleRepository(session)
+                    wallets = WalletRepository(session)
+                    for user_id, state in batch.items():
+                        # a savepoint per user: one bad row does not roll back everybody else's taps
+                        try:
+                            async with session.begin_nested():
+                                applied = await castles.record_taps(
+                                    user_id,
+                                    requested=state.in_flight,
+                                    max_taps=self._max_taps,
+                                    today=state.day,
+                                )
+                                if applied == TapRejection.DAY_PASSED:
+                                    # accepted within that day's limit and promised to the client: credit them
+                                    await wallets.add_funds(user_id, state.in_flight * self._coins_per_tap, FundType.COIN)
+                                elif not isinstance(applied, TapRejection) and applied[0] > 0:
+                                    await wallets.add_funds(user_id, applied[0] * self._coins_per_tap, FundType.COIN)
+                        except Exception:
+                            logger.exception("Tap flush failed for user %s", user_id)
+                            continue
+                        results[user_id] = applied
+                    await session.commit()
+            except Exception:
+                logger.exception("Tap flush transaction failed for %s users", len(batch))
+                results = {}
+            except BaseException:
+                # cancelled (shutdown): not the users' fault, keep the taps for stop()'s final flush
+                for state in batch.values():
+                    state.pending, state.in_flight = state.pending + state.in_flight, 0
+                raise
+
+            applied_total = 0
+            for user_id, state in batch.items():
+                if user_id not in results:
+                    self._retry_later(user_id, state)
+                    continue
+                applied = results[user_id]
+                state.failures = 0
+                if applied == TapRejection.DAY_PASSED:
+                    logger.info(
+                        "Credited %s taps of user %s on %s: the counter had already moved to a later day",
+                        state.in_flight, user_id, state.day,
+                    )
+                    applied_total += state.in_flight
+                    state.in_flight = 0
+                    await self._status_hub.publish(user_id)
+                    continue
+                if applied == TapRejection.LIMIT_REACHED:
+                    # other workers used up the day's taps first
+                    logger.warning("Dropped %s taps of user %s: daily limit reached in the DB", state.in_flight, user_id)
+                    state.in_flight = 0
+                    state.used = self._max_taps
+                    continue
+                if applied == TapRejection.NO_CASTLE:
+                    logger.warning("Dropped %s taps of user %s: the castle is gone", state.in_flight, user_id)
+                    state.in_flight = 0
+                    continue
+                state.in_flight = 0
+                applied_taps, used_in_db = applied
+                applied_total += applied_taps
+                # resync with the DB counter, keeping what was accepted during the flush
+                state.used = min(self._max_taps, used_in_db + state.pending)
+                await self._status_hub.publish(user_id)
+            self._evict_idle()
+            return applied_total
+
+    def _retry_later(self, user_id: int, state: _TapState) -> None:
+        state.failures += 1
+        if state.failures < self._max_attempts:
+            state.pending, state.in_flight = state.pending + state.in_flight, 0
+            return
+        # dead letter: give up on these taps rather than retry (and promise their coins) forever
+        logger.error(
+            "Dead-lettered %s taps of user %s on %s after %s failed flushes",
+            state.in_flight, user_id, state.day, state.failures,
+        )
+        state.used = max(0, state.used - state.in_flight)
+        state.in_flight = 0
+        state.failures = 0
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self._idle_seconds
+        for user_id in [
+            user_id for user_id, state in self._states.items()
+            if not state.pending and not state.in_flight and state.last_seen < cutoff
+        ]:
+            del self._states[user_id]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Tap flush failed")
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def __len__(self) -> int:
+        return len(self._states)
@@ -0,0 +1,159 @@
+import bisect
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Iterable, Mapping
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_US_PER_SECOND = 1_000_000
+
+# upper bounds of the time-to-full histogram, minutes (1h, 3h, 6h, 12h, 1d, 2d, 1w)
+TIME_TO_FULL_BUCKETS_MINUTES = (60, 180, 360, 720, 1440, 2880, 10080)
+
+
+@dataclass(frozen=True, slots=True)
+class AccumulatedTreasure:
+    current_amount: int
+    time_to_full_minutes: int
+
+
+def accrue_one(
+        current_amount: int,
+        capacity: int,
+        production_rate: int,
+        last_collect_date: datetime | None,
+        now: datetime,
+) -> AccumulatedTreasure:
+    """Reference (scalar) accrual; production_rate is per hour. `accrue_batch` must match it exactly."""
+    if production_rate <= 0:
+        return AccumulatedTreasure(current_amount=min(current_amount, capacity), time_to_full_minutes=0)
+
+    current_amount = max(0, min(current_amount, capacity))
+
+    if last_collect_date is None:
+        remaining = capacity - current_amount
+        return AccumulatedTreasure(
+            current_amount=current_amount,
+            time_to_full_minutes=int(remaining / production_rate * 60) if remaining > 0 else 0,
+        )
+
+    hours_elapsed = max(0.0, (now - last_collect_date).total_seconds() / 3600.0)
+
+    generated = int(production_rate * hours_elapsed)
+    new_amount = min(current_amount + generated, capacity)
+
+    remaining_capacity = capacity - new_amount
+    time_to_full = int(remaining_capacity / production_rate * 60) if remaining_capacity > 0 else 0
+
+    return AccumulatedTreasure(current_amount=new_amount, time_to_full_minutes=time_to_full)
+
+
+def epoch_us(value: datetime | None) -> int | None:
+    """Exact integer microseconds since the epoch (datetime.timestamp() would round through a float)."""
+    return None if value is None else (value - EPOCH) // _MICROSECOND
+
+
+@dataclass(slots=True)
+class TreasureColumns:
+    """Column-oriented buildings: one list per field, `last_collect_us` as epoch microseconds."""
+    current_amount: list[int] = field(default_factory=list)
+    capacity: list[int] = field(default_factory=list)
+    production_rate: list[int] = field(default_factory=list)
+    last_collect_us: list[int | None] = field(default_factory=list)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> "TreasureColumns":
+        """Rows as returned by the user castle/village repositories."""
+        columns = cls()
+        for row in rows:
+            columns.append(
+                row["treasure_amount"],
+                row["treasure_capacity"],
+                row["speed_production_treasure"],
+                row["last_collect_date"],
+            )
+        return columns
+
+    def append(self, current_amount: int, capacity: int, production_rate: int, last_collect: datetime | None):
+        self.current_amount.append(current_amount)
+        self.capacity.append(capacity)
+        self.production_rate.append(production_rate)
+        self.last_collect_us.append(epoch_us(last_collect))
+
+    def __len__(self) -> int:
+        return len(self.current_amount)
+
+
+def accrue_batch(columns: TreasureColumns, now: datetime) -> tuple[list[int], list[int]]:
+    """
+    Accrue every building against one clock reading.
+    Returns (current_amount, time_to_full_minutes) columns, identical to `accrue_one`
+    row by row: elapsed time is kept in integer microseconds and divided exactly
+    like timedelta.total_seconds(), so every float rounding happens in the same order.
+    """
+    now_us = epoch_us(now)
+    amounts: list[int] = []
+    minutes: list[int] = []
+    for current, capacity, rate, last_us in zip(
+            columns.current_amount, columns.capacity, columns.production_rate, columns.last_collect_us,
+    ):
+        if rate <= 0:
+            amounts.append(current if current < capacity else capacity)
+            minutes.append(0)
+            continue
+        if current > capacity:
+            current = capacity
+        if current < 0:
+            current = 0
+        if last_us is not None:
+            hours = (now_us - last_us) / _US_PER_SECOND / 3600.0
+            if hours > 0.0:
+                current = current + int(rate * hours)
+                if current > capacity:
+                    current = capacity
+        remaining = capacity - current
+        amounts.append(current)
+        minutes.append(int(remaining / rate * 60) if remaining > 0 else 0)
+    return amounts, minutes
+
+
+@dataclass(slots=True)
+class EconomySummary:
+    """Whole-population accrual totals; memory stays constant however many rows stream through."""
+    buildings: int = 0
+    stored: int = 0
+    accrued: int = 0
+    full: int = 0
+    time_to_full: list[int] = field(default_factory=lambda: [0] * (len(TIME_TO_FULL_BUCKETS_MINUTES) + 1))
+
+    def add(self, columns: TreasureColumns, amounts: list[int], minutes: list[int]) -> None:
+        self.buildings += len(columns)
+        self.stored += sum(columns.current_amount)
+        self.accrued += sum(amounts)
+        self.full += sum(1 for amount, capacity in zip(amounts, columns.capacity) if amount >= capacity)
+        for m in minutes:
+            if m > 0:
+                self.time_to_full[bisect.bisect_left(TIME_TO_FULL_BUCKETS_MINUTES, m)] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        buckets = {f"le_{bound}m": count for bound, count in zip(TIME_TO_FULL_BUCKETS_MINUTES, self.time_to_full)}
+        buckets["le_inf"] = self.time_to_full[-1]
+        return {
+            "buildings": self.buildings,
+            "stored": self.stored,
+            "accrued": self.accrued,
+            "full": self.full,
+            "time_to_full": buckets,
+        }
+
+
+async def accrue_population(
+        chunks: AsyncIterator[list[Mapping[str, Any]]],
+        at: datetime,
+) -> EconomySummary:
+    """Stream buildings chunk by chunk (analytics, economy simulation) and accrue each chunk at `at`."""
+    summary = EconomySummary()
+    async for rows in chunks:
+        columns = TreasureColumns.from_rows(rows)
+        summary.add(columns, *accrue_batch(columns, at))
+    return summary
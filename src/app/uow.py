@@ -1,5 +1,9 @@
+from typing import Awaitable, Callable
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
+AFTER_COMMIT_KEY = "after_commit"
+
 
 class UoW:
     """
@@ -11,6 +15,10 @@ class UoW:
     def __init__(self, session: AsyncSession):
         self._session = session
 
+    def after_commit(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Run `hook` once the session dependency has committed the request transaction."""
+        self._session.info.setdefault(AFTER_COMMIT_KEY, []).append(hook)
+
     async def __aenter__(self):
         return self
 
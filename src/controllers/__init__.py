@@ -2,6 +2,7 @@ from src.controllers.auths import AuthController
 from src.controllers.building_progression import BuildingProgressionController
 from src.controllers.buildings import BuildingController
 from src.controllers.building_collector import BuildingCollectorController
+from src.controllers.dashboards import DashboardController
 from src.controllers.onboards import OnboardController
 from src.controllers.passages import PassageController
 from src.controllers.questions import QuestionController
@@ -12,6 +13,7 @@ __all__ = [
     "AuthController",
     "BuildingController",
     "BuildingProgressionController",
+    "DashboardController",
     "OnboardController",
     "PassageController",
     "QuestionController",
@@ -1,31 +1,69 @@
+from functools import partial
+
+from src.app.building_catalog import BuildingCatalog, CatalogBuilding
 from src.app.constants import FundType, SubjectEnum
 from src.app.errors import BadRequestException, NotFoundException
+from src.app.status_hub import StatusHub
 from src.app.uow import UoW
 from src.presentations.schemas.collectors import UpgradeInfo, UpgradeResult
 from src.repositories import (
     UserCastleRepository,
     UserVillageRepository,
-    WalletRepository, BuildingRepository,
+    WalletRepository,
 )
 
 CASTLE_UPGRADE_FUND_TYPE = FundType.CRYSTAL
 VILLAGE_UPGRADE_FUND_TYPE = FundType.COIN
 
 
+def upgrade_info(
+        current_level: int,
+        next_building: CatalogBuilding | None,
+        fund_type: FundType,
+        balance: int,
+        max_level_reason: str,
+) -> UpgradeInfo:
+    if not next_building:
+        return UpgradeInfo(
+            can_upgrade=False,
+            current_level=current_level,
+            next_level=None,
+            upgrade_cost=None,
+            cost_fund_type=fund_type,
+            current_balance=balance,
+            reason=max_level_reason,
+        )
+
+    upgrade_cost = next_building.cost or 0
+    can_afford = balance >= upgrade_cost
+
+    return UpgradeInfo(
+        can_upgrade=can_afford,
+        current_level=current_level,
+        next_level=next_building.id,
+        upgrade_cost=upgrade_cost,
+        cost_fund_type=fund_type,
+        current_balance=balance,
+        reason=None if can_afford else f"Insufficient {fund_type.value}. Need {upgrade_cost}, have {balance}",
+    )
+
+
 class BuildingProgressionController:
     def __init__(
             self,
             uow: UoW,
             user_castle_repository: UserCastleRepository,
             user_village_repository: UserVillageRepository,
-            building_repository: BuildingRepository,
+            building_catalog: BuildingCatalog,
             wallet_repository: WalletRepository,
+            status_hub: StatusHub,
     ):
         self._uow = uow
         self._user_castle_repository = user_castle_repository
         self._user_village_repository = user_village_repository
-        self._building_repository = building_repository
+        self._building_catalog = building_catalog
         self._wallet_repository = wallet_repository
+        self._status_hub = status_hub
 
     async def get_castle_upgrade_info(self, user_id: int) -> UpgradeInfo:
         user_castle_data = await self._user_castle_repository.get_user_castle(user_id)
@@ -33,71 +71,35 @@ class BuildingProgressionController:
             raise NotFoundException("User castle not found")
 
         current_level = user_castle_data.get("castle_id")
-        next_castle = await self._building_repository.get_user_next_castle(user_id)
+        next_castle = (await self._building_catalog.get()).next(current_level)
         balance = await self._wallet_repository.get_balance(
             user_id,
             CASTLE_UPGRADE_FUND_TYPE
         )
-
-        if not next_castle:
-            return UpgradeInfo(
-                can_upgrade=False,
-                current_level=current_level,
-                next_level=None,
-                upgrade_cost=None,
-                cost_fund_type=CASTLE_UPGRADE_FUND_TYPE,
-                current_balance=balance,
-                reason="Already at maximum castle level",
-            )
-
-        upgrade_cost = next_castle.cost or 0
-        can_afford = balance >= upgrade_cost
-
-        return UpgradeInfo(
-            can_upgrade=can_afford,
-            current_level=current_level,
-            next_level=next_castle.id,
-            upgrade_cost=upgrade_cost,
-            cost_fund_type=CASTLE_UPGRADE_FUND_TYPE,
-            current_balance=balance,
-            reason=None if can_afford else f"Insufficient {CASTLE_UPGRADE_FUND_TYPE.value}. Need {upgrade_cost}, have {balance}",
+        return upgrade_info(
+            current_level, next_castle, CASTLE_UPGRADE_FUND_TYPE, balance, "Already at maximum castle level",
         )
 
     async def upgrade_castle(self, user_id: int) -> UpgradeResult:
-        user_castle_data = await self._user_castle_repository.get_user_castle(user_id)
-        if not user_castle_data:
-            raise NotFoundException("User castle not found")
-
-        next_castle = await self._building_repository.get_user_next_castle(user_id)
-        if not next_castle:
-            raise BadRequestException("Already at maximum castle level")
-
-        upgrade_cost = next_castle.cost or 0
-        balance = await self._wallet_repository.get_balance(user_id, CASTLE_UPGRADE_FUND_TYPE)
-        if balance < upgrade_cost:
-            raise BadRequestException(
-                f"Insufficient {CASTLE_UPGRADE_FUND_TYPE.value}. "
-                f"Need {upgrade_cost}, have {balance}"
-            )
-
         async with self._uow:
-            if upgrade_cost > 0:
-                await self._wallet_repository.deduct_funds(
-                    user_id=user_id,
-                    amount=upgrade_cost,
-                    fund_type=CASTLE_UPGRADE_FUND_TYPE,
-                )
+            locked = await self._user_castle_repository.lock_for_upgrade(user_id)
+            if not locked:
+                raise NotFoundException("User castle not found")
+            if locked["next_castle_id"] is None:
+                raise BadRequestException("Already at maximum castle level")
+
+            upgrade_cost = locked["next_castle_cost"] or 0
+            new_balance = await self._charge(user_id, upgrade_cost, CASTLE_UPGRADE_FUND_TYPE)
 
             await self._user_castle_repository.upgrade_castle(
-                user_castle_id=user_castle_data.get("user_castle_id"),
-                new_castle_id=next_castle.id,
+                user_castle_id=locked["user_castle_id"],
+                new_castle_id=locked["next_castle_id"],
             )
-
-            new_balance = await self._wallet_repository.get_balance(user_id, CASTLE_UPGRADE_FUND_TYPE)
+        self._uow.after_commit(partial(self._status_hub.publish, user_id))
 
         return UpgradeResult(
             success=True,
-            new_level=next_castle.id,
+            new_level=locked["next_castle_id"],
             cost_paid=upgrade_cost,
             new_balance=new_balance,
         )
@@ -114,76 +116,50 @@ class BuildingProgressionController:
             raise NotFoundException(f"User village for {subject} not found")
 
         current_level = user_village.get("village_id")
-        next_village = await self._building_repository.get_user_next_village(user_id, subject)
+        next_village = (await self._building_catalog.get()).next(current_level)
 
         balance = await self._wallet_repository.get_balance(user_id, VILLAGE_UPGRADE_FUND_TYPE)
-
-        if not next_village:
-            return UpgradeInfo(
-                can_upgrade=False,
-                current_level=current_level,
-                next_level=None,
-                upgrade_cost=None,
-                cost_fund_type=VILLAGE_UPGRADE_FUND_TYPE,
-                current_balance=balance,
-                reason="Already at maximum village level",
-            )
-
-        upgrade_cost = next_village.cost or 0
-        can_afford = balance >= upgrade_cost
-
-        return UpgradeInfo(
-            can_upgrade=can_afford,
-            current_level=current_level,
-            next_level=next_village.id,
-            upgrade_cost=upgrade_cost,
-            cost_fund_type=VILLAGE_UPGRADE_FUND_TYPE,
-            current_balance=balance,
-            reason=None if can_afford else f"Insufficient {VILLAGE_UPGRADE_FUND_TYPE.value}. Need {upgrade_cost}, have {balance}",
+        return upgrade_info(
+            current_level, next_village, VILLAGE_UPGRADE_FUND_TYPE, balance, "Already at maximum village level",
         )
 
     async def upgrade_village(self, user_id: int, subject: SubjectEnum) -> UpgradeResult:
-        user_villages = await self._user_village_repository.get_user_villages(user_id)
-        user_village = None
-        for v in user_villages:
-            if v.get("village_subject") == subject:
-                user_village = v
-                break
-
-        if not user_village:
-            raise NotFoundException(f"User village for {subject} not found")
-
-        next_village = await self._building_repository.get_user_next_village(user_id, subject)
-        if not next_village:
-            raise BadRequestException(f"Already at maximum village level for {subject}")
-
-        upgrade_cost = next_village.cost or 0
-
-        balance = await self._wallet_repository.get_balance(user_id, VILLAGE_UPGRADE_FUND_TYPE)
-        if balance < upgrade_cost:
-            raise BadRequestException(
-                f"Insufficient {VILLAGE_UPGRADE_FUND_TYPE.value}. "
-                f"Need {upgrade_cost}, have {balance}"
-            )
-
         async with self._uow:
-            if upgrade_cost > 0:
-                await self._wallet_repository.deduct_funds(
-                    user_id=user_id,
-                    amount=upgrade_cost,
-                    fund_type=VILLAGE_UPGRADE_FUND_TYPE,
-                )
+            locked = await self._user_village_repository.lock_for_upgrade(user_id, subject)
+            if not locked:
+                raise NotFoundException(f"User village for {subject} not found")
+            if locked["next_village_id"] is None:
+                raise BadRequestException(f"Already at maximum village level for {subject}")
+
+            upgrade_cost = locked["next_village_cost"] or 0
+            new_balance = await self._charge(user_id, upgrade_cost, VILLAGE_UPGRADE_FUND_TYPE)
 
             await self._user_village_repository.upgrade_village(
-                user_village_id=user_village.get("user_village_id"),
-                new_village_id=next_village.id,
+                user_village_id=locked["user_village_id"],
+                new_village_id=locked["next_village_id"],
             )
-
-            new_balance = await self._wallet_repository.get_balance(user_id, VILLAGE_UPGRADE_FUND_TYPE)
+        self._uow.after_commit(partial(self._status_hub.publish, user_id))
 
         return UpgradeResult(
             success=True,
-            new_level=next_village.id,
+            new_level=locked["next_village_id"],
             cost_paid=upgrade_cost,
             new_balance=new_balance,
         )
+
+    async def _charge(self, user_id: int, cost: int, fund_type: FundType) -> int:
+        if cost <= 0:
+            return await self._wallet_repository.get_balance(user_id, fund_type)
+
+        new_balance = await self._wallet_repository.deduct_funds(
+            user_id=user_id,
+            amount=cost,
+            fund_type=fund_type,
+        )
+        if new_balance is None:
+            balance = await self._wallet_repository.get_balance(user_id, fund_type)
+            raise BadRequestException(
+                f"Insufficient {fund_type.value}. "
+                f"Need {cost}, have {balance}"
+            )
+        return new_balance
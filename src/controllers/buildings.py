@@ -1,8 +1,16 @@
 import base64
+from dataclasses import asdict
+from functools import partial
+from typing import Any, AsyncIterator
 
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.building_catalog import BuildingCatalog, CatalogBuilding, CatalogSnapshot
 from src.app.cloudflare_r2 import CloudflareR2Service
-from src.app.constants import BuildingType, SubjectEnum
-from src.app.errors import NotFoundException, BadRequestException
+from src.app.constants import BuildingType, SubjectEnum, SVG_CONTENT_TYPE, BUILDING_SVG_PREFIX
+from src.app.errors import NotFoundException, BadRequestException, PayloadTooLargeException
+from src.app.status_hub import StatusHub
+from src.app.svg_assets import SvgAssetStore
 from src.app.uow import UoW
 from src.presentations.schemas.buildings import (
     BuildingWithPassagesRead,
@@ -11,8 +19,8 @@ from src.presentations.schemas.buildings import (
     BuildingVillageRead,
     BuildingVillageCreate,
     BuildingUpdate,
-    BuildingCastleUserRead,
-    BuildingVillageUserRead,
+    SvgUploadTicket,
+    SvgUploadRead,
 )
 from src.presentations.schemas.passages import PassageRead
 from src.repositories import BuildingRepository, PassageRepository, UserVillageRepository, UserCastleRepository
@@ -27,6 +35,11 @@ class BuildingController:
             user_village_repository: UserVillageRepository,
             user_castle_repository: UserCastleRepository,
             cloudflare_r2: CloudflareR2Service,
+            building_catalog: BuildingCatalog,
+            svg_assets: SvgAssetStore,
+            svg_max_bytes: int,
+            status_hub: StatusHub,
+            sessionmaker: async_sessionmaker[AsyncSession],
     ):
         self.uow = uow
         self.building_repository = building_repository
@@ -34,40 +47,115 @@ class BuildingController:
         self.cloudflare_r2 = cloudflare_r2
         self.user_village_repository = user_village_repository
         self.user_castle_repository = user_castle_repository
+        self.building_catalog = building_catalog
+        self.status_hub = status_hub
+        self.svg_assets = svg_assets
+        self.svg_max_bytes = svg_max_bytes
+        self.sessionmaker = sessionmaker
+
+    async def create_svg_upload(self, title: str) -> SvgUploadTicket:
+        """Presigned PUT: the admin client uploads straight to R2, then passes `key` as svg_key."""
+        key = self.cloudflare_r2.build_key(title, "svg", prefix=BUILDING_SVG_PREFIX)
+        upload_url = await self.cloudflare_r2.presign_put(key=key, content_type=SVG_CONTENT_TYPE)
+        return SvgUploadTicket(
+            key=key,
+            upload_url=upload_url,
+            public_url=self.cloudflare_r2.public_url(key),
+            expires_in=self.cloudflare_r2.presign_expires_seconds,
+            max_bytes=self.svg_max_bytes,
+            headers={"Content-Type": SVG_CONTENT_TYPE},
+        )
+
+    async def upload_svg_stream(
+            self,
+            title: str,
+            chunks: AsyncIterator[bytes],
+            content_length: int | None = None,
+    ) -> SvgUploadRead:
+        """Fallback when the client cannot reach R2: the body is relayed part by part, never buffered whole."""
+        if content_length is not None and content_length > self.svg_max_bytes:
+            raise PayloadTooLargeException(f"SVG exceeds {self.svg_max_bytes} bytes")
+        key = self.cloudflare_r2.build_key(title, "svg", prefix=BUILDING_SVG_PREFIX)
+        size = await self.cloudflare_r2.upload_stream(
+            key=key,
+            chunks=chunks,
+            content_type=SVG_CONTENT_TYPE,
+            max_bytes=self.svg_max_bytes,
+        )
+        return SvgUploadRead(key=key, public_url=self.cloudflare_r2.public_url(key), size=size)
+
+    async def _read_uploaded_svg(self, key: str) -> bytes:
+        """Fetch a client upload (presigned or streamed) and drop it; only the optimized asset is kept."""
+        if not key.startswith(f"{BUILDING_SVG_PREFIX}/") or ".." in key:
+            raise BadRequestException("Wrong svg key")
+        stored = await self.cloudflare_r2.head(key)
+        if stored is None:
+            raise BadRequestException("SVG was not uploaded")
+        try:
+            if stored.size > self.svg_max_bytes:
+                # a presigned PUT cannot cap the size, so oversized objects are rejected here
+                raise PayloadTooLargeException(f"SVG exceeds {self.svg_max_bytes} bytes")
+            if stored.content_type != SVG_CONTENT_TYPE:
+                raise BadRequestException("Uploaded file is not an SVG")
+            return await self.cloudflare_r2.read(key)
+        finally:
+            await self.cloudflare_r2.delete_file(key=key)
+
+    async def _store_svg(self, svg: bytes | None, svg_key: str | None) -> str | None:
+        if svg and svg_key:
+            raise BadRequestException("Pass either svg or svg_key")
+        if svg_key:
+            if self.svg_assets.is_asset_key(svg_key):
+                # reusing artwork that is already stored
+                if await self.cloudflare_r2.head(svg_key) is None:
+                    raise BadRequestException("SVG was not uploaded")
+                return self.cloudflare_r2.public_url(svg_key)
+            data = await self._read_uploaded_svg(svg_key)
+        elif svg:
+            data = base64.b64decode(svg)
+            if len(data) > self.svg_max_bytes:
+                raise PayloadTooLargeException(f"SVG exceeds {self.svg_max_bytes} bytes")
+        else:
+            return None
+        return (await self.svg_assets.put(data)).url
+
+    async def _locked_chain(self, building_type: BuildingType, subject: SubjectEnum | None) -> CatalogSnapshot:
+        """The chain as committed, locked until the request commits; the catalog may lag other workers."""
+        buildings = await self.building_repository.lock_chain(building_type, subject)
+        return CatalogSnapshot.build(version=0, buildings=(CatalogBuilding.from_model(b) for b in buildings))
+
+    async def _release_svg(self, url: str) -> None:
+        """After-commit hook: garbage-collect an asset no building points to anymore."""
+        # asked of the database right before the delete, by key: the catalog may lag other
+        # workers' writes and the same object may be referenced under another public host
+        key = self.cloudflare_r2.key_from_url(url)
+        async with self.sessionmaker() as session:
+            if await BuildingRepository(session).svg_key_in_use(key):
+                return
+        await self.svg_assets.discard(url)
 
     async def create_building(
             self,
             body: BuildingCastleCreate | BuildingVillageCreate,
             building_type: BuildingType
     ) -> BuildingCastleRead | BuildingVillageRead:
-        modified_data = body.model_dump()
-        svg_url = None
-        if body.svg:
-            key = self.cloudflare_r2.build_key(body.title, "svg")
-            svg_bytes = base64.b64decode(body.svg)
-            svg_url = await self.cloudflare_r2.upload_bytes(
-                key=key,
-                body=svg_bytes,
-                content_type="image/svg+xml",
-            )
-        modified_data['svg'] = svg_url
+        modified_data = body.model_dump(exclude={"svg_key"})
         if body.next_building_id:
-            next_building = await self.building_repository.get_by_id(body.next_building_id)
-            if not next_building:
+            if not await self.building_repository.get_by_id(body.next_building_id):
                 raise BadRequestException("Wrong next building id")
+        modified_data['svg'] = await self._store_svg(body.svg, body.svg_key)
 
-        list_buildings = await self.building_repository.list_buildings(
-            building_type=building_type,
-            subject=body.subject if hasattr(body, "subject") else None,
-        )
-        last_building = list_buildings[-1] if list_buildings else None
+        subject = body.subject if hasattr(body, "subject") else None
         async with self.uow:
+            last_building = (await self._locked_chain(building_type, subject)).last(building_type, subject)
             created = await self.building_repository.create(**modified_data)
             if last_building:
                 await self.building_repository.update(
                     id=last_building.id,
                     next_building_id=created.id,
                 )
+        self.uow.after_commit(self.building_catalog.invalidate)
+        self.uow.after_commit(self.status_hub.broadcast)
         if building_type == BuildingType.CASTLE:
             return BuildingCastleRead.model_validate(created)
         else:
@@ -77,7 +165,7 @@ class BuildingController:
             self,
             building_id: int
     ) -> BuildingWithPassagesRead:
-        building = await self.building_repository.get_by_id(building_id)
+        building = (await self.building_catalog.get()).get(building_id)
         if not building:
             raise NotFoundException("Building with this id not found")
         passages = await self.passage_repository.village_passages(
@@ -103,10 +191,7 @@ class BuildingController:
     ) -> list[BuildingCastleRead] | list[BuildingVillageRead]:
         if subject and building_type != BuildingType.VILLAGE:
             raise BadRequestException("Type must be Village to retrieve buildings via subject")
-        buildings = await self.building_repository.list_buildings(
-            building_type=building_type,
-            subject=subject
-        )
+        buildings = (await self.building_catalog.get()).list(building_type, subject)
         if building_type == BuildingType.CASTLE:
             return [BuildingCastleRead.model_validate(c) for c in buildings]
         else:
@@ -117,18 +202,16 @@ class BuildingController:
             building_type: BuildingType,
             user_id: int,
             subject: SubjectEnum | None = None,
-    ) -> list[BuildingCastleUserRead] | list[BuildingVillageUserRead]:
+    ) -> list[dict[str, Any]]:
+        """Rows shaped like BuildingCastleUserRead / BuildingVillageUserRead."""
         if subject and building_type != BuildingType.VILLAGE:
             raise BadRequestException("Type must be Village to retrieve buildings via subject")
-        buildings = await self.building_repository.list_buildings(
-            building_type=building_type,
-            subject=subject,
-            user_id=user_id
-        )
+        buildings = (await self.building_catalog.get()).list(building_type, subject)
         if building_type == BuildingType.CASTLE:
-            return [BuildingCastleUserRead.model_validate(c) for c in buildings]
+            current_ids = {await self.user_castle_repository.get_castle_id(user_id)}
         else:
-            return [BuildingVillageUserRead.model_validate(c) for c in buildings]
+            current_ids = await self.user_village_repository.get_village_ids(user_id)
+        return [{**asdict(b), "is_current": b.id in current_ids} for b in buildings]
 
     async def update_building(
             self,
@@ -140,56 +223,46 @@ class BuildingController:
         if not db_building:
             raise NotFoundException("Building with this id not found")
         payload = body.model_dump(exclude_unset=True)
-        if payload.get("svg") is not None:
-            if db_building.svg:
-                await self.cloudflare_r2.delete_file(key=db_building.svg.split("/")[-1])
-            svg_url = None
-            svg_bytes = base64.b64decode(body.svg)
-            if body.svg:
-                key = self.cloudflare_r2.build_key(body.title or db_building.title, "svg")
-                svg_url = await self.cloudflare_r2.upload_bytes(
-                    key=key,
-                    body=svg_bytes,
-                    content_type="image/svg+xml"
-                )
+        svg_key = payload.pop("svg_key", None)
+        if payload.get("svg") is not None or svg_key is not None:
+            svg_url = await self._store_svg(body.svg, svg_key)
             payload['svg'] = svg_url
         async with self.uow:
             updated = await self.building_repository.update(building_id, **payload)
+        self.uow.after_commit(self.building_catalog.invalidate)
+        self.uow.after_commit(self.status_hub.broadcast)
+        if db_building.svg and "svg" in payload and payload["svg"] != db_building.svg:
+            self.uow.after_commit(partial(self._release_svg, db_building.svg))
         if building_type == BuildingType.CASTLE:
             return BuildingCastleRead.model_validate(updated)
         else:
             return BuildingVillageRead.model_validate(updated)
 
     async def delete_building(self, building_id: int) -> bool:
-        db_building = await self.building_repository.get_by_id(building_id)
-        if not db_building:
-            raise NotFoundException("Building not found")
-        list_buildings = await self.building_repository.list_buildings(
-            building_type=db_building.type,
-            subject=db_building.subject
-        )
-
-        if len(list_buildings) <= 1:
-            raise BadRequestException(
-                f"Cannot delete the last {db_building.subject} village. Users must have at least one."
-            )
-        current_index = -1
-        for i, b in enumerate(list_buildings):
-            if b.id == building_id:
-                current_index = i
-                break
-
-        target_migration_id = db_building.next_building_id
-
-        if not target_migration_id:
-            if current_index > 0:
-                target_migration_id = list_buildings[current_index - 1].id
-            else:
-                raise BadRequestException("Cannot migrate users: no target building found")
-        if db_building.svg:
-            await self.cloudflare_r2.delete_file(key=db_building.svg.split("/")[-1])
         async with self.uow:
-            print(current_index)
+            found = await self.building_repository.get_by_id(building_id)
+            if not found:
+                raise NotFoundException("Building not found")
+            locked = await self._locked_chain(found.type, found.subject)
+            db_building = locked.get(building_id)
+            if not db_building:
+                # deleted by a concurrent request while this one waited for the chain lock
+                raise NotFoundException("Building not found")
+
+            if len(locked.chain(db_building.type, db_building.subject)) <= 1:
+                raise BadRequestException(
+                    f"Cannot delete the last {db_building.subject} village. Users must have at least one."
+                )
+            is_first = locked.position(building_id) == 0
+            previous_building = locked.prev(building_id)
+
+            target_migration_id = db_building.next_building_id
+
+            if not target_migration_id:
+                if previous_building:
+                    target_migration_id = previous_building.id
+                else:
+                    raise BadRequestException("Cannot migrate users: no target building found")
             if db_building.type == BuildingType.VILLAGE:
                 await self.user_village_repository.migrate_users_to_village(
                     old_village_id=building_id,
@@ -200,10 +273,7 @@ class BuildingController:
                     old_castle_id=building_id,
                     new_castle_id=target_migration_id
                 )
-            print(db_building.__dict__)
-            print(db_building.next_building_id)
-            if current_index == 0 and db_building.next_building_id is not None:
-                print("Updating")
+            if is_first and db_building.next_building_id is not None:
                 await self.building_repository.update(
                     id=target_migration_id,
                     **{
@@ -211,8 +281,7 @@ class BuildingController:
                     }
                 )
 
-            if current_index > 0:
-                previous_building = list_buildings[current_index - 1]
+            if previous_building:
                 await self.building_repository.update(
                     previous_building.id,
                     **{
@@ -222,4 +291,8 @@ class BuildingController:
 
             deleted = await self.building_repository.delete(building_id)
 
+        self.uow.after_commit(self.building_catalog.invalidate)
+        self.uow.after_commit(self.status_hub.broadcast)
+        if db_building.svg:
+            self.uow.after_commit(partial(self._release_svg, db_building.svg))
         return deleted
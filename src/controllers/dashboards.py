@@ -0,0 +1,135 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from src.app.building_catalog import BuildingCatalog
+from src.app.constants import FundType
+from src.app.tap_aggregator import TapAggregator
+from src.app.errors import NotFoundException
+from src.app.treasure import TreasureColumns, accrue_batch
+from src.controllers.building_collector import COINS_PER_TAP, MAX_TAPS_PER_DAY, taps_remaining
+from src.controllers.building_progression import (
+    CASTLE_UPGRADE_FUND_TYPE,
+    VILLAGE_UPGRADE_FUND_TYPE,
+    upgrade_info,
+)
+from src.repositories import UserRepository
+
+PROFILE_FIELDS = (
+    "id", "email", "full_name", "current_score", "target_score", "exam_date", "has_onboard", "is_admin",
+)
+
+
+class DashboardController:
+    """
+    Everything the client shows on launch, from one statement: profile, balances,
+    castle (with taps) and villages, each building accrued against the same clock
+    reading and paired with its upgrade info from the in-process building catalog.
+    With write-behind taps, the taps and coins this worker has not flushed yet are
+    added, so the dashboard agrees with the tap response.
+    """
+
+    def __init__(
+            self,
+            user_repository: UserRepository,
+            building_catalog: BuildingCatalog,
+            tap_aggregator: TapAggregator | None = None,
+    ):
+        self._user_repository = user_repository
+        self._building_catalog = building_catalog
+        self._tap_aggregator = tap_aggregator
+
+    async def get_dashboard(self, user_id: int, now: datetime | None = None) -> dict[str, Any]:
+        rows = await self._user_repository.get_dashboard_rows(user_id)
+        if not rows:
+            raise NotFoundException("User not found")
+
+        head = rows[0]
+        catalog = await self._building_catalog.get()
+        balances = {fund_type: head[f"balance_{fund_type.value}"] or 0 for fund_type in FundType}
+        now = now or datetime.now(timezone.utc)
+        unflushed_taps = 0
+        if self._tap_aggregator is not None:
+            balances[FundType.COIN] += self._tap_aggregator.unflushed_coins(user_id)
+            unflushed_taps = self._tap_aggregator.unflushed_taps(user_id, now.date())
+        village_rows = [row for row in rows if row["village_id"] is not None]
+        has_castle = head["castle_id"] is not None
+
+        # the castle rides along as the first row of the same batch
+        columns = TreasureColumns()
+        if has_castle:
+            columns.append(
+                head["castle_treasure_amount"],
+                head["castle_treasure_capacity"],
+                head["castle_speed_production_treasure"],
+                head["castle_last_collect_date"],
+            )
+        for row in village_rows:
+            columns.append(
+                row["treasure_amount"],
+                row["treasure_capacity"],
+                row["speed_production_treasure"],
+                row["last_collect_date"],
+            )
+        accrued = list(zip(*accrue_batch(columns, now)))
+
+        castle = None
+        if has_castle:
+            amount, minutes = accrued.pop(0)
+            castle = {
+                "castle_id": head["castle_id"],
+                "castle_title": head["castle_title"],
+                "svg": head["castle_svg"],
+                "treasure": {
+                    "current_amount": amount,
+                    "capacity": head["castle_treasure_capacity"],
+                    "production_rate": head["castle_speed_production_treasure"],
+                    "last_collect_date": head["castle_last_collect_date"],
+                    "time_to_full_minutes": minutes,
+                    "fund_type": FundType.CRYSTAL,
+                },
+                "taps_remaining": max(
+                    0,
+                    taps_remaining(head["taps_used_today"], head["last_tap_reset_date"], now.date()) - unflushed_taps,
+                ),
+                "max_taps_per_day": MAX_TAPS_PER_DAY,
+                "coins_per_tap": COINS_PER_TAP,
+                "upgrade": upgrade_info(
+                    head["castle_id"],
+                    catalog.next(head["castle_id"]),
+                    CASTLE_UPGRADE_FUND_TYPE,
+                    balances[CASTLE_UPGRADE_FUND_TYPE],
+                    "Already at maximum castle level",
+                ),
+            }
+
+        villages = [
+            {
+                "village_id": row["village_id"],
+                "village_title": row["village_title"],
+                "subject": row["village_subject"],
+                "svg": row["village_svg"],
+                "treasure": {
+                    "current_amount": amount,
+                    "capacity": row["treasure_capacity"],
+                    "production_rate": row["speed_production_treasure"],
+                    "last_collect_date": row["last_collect_date"],
+                    "time_to_full_minutes": minutes,
+                    "fund_type": FundType.COIN,
+                },
+                "upgrade": upgrade_info(
+                    row["village_id"],
+                    catalog.next(row["village_id"]),
+                    VILLAGE_UPGRADE_FUND_TYPE,
+                    balances[VILLAGE_UPGRADE_FUND_TYPE],
+                    "Already at maximum village level",
+                ),
+            }
+            for row, (amount, minutes) in zip(village_rows, accrued)
+        ]
+
+        return {
+            "profile": {field: head[field] for field in PROFILE_FIELDS},
+            "balances": balances,
+            "castle": castle,
+            "villages": villages,
+        }
@@ -1,14 +1,15 @@
-import asyncio
+from functools import partial
 from typing import List, Any
 
-from src.app.constants import SubjectEnum
+from src.app.building_catalog import BuildingCatalog, CatalogSnapshot
+from src.app.cache import RoadmapCache
+from src.app.constants import BuildingType, SubjectEnum
 from src.app.errors import BadRequestException
 from src.app.passage_node_generator import PassageNodeGenerator
+from src.app.principals import UserPrincipal, UserPrincipalCache
 from src.app.uow import UoW
 from src.presentations.schemas.onboards import OnboardCreate, PassageOnboard, UserLevel
-from src.presentations.schemas.users import UserRead
 from src.repositories import (
-    BuildingRepository,
     PassageRepository,
     UserCastleRepository,
     UserRepository,
@@ -22,29 +23,35 @@ class OnboardController:
             uow: UoW,
             user_repository: UserRepository,
             passage_repository: PassageRepository,
-            building_repository: BuildingRepository,
+            building_catalog: BuildingCatalog,
             user_castle_repository: UserCastleRepository,
             user_village_repository: UserVillageRepository,
             node_repository: PassageNodeRepository,
             node_generator: PassageNodeGenerator,
+            user_cache: UserPrincipalCache,
+            roadmap_cache: RoadmapCache,
     ):
         self._uow = uow
         self._user_repository = user_repository
         self._passage_repository = passage_repository
-        self._building_repository = building_repository
+        self._building_catalog = building_catalog
         self._user_castle_repository = user_castle_repository
         self._user_village_repository = user_village_repository
         self._node_repository = node_repository
         self._node_generator = node_generator
+        self._user_cache = user_cache
+        self._roadmap_cache = roadmap_cache
 
-    async def execute(self, user: UserRead, onboard: OnboardCreate) -> list:
+    async def execute(self, user: UserPrincipal, onboard: OnboardCreate) -> list:
         if user.has_onboard:
             raise BadRequestException("User has already completed onboarding")
 
+        catalog = await self._building_catalog.get()
         async with self._uow:
-            db_castle = await self._building_repository.get_user_next_castle(
-                user.id
-            )
+            # новый пользователь начинает с первого замка цепочки
+            db_castle = catalog.first(BuildingType.CASTLE)
+            if not db_castle:
+                raise BadRequestException("No castle available")
             await self._user_castle_repository.create(
                 user_id=user.id,
                 castle_id=db_castle.id,
@@ -87,35 +94,34 @@ class OnboardController:
                         "level": score_to_level(normalized_score),
                     }
                 )
-            await self._generate_all_subjects(user.id, onboard.subjects)
-            return results
+            await self._generate_all_subjects(user.id, onboard.subjects, catalog)
+        # after commit: a request racing this one must not re-cache the principal without has_onboard
+        self._uow.after_commit(partial(self._invalidate_principal, user.id))
+        # the generated nodes are shared: they show up in every user's roadmap of those villages
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return results
 
-    async def _generate_all_subjects(self, user_id: int, subjects: list) -> None:
-        await asyncio.gather(
-            *[
-                self._generate_subject_roadmap(
-                    subject=subject.subject,
-                    passages=subject.passages,
-                    user_id=user_id,
-                )
-                for subject in subjects
-            ]
-        )
+    async def _invalidate_principal(self, user_id: int) -> None:
+        self._user_cache.invalidate(user_id)
 
-    async def _generate_subject_roadmap(
-            self,
-            subject: SubjectEnum,
-            passages: List[PassageOnboard],
-            user_id: int,
-    ) -> None:
-        db_village = await self._building_repository.get_user_next_village(
-            user_id,
-            subject=subject,
-        )
+    async def _generate_all_subjects(self, user_id: int, subjects: list, catalog: CatalogSnapshot) -> None:
+        # запись в общую сессию идёт последовательно, параллелятся только запросы к LLM
+        for subject in subjects:
+            await self._assign_subject_village(user_id, subject.subject, catalog)
+
+        passages: List[PassageOnboard] = [
+            passage
+            for subject in subjects
+            for passage in subject.passages
+        ]
+        await self._node_generator.generate(passages)
+
+    async def _assign_subject_village(self, user_id: int, subject: SubjectEnum, catalog: CatalogSnapshot) -> None:
+        db_village = catalog.first(BuildingType.VILLAGE, subject)
+        if not db_village:
+            raise BadRequestException(f"No village available for subject: {subject}")
 
         await self._user_village_repository.create(
             user_id=user_id,
-            subject=subject,
             village_id=db_village.id,
         )
-        await self._node_generator.generate(passages)
@@ -1,3 +1,4 @@
+from src.app.cache import RoadmapCache
 from src.app.errors import BadRequestException, NotFoundException
 from src.app.uow import UoW
 from src.models.nodes import PassageNode
@@ -14,10 +15,12 @@ class PassageNodeController:
             uow: UoW,
             node_repository: PassageNodeRepository,
             passage_repository: PassageRepository,
+            roadmap_cache: RoadmapCache,
     ):
         self._uow = uow
         self._node_repository = node_repository
         self._passage_repository = passage_repository
+        self._roadmap_cache = roadmap_cache
 
     async def delete_node(self, node_id: int) -> bool:
         node = await self._node_repository.get_by_id(node_id)
@@ -25,7 +28,9 @@ class PassageNodeController:
             raise NotFoundException(f"Node with id {node_id} not found")
 
         async with self._uow:
-            return await self._node_repository.delete(node_id)
+            deleted = await self._node_repository.delete(node_id)
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return deleted
 
     async def get_boss(self, passage_id: int) -> PassageNode | None:
         passage = await self._passage_repository.get_by_id(passage_id)
@@ -53,7 +58,8 @@ class PassageNodeController:
                 reward_coins=data.reward_coins,
                 reward_xp=data.reward_xp,
             )
-            return node
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return node
 
     async def update_boss(self, node_id: int, data: BossNodeUpdate) -> PassageNode:
         node = await self._node_repository.get_by_id(node_id)
@@ -69,4 +75,5 @@ class PassageNodeController:
 
         async with self._uow:
             updated = await self._node_repository.update(node_id, **update_data)
-            return updated
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return updated
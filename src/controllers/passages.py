@@ -1,5 +1,6 @@
 from typing import Sequence
 
+from src.app.cache import RoadmapCache
 from src.app.constants import SubjectEnum
 from src.app.errors import BadRequestException, NotFoundException
 from src.app.uow import UoW
@@ -17,10 +18,12 @@ class PassageController:
             uow: UoW,
             passage_repository: PassageRepository,
             building_repository: BuildingRepository,
+            roadmap_cache: RoadmapCache,
     ):
         self._uow = uow
         self._passage_repository = passage_repository
         self._building_repository = building_repository
+        self._roadmap_cache = roadmap_cache
 
     async def create(self, data: PassageCreate) -> Passage:
         village = await self._building_repository.get_by_id(data.village_id)
@@ -37,7 +40,8 @@ class PassageController:
                 title=data.title,
                 order_index=next_order
             )
-            return passage
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return passage
 
     async def update(self, passage_id: int, data: PassageUpdate) -> Passage:
         passage = await self._passage_repository.get_by_id(passage_id)
@@ -50,7 +54,8 @@ class PassageController:
 
         async with self._uow:
             updated = await self._passage_repository.update(passage_id, **update_data)
-            return updated
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return updated
 
     async def delete(self, passage_id: int) -> bool:
         passage = await self._passage_repository.get_by_id(passage_id)
@@ -58,7 +63,9 @@ class PassageController:
             raise NotFoundException(f"Passage with id {passage_id} not found")
 
         async with self._uow:
-            return await self._passage_repository.delete(passage_id)
+            deleted = await self._passage_repository.delete(passage_id)
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return deleted
 
     async def reorder_passage(
             self,
@@ -79,6 +86,7 @@ class PassageController:
                 fk_name="village_id",
                 fk_id=village_id,
             )
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
         return await self._passage_repository.village_passages(village_id)
 
     async def get_next_passages(
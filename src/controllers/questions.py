@@ -1,5 +1,6 @@
 from typing import Sequence
 
+from src.app.cache import RoadmapCache
 from src.app.errors import BadRequestException, NotFoundException
 from src.app.uow import UoW
 from src.models.questions import Question
@@ -16,10 +17,12 @@ class QuestionController:
             uow: UoW,
             question_repository: QuestionRepository,
             node_repository: PassageNodeRepository,
+            roadmap_cache: RoadmapCache,
     ):
         self._uow = uow
         self._question_repository = question_repository
         self._node_repository = node_repository
+        self._roadmap_cache = roadmap_cache
 
     async def get_by_node_id(self, node_id: int) -> Sequence[Question]:
         node = await self._node_repository.get_by_id(node_id)
@@ -41,7 +44,8 @@ class QuestionController:
                 content=data.content,
                 order_index=count + 1,
             )
-            return question
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return question
 
     async def update(self, question_id: int, data: QuestionUpdate) -> Question:
         question = await self._question_repository.get_by_id(question_id)
@@ -57,7 +61,8 @@ class QuestionController:
 
         async with self._uow:
             updated = await self._question_repository.update(question_id, **update_data)
-            return updated
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return updated
 
     async def delete(self, question_id: int) -> bool:
         question = await self._question_repository.get_by_id(question_id)
@@ -65,7 +70,9 @@ class QuestionController:
             raise NotFoundException(f"Question with id {question_id} not found")
 
         async with self._uow:
-            return await self._question_repository.delete(question_id)
+            deleted = await self._question_repository.delete(question_id)
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return deleted
 
     async def reorder_questions(
             self,
@@ -83,4 +90,5 @@ class QuestionController:
                 new_index=new_index,
                 fk_name="node_id",
             )
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
         return await self._question_repository.get_by_node_id(node_id)
@@ -1,16 +1,11 @@
-import json
-from typing import Any, List
+from typing import Any
 
-from pydantic import BaseModel, Field
-
-from src.app.constants import PROMPTS, QuestionType
-from src.app.errors import NotFoundException, InternalServerException
-from src.app.openai_service import OpenAIService
+from src.app.cache import RoadmapCache
+from src.app.constants import QUESTIONS_STATUS_PENDING, QUESTIONS_STATUS_READY
+from src.app.errors import NotFoundException
+from src.app.question_generator import QuestionGenerationQueue
+from src.app.roadmap import resolve_roadmap
 from src.app.uow import UoW
-from src.presentations.schemas.nodes import NodeDetailedRead
-from src.presentations.schemas.questions import (
-    QuestionRead,
-)
 from src.repositories import (
     PassageNodeRepository,
     QuestionRepository,
@@ -20,19 +15,6 @@ from src.repositories import (
 )
 
 
-class GeneratedQuestion(BaseModel):
-    type: QuestionType
-    text: str
-    content: dict[str, Any]
-
-
-class ListNodeRelationsResponse(BaseModel):
-    questions: List[GeneratedQuestion] = Field(
-        ...,
-        description="List of generated questions for the lesson node"
-    )
-
-
 class RoadmapController:
     def __init__(
             self,
@@ -42,7 +24,8 @@ class RoadmapController:
             village_repository: UserVillageRepository,
             question_repository: QuestionRepository,
             progress_repository: UserNodeProgressRepository,
-            openai_service: OpenAIService,
+            question_generation_queue: QuestionGenerationQueue,
+            roadmap_cache: RoadmapCache,
     ):
         self.uow = uow
         self.passage_repository = passage_repository
@@ -50,59 +33,33 @@ class RoadmapController:
         self.village_repository = village_repository
         self.question_repository = question_repository
         self.progress_repository = progress_repository
-        self.openai_service = openai_service
+        self.question_generation_queue = question_generation_queue
+        self.roadmap_cache = roadmap_cache
 
-    async def get_node(self, node_id: int):
+    async def get_node(self, node_id: int) -> dict[str, Any]:
+        """Row shaped like NodeDetailedRead; questions stay ORM objects for the serializer."""
         db_node = await self.node_repository.get_by_id(node_id)
         if not db_node:
             raise NotFoundException("Node not found")
 
-        passage = await self.passage_repository.get_by_id(db_node.passage_id)
-        if not passage:
-            raise NotFoundException("Passage not found")
-
-        if not db_node.questions:
-            system_prompt = PROMPTS.get(passage.village.subject.value if passage.village else "english")
-            user_prompt = f"""
-                            GENERATE LESSON CONTENT:
-                            - **Title:** {db_node.title}
-                            - **Node Content:** {db_node.content or "General vocabulary"}
-                            - **Subject:** {passage.village.subject.value if passage.village else "english"}
-                            - **Passage:** {passage.title}
-                            """
-
-            try:
-                response_json: ListNodeRelationsResponse = await self.openai_service.request(
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": system_prompt,
-                        },
-                        {
-                            "role": "user",
-                            "content": json.dumps(user_prompt, ensure_ascii=False),
-                        }
-                    ],
-                    response_format=ListNodeRelationsResponse
-                )
-            except Exception as e:
-                raise InternalServerException("Ai response error")
-
-            async with self.uow:
-                generated_questions = []
-                for q in response_json.questions:
-                    mutable_dict = q.model_dump()
-                    mutable_dict["node_id"] = node_id
-                    mutable_dict["content"] = q.content
-                    try:
-                        generated_questions.append(await self.question_repository.create(**mutable_dict))
-                    except Exception as e:
-                        raise InternalServerException("Ai response error")
-            db_node.questions = generated_questions
-
-        pydantic_model = NodeDetailedRead.model_validate(db_node)
-        pydantic_model.questions = [QuestionRead.model_validate(question) for question in db_node.questions]
-        return pydantic_model
+        questions = await self.question_repository.get_by_node_id(node_id)
+        if not questions:
+            self.question_generation_queue.enqueue(node_id)
+
+        # поля передаются явно: lazy-связь node.questions в async-сессии не загружается
+        return {
+            "id": db_node.id,
+            "passage_id": db_node.passage_id,
+            "title": db_node.title,
+            "content": db_node.content,
+            "is_boss": db_node.is_boss,
+            "config": db_node.config,
+            "pass_score": db_node.pass_score,
+            "reward_coins": db_node.reward_coins,
+            "reward_xp": db_node.reward_xp,
+            "questions": questions,
+            "questions_status": QUESTIONS_STATUS_READY if questions else QUESTIONS_STATUS_PENDING,
+        }
 
     async def get_roadmap(self, subject: str, user_id: int, limit: int = 5):
         user_villages = await self.village_repository.get_user_villages(user_id)
@@ -115,4 +72,16 @@ class RoadmapController:
         if not village_id:
             raise NotFoundException(f"No village found for subject: {subject}")
 
-        return await self.passage_repository.get_roadmap(user_id, village_id)
+        cache_key = await self.roadmap_cache.key(user_id, village_id)
+        cached = await self.roadmap_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        passages = await self.passage_repository.get_village_roadmap(village_id)
+        completed_node_ids = await self.progress_repository.get_completed_node_ids(
+            user_id,
+            [node_id for passage in passages for node_id in passage.node_ids],
+        )
+        roadmap = resolve_roadmap(passages, completed_node_ids)
+        await self.roadmap_cache.set(cache_key, roadmap)
+        return roadmap
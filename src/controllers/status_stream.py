@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator
+
+from src.app.building_catalog import BuildingCatalog
+from src.app.db_routing import ReplicaRouter
+from src.app.status_hub import StatusHub
+from src.app.tap_aggregator import TapAggregator
+from src.controllers.dashboards import DashboardController
+from src.repositories import UserRepository
+
+# grow with the clock alone; the client extrapolates them from production_rate and `at`
+DERIVED_TREASURE_FIELDS = ("current_amount", "time_to_full_minutes")
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+KEEPALIVE = "keepalive"
+
+
+def _accrual_params(building: dict[str, Any] | None) -> dict[str, Any] | None:
+    if building is None:
+        return None
+    treasure = {k: v for k, v in building["treasure"].items() if k not in DERIVED_TREASURE_FIELDS}
+    return {**building, "treasure": treasure}
+
+
+def dashboard_delta(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    """Sections of `new` whose stored state differs from `old`; accrual over time alone is not a change."""
+    delta = {key: new[key] for key in ("profile", "balances") if old[key] != new[key]}
+    if _accrual_params(old["castle"]) != _accrual_params(new["castle"]):
+        delta["castle"] = new["castle"]
+    previous = {village["subject"]: _accrual_params(village) for village in old["villages"]}
+    villages = [village for village in new["villages"] if previous.get(village["subject"]) != _accrual_params(village)]
+    if villages:
+        delta["villages"] = villages
+    return delta
+
+
+class StatusStreamController:
+    """
+    Dashboard state pushed instead of polled: one snapshot with the accrual parameters,
+    then a delta only when a collect, tap, upgrade or building change is published to
+    the hub. Every reload opens its own short session, so an open stream holds no
+    database connection while it waits.
+    """
+
+    def __init__(
+            self,
+            db_router: ReplicaRouter,
+            building_catalog: BuildingCatalog,
+            status_hub: StatusHub,
+            heartbeat_seconds: float,
+            tap_aggregator: TapAggregator | None = None,
+    ):
+        self._db_router = db_router
+        self._building_catalog = building_catalog
+        self._status_hub = status_hub
+        self._heartbeat_seconds = heartbeat_seconds
+        self._tap_aggregator = tap_aggregator
+
+    async def stream(self, user_id: int) -> AsyncIterator[tuple[str, dict[str, Any] | None]]:
+        """Yields (event, data); the first event is the snapshot, so a missing user fails before streaming."""
+        with self._status_hub.subscribe(user_id) as wake:
+            versions = await self._status_hub.versions(user_id)
+            at = datetime.now(timezone.utc)
+            state = await self._load(user_id, at)
+            yield SNAPSHOT, {"at": at, **state}
+
+            while True:
+                try:
+                    await asyncio.wait_for(wake.wait(), self._heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    # a write served by another worker only shows up in the shared counters;
+                    # a new UTC day resets the taps without any write
+                    if await self._status_hub.versions(user_id) == versions and \
+                            datetime.now(timezone.utc).date() == at.date():
+                        yield KEEPALIVE, None
+                        continue
+                wake.clear()
+
+                versions = await self._status_hub.versions(user_id)
+                at = datetime.now(timezone.utc)
+                fresh = await self._load(user_id, at)
+                delta = dashboard_delta(state, fresh)
+                state = fresh
+                yield (DELTA, {"at": at, **delta}) if delta else (KEEPALIVE, None)
+
+    async def _load(self, user_id: int, at: datetime) -> dict[str, Any]:
+        sessionmaker = await self._db_router.read_sessionmaker(user_id)
+        async with sessionmaker() as session:
+            dashboard = DashboardController(UserRepository(session), self._building_catalog, self._tap_aggregator)
+            return await dashboard.get_dashboard(user_id, now=at)
@@ -1,13 +1,14 @@
-from src.app.constants import SubjectEnum
+from src.app.building_catalog import BuildingCatalog
+from src.app.cache import RoadmapCache
+from src.app.constants import BuildingType, SubjectEnum
 from src.app.errors import BadRequestException
 from src.app.passage_node_generator import PassageNodeGenerator
+from src.app.principals import UserPrincipal
 from src.app.uow import UoW
 from src.presentations.schemas.onboards import SingleSubjectOnboard
-from src.presentations.schemas.users import UserRead
 from src.repositories import (
     PassageNodeRepository,
     UserVillageRepository,
-    BuildingRepository
 )
 
 
@@ -18,24 +19,27 @@ class SubjectOnboardController:
             user_village_repository: UserVillageRepository,
             node_repository: PassageNodeRepository,
             node_generator: PassageNodeGenerator,
-            building_repository: BuildingRepository,
+            building_catalog: BuildingCatalog,
+            roadmap_cache: RoadmapCache,
     ):
         self._uow = uow
         self._user_village_repository = user_village_repository
         self._node_repository = node_repository
         self._node_generator = node_generator
-        self._building_repository = building_repository
+        self._building_catalog = building_catalog
+        self._roadmap_cache = roadmap_cache
 
     async def execute(
             self,
-            user: UserRead,
+            user: UserPrincipal,
             data: SingleSubjectOnboard,
     ):
         async with self._uow:
             await self._ensure_village_exists(user.id, data.subject)
             result = await self._node_generator.generate(data.passages)
-
-            return result
+        # the generated nodes are shared: they show up in every user's roadmap of the village
+        self._uow.after_commit(self._roadmap_cache.bump_content_version)
+        return result
 
     async def _ensure_village_exists(self, user_id: int, subject: SubjectEnum) -> None:
         existing = await (
@@ -47,14 +51,10 @@ class SubjectOnboardController:
         )
         if existing:
             return
-        db_village = await self._building_repository.get_user_next_village(
-            user_id,
-            subject=subject
-        )
+        db_village = (await self._building_catalog.get()).first(BuildingType.VILLAGE, subject)
         if not db_village:
             raise BadRequestException(f"No village available for subject: {subject}")
         await self._user_village_repository.create(
             user_id=user_id,
-            subject=subject,
             village_id=db_village.id,
         )
@@ -1,4 +1,5 @@
 from src.app.errors import NotFoundException
+from src.app.principals import UserPrincipalCache
 from src.app.uow import UoW
 from src.presentations.schemas.users import UserUpdate, UserRead, UserCastleWithVillages, UserVillageRead
 from src.repositories import UserRepository, UserCastleRepository, UserVillageRepository
@@ -11,11 +12,19 @@ class UserController:
             user_repo: UserRepository,
             castle_repository: UserCastleRepository,
             village_repository: UserVillageRepository,
+            user_cache: UserPrincipalCache,
     ):
         self.uow = uow
         self.user_repo = user_repo
         self.castle_repository = castle_repository
         self.village_repository = village_repository
+        self.user_cache = user_cache
+
+    async def get_profile(self, user_id: int) -> UserRead:
+        db_user = await self.user_repo.get_by_id(user_id)
+        if not db_user:
+            raise NotFoundException("User not found")
+        return UserRead.model_validate(db_user)
 
     async def profile_update(self, user_id: int, data: UserUpdate):
         try:
@@ -24,6 +33,7 @@ class UserController:
                 raise NotFoundException("User not found")
             async with self.uow:
                 updated = await self.user_repo.update(user_id, **data.model_dump(exclude_unset=True))
+            self.user_cache.invalidate(user_id)
             return UserRead.model_validate(updated)
         except Exception as e:
             raise e
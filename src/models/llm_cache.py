@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any
+
+import sqlalchemy as sa
+import sqlalchemy.orm as orm
+from sqlalchemy import func
+
+from src.app.database import Base
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = 'llm_cache_entries'
+
+    # sha256 от (namespace, версия шаблона, модель, нормализованные входные данные)
+    key: orm.Mapped[str] = orm.mapped_column(sa.String(64), primary_key=True)
+    namespace: orm.Mapped[str] = orm.mapped_column(sa.String(64), nullable=False)
+    model: orm.Mapped[str] = orm.mapped_column(sa.String(64), nullable=False)
+    response: orm.Mapped[dict[str, Any]] = orm.mapped_column(sa.JSON, nullable=False)
+    hit_count: orm.Mapped[int] = orm.mapped_column(sa.Integer, default=0, server_default="0", nullable=False)
+    created_at: orm.Mapped[datetime] = orm.mapped_column(
+        sa.DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    last_accessed_at: orm.Mapped[datetime] = orm.mapped_column(
+        sa.DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    expires_at: orm.Mapped[datetime | None] = orm.mapped_column(sa.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        sa.Index("ix_llm_cache_last_accessed", "last_accessed_at"),
+        sa.Index("ix_llm_cache_expires", "expires_at"),
+    )
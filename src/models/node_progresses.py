@@ -24,3 +24,8 @@ class UserNodeProgress(Base):
     correct_answer: orm.Mapped[int] = orm.mapped_column(sa.Integer, default=0)
 
     created_at: orm.Mapped[datetime] = orm.mapped_column(sa.DateTime, default=func.now())
+
+    __table_args__ = (
+        # попытки пользователя по узлу: submit, roadmap, история попыток
+        sa.Index("ix_user_node_progresses_user_node", "user_id", "node_id", "created_at"),
+    )
@@ -47,6 +47,13 @@ class PassageNode(Base):
         # --- Индексы для сортировки/поиска ---
         sa.Index("ix_nodes_passage", "passage_id"),
         sa.Index("ix_nodes_passage_user", "passage_id", "user_id"),
+        # обычные общие узлы пассажа (roadmap, prewarm)
+        sa.Index(
+            "ix_nodes_shared_regular",
+            "passage_id",
+            "id",
+            postgresql_where=sa.text("user_id IS NULL AND is_boss = false"),
+        ),
 
         # --- Ограничение boss ---
         # 1) Босс не может быть персональным
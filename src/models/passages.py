@@ -46,4 +46,8 @@ class Passage(Base):
         overlaps="nodes,passage",
     )
 
-    village = orm.relationship("Building", foreign_keys=[village_id])
\ No newline at end of file
+    village = orm.relationship("Building", foreign_keys=[village_id])
+
+    __table_args__ = (
+        sa.Index("ix_passages_village_order", "village_id", "order_index"),
+    )
\ No newline at end of file
@@ -1,7 +1,9 @@
+from datetime import datetime
 from typing import Any
 
 import sqlalchemy as sa
 import sqlalchemy.orm as orm
+from sqlalchemy import func
 
 from src.app.database import Base
 
@@ -16,3 +18,14 @@ class Question(Base):
     type: orm.Mapped[str] = orm.mapped_column(sa.String, nullable=False)
     content: orm.Mapped[dict[str, Any]] = orm.mapped_column(sa.JSON, nullable=False)
     order_index: orm.Mapped[int] = orm.mapped_column(sa.Integer, default=1)
+    # версия контента вопроса: по ней инвалидируется кэш скомпилированных ответов
+    updated_at: orm.Mapped[datetime] = orm.mapped_column(
+        sa.DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        sa.Index("ix_questions_node_order", "node_id", "order_index"),
+    )
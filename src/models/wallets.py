@@ -1,5 +1,8 @@
+from datetime import datetime
+
 import sqlalchemy as sa
 import sqlalchemy.orm as orm
+from sqlalchemy import func
 
 from src.app.constants import FundType
 from src.app.database import Base
@@ -12,3 +15,25 @@ class Wallet(Base):
     user_id: orm.Mapped[int] = orm.mapped_column(sa.ForeignKey('users.id', ondelete='CASCADE'))
     fund: orm.Mapped[int] = orm.mapped_column(sa.Integer)
     fund_type: orm.Mapped[FundType] = orm.mapped_column(sa.Enum(FundType), default=FundType.COIN)
+
+    __table_args__ = (
+        sa.Index("ix_wallets_user_fund_type", "user_id", "fund_type"),
+    )
+
+
+class WalletBalance(Base):
+    """Текущий баланс по (user_id, fund_type); обновляется в той же транзакции, что и запись в wallets."""
+    __tablename__ = 'wallet_balances'
+
+    user_id: orm.Mapped[int] = orm.mapped_column(
+        sa.ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    fund_type: orm.Mapped[FundType] = orm.mapped_column(sa.Enum(FundType), primary_key=True)
+    balance: orm.Mapped[int] = orm.mapped_column(sa.BigInteger, default=0, server_default="0", nullable=False)
+    updated_at: orm.Mapped[datetime] = orm.mapped_column(
+        sa.DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
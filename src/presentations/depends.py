@@ -1,17 +1,18 @@
-from typing import Optional
+import inspect
+from typing import Callable, Optional
 
-from fastapi import Depends, Cookie
+from fastapi import Depends, Cookie, Response
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 from starlette.requests import Request
 
-from src.app.cloudflare_r2 import CloudflareR2Service, R2Config
+from src.app.container import RequestContainer
 from src.app.errors import UnauthorizedException, ForbiddenException, TokenError
-from src.app.openai_service import OpenAIService
-from src.app.passage_node_generator import PassageNodeGenerator
-from src.app.uow import UoW
+from src.app.http_cache import NotModified, REVALIDATE_CACHE_CONTROL, etag_matches, version_etag
+from src.app.principals import UserPrincipal, DecodedTokenCache
+from src.app.uow import UoW, AFTER_COMMIT_KEY
 from src.app.utils import decode_token
-from src.controllers import AuthController, UserController, BuildingCollectorController
+from src.controllers import AuthController, UserController, BuildingCollectorController, DashboardController
 from src.controllers.building_progression import BuildingProgressionController
 from src.controllers.buildings import BuildingController
 from src.controllers.onboards import OnboardController
@@ -20,29 +21,84 @@ from src.controllers.passages import PassageController
 from src.controllers.questions import QuestionController
 from src.controllers.roadmaps import RoadmapController
 from src.controllers.subject_onboard import SubjectOnboardController
+from src.controllers.status_stream import StatusStreamController
 from src.controllers.submits import SubmitController
-from src.repositories import (
-    UserRepository,
-    BuildingRepository,
-    PassageRepository,
-    PassageNodeRepository,
-    UserCastleRepository,
-    UserNodeProgressRepository,
-    UserVillageRepository,
-    QuestionRepository,
-    WalletRepository,
-)
 
 http_bearer = HTTPBearer(auto_error=False)
 
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
-def get_sessionmaker(request: Request) -> async_sessionmaker[AsyncSession]:
-    return request.app.state.sessionmaker
+
+def _request_token(
+        credentials: Optional[HTTPAuthorizationCredentials],
+        access_token_cookie: Optional[str],
+) -> Optional[str]:
+    if credentials and credentials.credentials:
+        return credentials.credentials
+    return access_token_cookie or None
+
+
+def _decode_access_token(request: Request, token: str) -> dict:
+    token_cache: DecodedTokenCache = request.app.state.token_cache
+    decoded = token_cache.get(token)
+    if decoded is None:
+        decoded = decode_token(
+            token,
+            settings=request.app.state.settings,
+            expected_type="access",
+        )
+        token_cache.put(token, decoded)
+    return decoded
+
+
+def _token_user_id(
+        request: Request,
+        credentials: Optional[HTTPAuthorizationCredentials],
+        access_token_cookie: Optional[str],
+) -> Optional[int]:
+    """Caller id from the access token, before get_current_user has run; None if absent or invalid."""
+    token = _request_token(credentials, access_token_cookie)
+    if not token:
+        return None
+    try:
+        user_id = _decode_access_token(request, token).get("id")
+    except TokenError:
+        return None  # get_current_user rejects it
+    return int(user_id) if user_id else None
+
+
+async def use_replica(
+        request: Request,
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(http_bearer),
+        access_token_cookie: Optional[str] = Cookie(default=None, alias="access_token"),
+) -> None:
+    """
+    Route dependency for read-only endpoints: serve the request from the replica
+    when it is fresh and the caller has not written recently.
+    Must be listed in the route's `dependencies` so it runs before get_session.
+    """
+    request.state.db_sessionmaker = await request.app.state.db_router.read_sessionmaker(
+        _token_user_id(request, credentials, access_token_cookie)
+    )
+
+
+async def get_sessionmaker(request: Request) -> async_sessionmaker[AsyncSession]:
+    return getattr(request.state, "db_sessionmaker", None) or request.app.state.sessionmaker
 
 
 async def get_session(
+        request: Request,
         sessionmaker: async_sessionmaker[AsyncSession] = Depends(get_sessionmaker),
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(http_bearer),
+        access_token_cookie: Optional[str] = Cookie(default=None, alias="access_token"),
 ) -> AsyncSession:
+    user_id = None
+    if request.method not in SAFE_METHODS:
+        user_id = _token_user_id(request, credentials, access_token_cookie)
+    if user_id is not None:
+        # before the write starts: a read of this user racing the commit (another tab, the
+        # status stream) must already go to the primary, not see the replica's pre-write state
+        await request.app.state.db_router.mark_write(user_id)
     session = sessionmaker()
     try:
         yield session
@@ -51,28 +107,33 @@ async def get_session(
         await session.rollback()
         raise
     finally:
+        after_commit_hooks = session.info.pop(AFTER_COMMIT_KEY, [])
         await session.close()
+    if user_id is not None:
+        # and again from the commit, so a long request does not use up the window before it writes
+        await request.app.state.db_router.mark_write(user_id)
+    for hook in after_commit_hooks:
+        await hook()
 
 
-async def get_uow(session: AsyncSession = Depends(get_session)) -> UoW:
-    return UoW(session=session)
+async def get_container(
+        request: Request,
+        session: AsyncSession = Depends(get_session),
+) -> RequestContainer:
+    return RequestContainer(session, request.app.state)
 
 
-async def get_user_repository(session: AsyncSession = Depends(get_session)) -> UserRepository:
-    return UserRepository(session=session)
+async def get_uow(container: RequestContainer = Depends(get_container)) -> UoW:
+    return container.uow
 
 
 async def get_current_user(
         request: Request,
         credentials: Optional[HTTPAuthorizationCredentials] = Depends(http_bearer),
         access_token_cookie: Optional[str] = Cookie(default=None, alias="access_token"),
-        user_repo=Depends(get_user_repository),
-):
-    token: Optional[str] = None
-    if credentials and credentials.credentials:
-        token = credentials.credentials
-    elif access_token_cookie:
-        token = access_token_cookie
+        container: RequestContainer = Depends(get_container),
+) -> UserPrincipal:
+    token = _request_token(credentials, access_token_cookie)
 
     if not token:
         raise UnauthorizedException(
@@ -80,11 +141,7 @@ async def get_current_user(
         )
 
     try:
-        decoded: dict = decode_token(
-            token,
-            settings=request.app.state.settings,
-            expected_type="access",
-        )
+        decoded = _decode_access_token(request, token)
 
         user_id = decoded.get("id")
         if not user_id:
@@ -92,13 +149,20 @@ async def get_current_user(
                 "Invalid token payload"
             )
 
-        user = await user_repo.get_by_id(int(user_id))
+        user_cache = container.user_cache
+        principal = user_cache.get(int(user_id))
+        if principal is not None:
+            return principal
+
+        user = await container.user_repository.get_by_id(int(user_id))
         if not user:
             raise UnauthorizedException(
                 "User not found"
             )
 
-        return user
+        principal = UserPrincipal.from_user(user)
+        user_cache.put(principal)
+        return principal
 
     except TokenError:
         raise UnauthorizedException(
@@ -106,250 +170,202 @@ async def get_current_user(
         )
 
 
-# --- Repository factories ---
-async def get_building_repository(session: AsyncSession = Depends(get_session)) -> BuildingRepository:
-    return BuildingRepository(session=session)
-
-
-async def get_passage_repository(session: AsyncSession = Depends(get_session)) -> PassageRepository:
-    return PassageRepository(session=session)
-
-
-async def get_passage_node_repository(session: AsyncSession = Depends(get_session)) -> PassageNodeRepository:
-    return PassageNodeRepository(session=session)
-
-
-async def get_user_castle_repository(session: AsyncSession = Depends(get_session)) -> UserCastleRepository:
-    return UserCastleRepository(session=session)
-
-
-async def get_user_village_repository(session: AsyncSession = Depends(get_session)) -> UserVillageRepository:
-    return UserVillageRepository(session=session)
-
-
-async def get_question_repository(session: AsyncSession = Depends(get_session)) -> QuestionRepository:
-    return QuestionRepository(session=session)
-
+# --- Auth dependencies ---
+async def require_admin(
+        current_user=Depends(get_current_user),
+):
+    if not current_user.is_admin:
+        raise ForbiddenException("Admin access required")
+    return current_user
 
-async def get_user_node_progress_repository(
-        session: AsyncSession = Depends(get_session)
-) -> UserNodeProgressRepository:
-    return UserNodeProgressRepository(session=session)
 
+def http_cached(*version_keys: str | Callable[..., str], auth=require_admin):
+    """
+    Route dependency for content that changes only when one of `version_keys` is bumped.
+    A callable key is itself a dependency (e.g. taking the typed path parameter), so the
+    request is validated before it runs. Runs `auth` first, then answers a matching
+    If-None-Match with 304 before the controller is built; otherwise tags the response
+    with the ETag.
+    """
+    dependent_keys = [key for key in version_keys if callable(key)]
+
+    def resolve_keys(**resolved: str) -> dict[str, str]:
+        return resolved
+
+    resolve_keys.__signature__ = inspect.Signature([
+        inspect.Parameter(f"key_{i}", inspect.Parameter.KEYWORD_ONLY, default=Depends(key))
+        for i, key in enumerate(dependent_keys)
+    ])
+
+    async def guard(
+            request: Request,
+            response: Response,
+            _=Depends(auth),
+            resolved: dict[str, str] = Depends(resolve_keys),
+    ) -> None:
+        dependent = iter(resolved[f"key_{i}"] for i in range(len(dependent_keys)))
+        keys = [next(dependent) if callable(key) else key for key in version_keys]
+        resource = f"{request.url.path}?{request.url.query}"
+        etag = await version_etag(request.app.state.cache_backend, resource, keys)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise NotModified(etag, REVALIDATE_CACHE_CONTROL)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+
+    return guard
 
-# --- Service factories ---
 
-def get_openai_service(request: Request) -> OpenAIService:
-    return OpenAIService(api_key=request.app.state.settings.OPENAI_API_KEY)
+# --- Controller factories ---
+# Each factory resolves the request container only; repositories and services are built
+# when the controller first calls them.
+async def get_auth_controller(c: RequestContainer = Depends(get_container)) -> AuthController:
+    return AuthController(uow=c.uow, user_repository=c.deferred.user_repository)
 
 
-async def get_passage_node_generator(
-        node_repository: PassageNodeRepository = Depends(get_passage_node_repository),
-        openai_service: OpenAIService = Depends(get_openai_service),
-) -> PassageNodeGenerator:
-    return PassageNodeGenerator(
-        node_repository=node_repository,
-        openai_service=openai_service,
+async def get_user_controller(c: RequestContainer = Depends(get_container)) -> UserController:
+    return UserController(
+        uow=c.uow,
+        user_repo=c.deferred.user_repository,
+        castle_repository=c.deferred.user_castle_repository,
+        village_repository=c.deferred.user_village_repository,
+        user_cache=c.user_cache,
     )
 
 
-# --- Controller factories ---
-async def get_auth_controller(
-        uow: UoW = Depends(get_uow),
-        user_repo: UserRepository = Depends(get_user_repository),
-):
-    return AuthController(uow=uow, user_repository=user_repo)
+async def get_dashboard_controller(c: RequestContainer = Depends(get_container)) -> DashboardController:
+    return DashboardController(
+        user_repository=c.deferred.user_repository,
+        building_catalog=c.building_catalog,
+        tap_aggregator=c.tap_aggregator,
+    )
 
 
-async def get_user_controller(
-        uow: UoW = Depends(get_uow),
-        user_repo: UserRepository = Depends(get_user_repository),
-        user_castle_repository: UserCastleRepository = Depends(get_user_castle_repository),
-        user_village_repository: UserVillageRepository = Depends(get_user_village_repository)
-):
-    return UserController(
-        uow=uow,
-        user_repo=user_repo,
-        castle_repository=user_castle_repository,
-        village_repository=user_village_repository
+async def get_status_stream_controller(c: RequestContainer = Depends(get_container)) -> StatusStreamController:
+    return StatusStreamController(
+        db_router=c.db_router,
+        building_catalog=c.building_catalog,
+        status_hub=c.status_hub,
+        heartbeat_seconds=c.settings.STATUS_STREAM_HEARTBEAT_SECONDS,
+        tap_aggregator=c.tap_aggregator,
     )
 
 
-async def get_onboard_controller(
-        uow: UoW = Depends(get_uow),
-        user_repository: UserRepository = Depends(get_user_repository),
-        passage_repository: PassageRepository = Depends(get_passage_repository),
-        building_repository: BuildingRepository = Depends(get_building_repository),
-        user_castle_repository: UserCastleRepository = Depends(get_user_castle_repository),
-        user_village_repository: UserVillageRepository = Depends(get_user_village_repository),
-        node_generator: PassageNodeGenerator = Depends(get_passage_node_generator),
-) -> OnboardController:
+async def get_onboard_controller(c: RequestContainer = Depends(get_container)) -> OnboardController:
     return OnboardController(
-        uow=uow,
-        user_repository=user_repository,
-        passage_repository=passage_repository,
-        building_repository=building_repository,
-        user_castle_repository=user_castle_repository,
-        user_village_repository=user_village_repository,
-        node_generator=node_generator,
+        uow=c.uow,
+        user_repository=c.deferred.user_repository,
+        passage_repository=c.deferred.passage_repository,
+        building_catalog=c.building_catalog,
+        user_castle_repository=c.deferred.user_castle_repository,
+        user_village_repository=c.deferred.user_village_repository,
+        node_repository=c.deferred.passage_node_repository,
+        node_generator=c.deferred.passage_node_generator,
+        user_cache=c.user_cache,
+        roadmap_cache=c.roadmap_cache,
     )
 
 
 async def get_subject_onboard_controller(
-        uow: UoW = Depends(get_uow),
-        user_village_repository: UserVillageRepository = Depends(get_user_village_repository),
-        node_repository: PassageNodeRepository = Depends(get_passage_node_repository),
-        node_generator: PassageNodeGenerator = Depends(get_passage_node_generator),
-        building_repository: BuildingRepository = Depends(get_building_repository),
+        c: RequestContainer = Depends(get_container),
 ) -> SubjectOnboardController:
     return SubjectOnboardController(
-        uow=uow,
-        user_village_repository=user_village_repository,
-        node_repository=node_repository,
-        node_generator=node_generator,
-        building_repository=building_repository
+        uow=c.uow,
+        user_village_repository=c.deferred.user_village_repository,
+        node_repository=c.deferred.passage_node_repository,
+        node_generator=c.deferred.passage_node_generator,
+        building_catalog=c.building_catalog,
+        roadmap_cache=c.roadmap_cache,
     )
 
 
-async def get_roadmap_controller(
-        uow: UoW = Depends(get_uow),
-        passage_repository: PassageRepository = Depends(get_passage_repository),
-        node_repository: PassageNodeRepository = Depends(get_passage_node_repository),
-        village_repository: UserVillageRepository = Depends(get_user_village_repository),
-        question_repository: QuestionRepository = Depends(get_question_repository),
-        progress_repository: UserNodeProgressRepository = Depends(get_user_node_progress_repository),
-        openai_service: OpenAIService = Depends(get_openai_service),
-) -> RoadmapController:
+async def get_roadmap_controller(c: RequestContainer = Depends(get_container)) -> RoadmapController:
     return RoadmapController(
-        uow=uow,
-        passage_repository=passage_repository,
-        node_repository=node_repository,
-        village_repository=village_repository,
-        question_repository=question_repository,
-        progress_repository=progress_repository,
-        openai_service=openai_service,
-    )
-
-
-# --- Auth dependencies ---
-async def require_admin(
-        current_user=Depends(get_current_user),
-):
-    if not current_user.is_admin:
-        raise ForbiddenException("Admin access required")
-    return current_user
-
-
-# --- Additional repository factories ---
-async def get_wallet_repository(session: AsyncSession = Depends(get_session)) -> WalletRepository:
-    return WalletRepository(session=session)
-
-
-# --- Service factories ---
-def get_cloudflare_r2_service(request: Request) -> CloudflareR2Service:
-    config = R2Config(
-        account_id=request.app.state.settings.CLOUDFLARE_ACCOUNT_ID,
-        access_key_id=request.app.state.settings.CLOUDFLARE_ACCESS_KEY_ID,
-        secret_access_key=request.app.state.settings.CLOUDFLARE_SECRET_KEY_ID,
-        bucket_name=request.app.state.settings.CLOUDFLARE_BUCKET_NAME,
+        uow=c.uow,
+        passage_repository=c.deferred.passage_repository,
+        node_repository=c.deferred.passage_node_repository,
+        village_repository=c.deferred.user_village_repository,
+        question_repository=c.deferred.question_repository,
+        progress_repository=c.deferred.user_node_progress_repository,
+        question_generation_queue=c.question_generation_queue,
+        roadmap_cache=c.roadmap_cache,
     )
-    return CloudflareR2Service(cfg=config)
 
 
 async def get_building_progression_controller(
-        uow: UoW = Depends(get_uow),
-        user_castle_repository: UserCastleRepository = Depends(get_user_castle_repository),
-        user_village_repository: UserVillageRepository = Depends(get_user_village_repository),
-        wallet_repository: WalletRepository = Depends(get_wallet_repository),
-        building_repository: BuildingRepository = Depends(get_building_repository),
+        c: RequestContainer = Depends(get_container),
 ) -> BuildingProgressionController:
     return BuildingProgressionController(
-        uow=uow,
-        user_castle_repository=user_castle_repository,
-        user_village_repository=user_village_repository,
-        wallet_repository=wallet_repository,
-        building_repository=building_repository,
+        uow=c.uow,
+        user_castle_repository=c.deferred.user_castle_repository,
+        user_village_repository=c.deferred.user_village_repository,
+        wallet_repository=c.deferred.wallet_repository,
+        building_catalog=c.building_catalog,
+        status_hub=c.status_hub,
     )
 
 
 # --- Content controller factories (public read access) ---
-async def get_building_controller(
-        uow: UoW = Depends(get_uow),
-        building_repository: BuildingRepository = Depends(get_building_repository),
-        cloudflare_r2: CloudflareR2Service = Depends(get_cloudflare_r2_service),
-        passage_repository: PassageRepository = Depends(get_passage_repository),
-        user_village_repository: UserVillageRepository = Depends(get_user_village_repository),
-        user_castle_repository: UserCastleRepository = Depends(get_user_castle_repository),
-) -> BuildingController:
+async def get_building_controller(c: RequestContainer = Depends(get_container)) -> BuildingController:
     return BuildingController(
-        uow=uow,
-        building_repository=building_repository,
-        cloudflare_r2=cloudflare_r2,
-        passage_repository=passage_repository,
-        user_village_repository=user_village_repository,
-        user_castle_repository=user_castle_repository,
+        uow=c.uow,
+        building_repository=c.deferred.building_repository,
+        cloudflare_r2=c.cloudflare_r2,
+        passage_repository=c.deferred.passage_repository,
+        user_village_repository=c.deferred.user_village_repository,
+        user_castle_repository=c.deferred.user_castle_repository,
+        building_catalog=c.building_catalog,
+        svg_assets=c.svg_assets,
+        svg_max_bytes=c.settings.BUILDING_SVG_MAX_BYTES,
+        status_hub=c.status_hub,
+        sessionmaker=c.sessionmaker,
     )
 
 
-async def get_passage_controller(
-        uow: UoW = Depends(get_uow),
-        passage_repository: PassageRepository = Depends(get_passage_repository),
-        building_repository: BuildingRepository = Depends(get_building_repository),
-) -> PassageController:
+async def get_passage_controller(c: RequestContainer = Depends(get_container)) -> PassageController:
     return PassageController(
-        uow=uow,
-        passage_repository=passage_repository,
-        building_repository=building_repository,
+        uow=c.uow,
+        passage_repository=c.deferred.passage_repository,
+        building_repository=c.deferred.building_repository,
+        roadmap_cache=c.roadmap_cache,
     )
 
 
-async def get_passage_node_controller(
-        uow: UoW = Depends(get_uow),
-        node_repository: PassageNodeRepository = Depends(get_passage_node_repository),
-        passage_repository: PassageRepository = Depends(get_passage_repository),
-) -> PassageNodeController:
+async def get_passage_node_controller(c: RequestContainer = Depends(get_container)) -> PassageNodeController:
     return PassageNodeController(
-        uow=uow,
-        node_repository=node_repository,
-        passage_repository=passage_repository,
+        uow=c.uow,
+        node_repository=c.deferred.passage_node_repository,
+        passage_repository=c.deferred.passage_repository,
+        roadmap_cache=c.roadmap_cache,
     )
 
 
 async def get_building_collector_controller(
-        uow: UoW = Depends(get_uow),
-        user_castle_repository: UserCastleRepository = Depends(get_user_castle_repository),
-        wallet_repository: WalletRepository = Depends(get_wallet_repository),
-        user_village_repository: UserVillageRepository = Depends(get_user_village_repository),
+        c: RequestContainer = Depends(get_container),
 ) -> BuildingCollectorController:
     return BuildingCollectorController(
-        uow=uow,
-        user_castle_repository=user_castle_repository,
-        wallet_repository=wallet_repository,
-        user_village_repository=user_village_repository,
+        uow=c.uow,
+        user_castle_repository=c.deferred.user_castle_repository,
+        wallet_repository=c.deferred.wallet_repository,
+        user_village_repository=c.deferred.user_village_repository,
+        status_hub=c.status_hub,
+        tap_aggregator=c.tap_aggregator,
     )
 
 
-async def get_question_controller(
-        uow: UoW = Depends(get_uow),
-        question_repository: QuestionRepository = Depends(get_question_repository),
-        node_repository: PassageNodeRepository = Depends(get_passage_node_repository),
-) -> QuestionController:
+async def get_question_controller(c: RequestContainer = Depends(get_container)) -> QuestionController:
     return QuestionController(
-        uow=uow,
-        question_repository=question_repository,
-        node_repository=node_repository,
+        uow=c.uow,
+        question_repository=c.deferred.question_repository,
+        node_repository=c.deferred.passage_node_repository,
+        roadmap_cache=c.roadmap_cache,
     )
 
 
-async def get_submit_controller(
-        uow: UoW = Depends(get_uow),
-        question_repository: QuestionRepository = Depends(get_question_repository),
-        node_repository: PassageNodeRepository = Depends(get_passage_node_repository),
-        user_progress_repository: UserNodeProgressRepository = Depends(get_user_node_progress_repository),
-) -> SubmitController:
+async def get_submit_controller(c: RequestContainer = Depends(get_container)) -> SubmitController:
     return SubmitController(
-        uow=uow,
-        question_repository=question_repository,
-        node_repository=node_repository,
-        user_progress_repository=user_progress_repository,
-    )
\ No newline at end of file
+        uow=c.uow,
+        grading_engine=c.deferred.grading_engine,
+        node_repository=c.deferred.passage_node_repository,
+        user_progress_repository=c.deferred.user_node_progress_repository,
+        roadmap_cache=c.roadmap_cache,
+    )
@@ -0,0 +1,34 @@
+from typing import Any, Generic, TypeVar
+
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+T = TypeVar("T")
+
+
+class FastJSON(Generic[T]):
+    """
+    Opt-in response path for hot endpoints.
+    The TypeAdapter is compiled once per schema; rows (dicts, dataclasses or ORM
+    objects) are validated in a single pass and dumped straight to JSON bytes.
+    Returning the Response skips FastAPI's response_model re-validation and
+    jsonable_encoder; keep response_model on the route for the OpenAPI schema.
+    """
+
+    def __init__(self, type_: type[T]):
+        self._adapter = TypeAdapter(type_)
+
+    def validate(self, data: Any) -> T:
+        return self._adapter.validate_python(data, from_attributes=True)
+
+    def dump(self, data: Any, exclude_unset: bool = False) -> bytes:
+        return self._adapter.dump_json(self.validate(data), exclude_unset=exclude_unset)
+
+    def response(self, data: Any, sub_response: Response | None = None, status_code: int = 200) -> Response:
+        """`sub_response` is the endpoint's injected Response: its status and headers (ETag, cookies) are kept."""
+        if sub_response is not None and sub_response.status_code:
+            status_code = sub_response.status_code
+        response = Response(self.dump(data), status_code=status_code, media_type="application/json")
+        if sub_response is not None:
+            response.headers.raw.extend(sub_response.headers.raw)
+        return response
@@ -1,13 +1,16 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 
+from src.app.building_catalog import BuildingCatalog
+from src.app.cache import RoadmapCache
 from src.app.constants import SubjectEnum, BuildingType
 from src.controllers.buildings import BuildingController
 from src.presentations.depends import (
     get_current_user,
-    get_building_controller, require_admin
+    get_building_controller, require_admin, use_replica, http_cached,
 )
+from src.presentations.fast_json import FastJSON
 from src.presentations.schemas.buildings import (
     BuildingWithPassagesRead,
     BuildingCastleRead,
@@ -17,30 +20,68 @@ from src.presentations.schemas.buildings import (
     BuildingCastleCreate,
     BuildingVillageCreate,
     BuildingUpdate,
+    SvgUploadRequest,
+    SvgUploadTicket,
+    SvgUploadRead,
 )
 
 router = APIRouter(prefix="/buildings", tags=["Buildings"])
 
+_castles_json = FastJSON(List[BuildingCastleUserRead])
+_villages_json = FastJSON(List[BuildingVillageUserRead])
 
-@router.get("/castles", response_model=List[BuildingCastleUserRead])
+
+@router.get("/castles", response_model=List[BuildingCastleUserRead], dependencies=[Depends(use_replica)])
 async def list_castles(
+        response: Response,
         controller: BuildingController = Depends(get_building_controller),
         current_user=Depends(get_current_user),
 ):
-    return await controller.list_buildings(BuildingType.CASTLE, user_id=current_user.id)
+    return _castles_json.response(
+        await controller.list_buildings(BuildingType.CASTLE, user_id=current_user.id),
+        response,
+    )
 
 
-@router.get("/villages", response_model=List[BuildingVillageUserRead])
+@router.get("/villages", response_model=List[BuildingVillageUserRead], dependencies=[Depends(use_replica)])
 async def list_villages(
         subject: SubjectEnum,
+        response: Response,
         controller: BuildingController = Depends(get_building_controller),
         current_user=Depends(get_current_user),
 ):
-    return await controller.list_buildings(BuildingType.VILLAGE, user_id=current_user.id, subject=subject)
+    return _villages_json.response(
+        await controller.list_buildings(BuildingType.VILLAGE, user_id=current_user.id, subject=subject),
+        response,
+    )
 
 
 # --- Admin Routes (CRUD) ---
 
+@router.post("/svg/upload-url", response_model=SvgUploadTicket)
+async def create_svg_upload_url(
+        body: SvgUploadRequest,
+        controller: BuildingController = Depends(get_building_controller),
+        _=Depends(require_admin),
+):
+    return await controller.create_svg_upload(title=body.title)
+
+
+@router.put("/svg/upload", response_model=SvgUploadRead)
+async def upload_svg(
+        title: str,
+        request: Request,
+        controller: BuildingController = Depends(get_building_controller),
+        _=Depends(require_admin),
+):
+    content_length = request.headers.get("content-length")
+    return await controller.upload_svg_stream(
+        title=title,
+        chunks=request.stream(),
+        content_length=int(content_length) if content_length and content_length.isdigit() else None,
+    )
+
+
 @router.post("/castles", response_model=BuildingCastleRead)
 async def create_castle(
         body: BuildingCastleCreate,
@@ -96,7 +137,13 @@ async def delete_building(
     await controller.delete_building(building_id=building_id)
 
 
-@router.get("/village/{village_id}", response_model=BuildingWithPassagesRead)
+@router.get(
+    "/village/{village_id}",
+    response_model=BuildingWithPassagesRead,
+    dependencies=[Depends(http_cached(
+        BuildingCatalog.VERSION_KEY, RoadmapCache.CONTENT_VERSION_KEY, auth=get_current_user,
+    ))],
+)
 async def get_village_building(
         village_id: int,
         controller: BuildingController = Depends(get_building_controller),
@@ -107,7 +154,11 @@ async def get_village_building(
     )
 
 
-@router.get("/admin/castles", response_model=List[BuildingCastleRead])
+@router.get(
+    "/admin/castles",
+    response_model=List[BuildingCastleRead],
+    dependencies=[Depends(http_cached(BuildingCatalog.VERSION_KEY))],
+)
 async def admin_list_castles(
         controller: BuildingController = Depends(get_building_controller),
         _=Depends(require_admin),
@@ -115,7 +166,11 @@ async def admin_list_castles(
     return await controller.admin_list_buildings(BuildingType.CASTLE)
 
 
-@router.get("/admin/villages", response_model=List[BuildingVillageRead])
+@router.get(
+    "/admin/villages",
+    response_model=List[BuildingVillageRead],
+    dependencies=[Depends(http_cached(BuildingCatalog.VERSION_KEY))],
+)
 async def admin_list_villages(
         subject: SubjectEnum,
         controller: BuildingController = Depends(get_building_controller),
@@ -1,11 +1,12 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
 from src.controllers import BuildingCollectorController
 from src.presentations.depends import (
-    get_current_user, get_building_collector_controller,
+    get_current_user, get_building_collector_controller, use_replica,
 )
+from src.presentations.fast_json import FastJSON
 from src.presentations.schemas.collectors import (
     CastleStatus,
     CollectResult,
@@ -16,9 +17,11 @@ from src.presentations.schemas.collectors import (
 
 router = APIRouter(prefix="/collectors", tags=["Collectors"])
 
+_villages_json = FastJSON(List[VillageStatus])
+
 
 # --- Castle ---
-@router.get("/castle/status", response_model=CastleStatus)
+@router.get("/castle/status", response_model=CastleStatus, dependencies=[Depends(use_replica)])
 async def get_castle_status(
         controller: BuildingCollectorController = Depends(get_building_collector_controller),
         current_user=Depends(get_current_user),
@@ -44,15 +47,16 @@ async def tap_castle(
 
 
 # --- Villages ---
-@router.get("/villages", response_model=List[VillageStatus])
+@router.get("/villages", response_model=List[VillageStatus], dependencies=[Depends(use_replica)])
 async def get_all_villages_status(
+        response: Response,
         controller: BuildingCollectorController = Depends(get_building_collector_controller),
         current_user=Depends(get_current_user),
 ):
-    return await controller.get_all_villages_statuses(user_id=current_user.id)
+    return _villages_json.response(await controller.get_all_villages_statuses(user_id=current_user.id), response)
 
 
-@router.get("/villages/{village_id}/status", response_model=VillageStatus)
+@router.get("/villages/{village_id}/status", response_model=VillageStatus, dependencies=[Depends(use_replica)])
 async def get_village_status(
         village_id: int,
         controller: BuildingCollectorController = Depends(get_building_collector_controller),
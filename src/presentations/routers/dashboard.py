@@ -0,0 +1,83 @@
+from typing import Any, AsyncIterator
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import StreamingResponse
+
+from src.controllers import DashboardController
+from src.controllers.status_stream import StatusStreamController, SNAPSHOT, KEEPALIVE
+from src.presentations.depends import (
+    get_current_user,
+    get_dashboard_controller,
+    get_session,
+    get_status_stream_controller,
+    use_replica,
+)
+from src.presentations.fast_json import FastJSON
+from src.presentations.schemas.dashboard import DashboardRead, DashboardSnapshot, DashboardDelta
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+_dashboard_json = FastJSON(DashboardRead)
+_snapshot_json = FastJSON(DashboardSnapshot)
+_delta_json = FastJSON(DashboardDelta)
+
+
+@router.get("", response_model=DashboardRead, dependencies=[Depends(use_replica)])
+async def get_dashboard(
+        controller: DashboardController = Depends(get_dashboard_controller),
+        current_user=Depends(get_current_user),
+):
+    """
+    Launch screen in one call: profile, wallet balances, castle with taps and villages,
+    each with its accrued treasure and upgrade info. Replaces /users/profile,
+    /users/buildings, /collectors/castle/status, /collectors/villages and the
+    per-building upgrade-info calls.
+    """
+    return _dashboard_json.response(await controller.get_dashboard(current_user.id))
+
+
+def _sse(event: str, data: dict[str, Any] | None) -> bytes:
+    if event == KEEPALIVE:
+        return b": keepalive\n\n"
+    if event == SNAPSHOT:
+        payload = _snapshot_json.dump(data)
+    else:
+        payload = _delta_json.dump(data, exclude_unset=True)
+    return b"event: " + event.encode() + b"\ndata: " + payload + b"\n\n"
+
+
+async def _event_stream(first: tuple[str, Any], events: AsyncIterator[tuple[str, Any]]) -> AsyncIterator[bytes]:
+    try:
+        yield _sse(*first)
+        async for event in events:
+            yield _sse(*event)
+    finally:
+        await events.aclose()
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "snapshot, then delta events"}},
+)
+async def stream_dashboard(
+        controller: StatusStreamController = Depends(get_status_stream_controller),
+        current_user=Depends(get_current_user),
+        session: AsyncSession = Depends(get_session),
+):
+    """
+    Server-Sent Events instead of polling the status endpoints. The first `snapshot`
+    event is the /dashboard payload plus `at`; animate the treasure counters from it.
+    A `delta` event carries only the sections changed by a collect, tap, upgrade or
+    building edit; comment lines keep idle connections open.
+    """
+    events = controller.stream(current_user.id)
+    first = await anext(events)  # missing user -> 404 before any bytes are sent
+    # the request session lives as long as the response; give its connection back now
+    await session.close()
+    return StreamingResponse(
+        _event_stream(first, events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
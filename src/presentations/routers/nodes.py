@@ -2,9 +2,11 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends
 
+from src.app.cache import RoadmapCache
+
 from src.controllers.passage_nodes import PassageNodeController
 from src.presentations.depends import (
-    get_passage_node_controller, require_admin,
+    get_passage_node_controller, require_admin, http_cached,
 )
 from src.presentations.schemas.nodes import (
     BossNodeCreate,
@@ -44,7 +46,12 @@ async def delete_node(
     await controller.delete_node(node_id)
 
 
-@router.get("/passage/{passage_id}", response_model=Optional[BossNodeRead], description="Get passage boss node")
+@router.get(
+    "/passage/{passage_id}",
+    response_model=Optional[BossNodeRead],
+    description="Get passage boss node",
+    dependencies=[Depends(http_cached(RoadmapCache.CONTENT_VERSION_KEY))],
+)
 async def get_boss(
         passage_id: int,
         controller: PassageNodeController = Depends(get_passage_node_controller),
@@ -2,10 +2,14 @@ from typing import List
 
 from fastapi import APIRouter, Depends
 
+from src.app.cache import RoadmapCache
+from src.app.question_generator import generated_questions_version_key
+
 from src.controllers.questions import QuestionController
 from src.presentations.depends import (
     get_question_controller,
     require_admin,
+    http_cached,
 )
 from src.presentations.schemas.questions import (
     QuestionCreate,
@@ -15,7 +19,15 @@ from src.presentations.schemas.questions import (
 router = APIRouter(prefix="/questions", tags=["Questions"])
 
 
-@router.get("/node/{node_id}", response_model=List[QuestionRead])
+def _node_questions_version(node_id: int) -> str:
+    return generated_questions_version_key(node_id)
+
+
+@router.get(
+    "/node/{node_id}",
+    response_model=List[QuestionRead],
+    dependencies=[Depends(http_cached(RoadmapCache.CONTENT_VERSION_KEY, _node_questions_version))],
+)
 async def get_questions_by_node(
         node_id: int,
         controller: QuestionController = Depends(get_question_controller),
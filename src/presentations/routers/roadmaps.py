@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response, status
 
+from src.app.constants import QUESTIONS_STATUS_PENDING
 from src.controllers.roadmaps import RoadmapController
-from src.presentations.depends import get_current_user, get_roadmap_controller
+from src.presentations.depends import get_current_user, get_roadmap_controller, use_replica
+from src.presentations.fast_json import FastJSON
 from src.presentations.schemas.nodes import NodeDetailedRead
 
 router = APIRouter(prefix="/roadmaps", tags=["Roadmaps"])
 
+_node_json = FastJSON(NodeDetailedRead)
 
-@router.get("/{subject}")
+
+@router.get("/{subject}", dependencies=[Depends(use_replica)])
 async def get_roadmap(
         subject: str,
         limit: int = Query(default=5, ge=1, le=20),
@@ -21,10 +25,19 @@ async def get_roadmap(
     )
 
 
-@router.get("/nodes/{node_id}", response_model=NodeDetailedRead)
+@router.get(
+    "/nodes/{node_id}",
+    dependencies=[Depends(use_replica)],
+    response_model=NodeDetailedRead,
+    description="Returns 202 with questions_status=pending while questions are being generated",
+)
 async def get_node(
         node_id: int,
+        response: Response,
         controller: RoadmapController = Depends(get_roadmap_controller),
         current_user=Depends(get_current_user),
 ):
-    return await controller.get_node(node_id=node_id)
+    node = await controller.get_node(node_id=node_id)
+    if node["questions_status"] == QUESTIONS_STATUS_PENDING:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return _node_json.response(node, response)
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Request
+
+from src.app.database import pool_metrics
+from src.presentations.depends import require_admin
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+@router.get("/db-pool", description="Connection pool gauges, checkout wait histogram and slow-query count")
+async def get_db_pool(
+        request: Request,
+        _=Depends(require_admin),
+):
+    replica_engine = request.app.state.replica_engine
+    return {
+        "primary": pool_metrics(request.app.state.engine),
+        "replica": pool_metrics(replica_engine) if replica_engine is not None else None,
+    }
@@ -4,6 +4,7 @@ from src.controllers.users import UserController
 from src.presentations.depends import (
     get_current_user,
     get_user_controller,
+    use_replica,
 )
 from src.presentations.schemas.users import (
     UserRead,
@@ -25,12 +26,13 @@ async def profile_update(
 
 @router.get("/profile", response_model=UserRead)
 async def profile_read(
+        user_controller: UserController = Depends(get_user_controller),
         current_user=Depends(get_current_user),
 ):
-    return UserRead.model_validate(current_user)
+    return await user_controller.get_profile(current_user.id)
 
 
-@router.get("/buildings", response_model=UserCastleWithVillages)
+@router.get("/buildings", response_model=UserCastleWithVillages, dependencies=[Depends(use_replica)])
 async def get_user_buildings(
         user_controller: UserController = Depends(get_user_controller),
         current_user=Depends(get_current_user),
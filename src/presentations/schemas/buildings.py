@@ -10,6 +10,8 @@ class BuildingCastleCreate(BaseModel):
     title: str
     type: BuildingType
     svg: Optional[bytes] = None
+    # key returned by /buildings/svg/upload-url or /buildings/svg/upload, instead of inline svg
+    svg_key: Optional[str] = None
     treasure_capacity: int = 300
     speed_production_treasure: int = 1
     cost: Optional[int] = None
@@ -25,12 +27,33 @@ class BuildingUpdate(BaseModel):
     title: Optional[str] = None
     type: Optional[BuildingType] = None
     svg: Optional[bytes] = None
+    svg_key: Optional[str] = None
     treasure_capacity: Optional[int] = None
     speed_production_treasure: Optional[int] = None
     cost: Optional[int] = None
     subject: Optional[SubjectEnum] = None
 
 
+class SvgUploadRequest(BaseModel):
+    title: str
+
+
+class SvgUploadTicket(BaseModel):
+    key: str
+    upload_url: str
+    public_url: str
+    expires_in: int
+    max_bytes: int
+    # must be sent with the PUT, the signature covers them
+    headers: dict[str, str]
+
+
+class SvgUploadRead(BaseModel):
+    key: str
+    public_url: str
+    size: int
+
+
 class BuildingCastleRead(BaseModel):
     id: Optional[int] = None
     title: Optional[str] = None
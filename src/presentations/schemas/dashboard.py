@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional, List
+
+from pydantic import BaseModel
+
+from src.app.constants import FundType
+from src.presentations.schemas.collectors import CastleStatus, VillageStatus, UpgradeInfo
+from src.presentations.schemas.users import UserRead
+
+
+class DashboardCastle(CastleStatus):
+    svg: Optional[str] = None
+    upgrade: UpgradeInfo
+
+
+class DashboardVillage(VillageStatus):
+    svg: Optional[str] = None
+    upgrade: UpgradeInfo
+
+
+class DashboardRead(BaseModel):
+    profile: UserRead
+    balances: dict[FundType, int]
+    castle: Optional[DashboardCastle] = None  # None until onboarding has granted one
+    villages: List[DashboardVillage]
+
+
+# --- status stream ---
+class DashboardSnapshot(DashboardRead):
+    at: datetime  # treasure amounts are as of this instant; extrapolate with production_rate
+
+
+class DashboardDelta(BaseModel):
+    """Only the sections that changed since the previous event are present; villages only the changed ones."""
+    at: datetime
+    profile: Optional[UserRead] = None
+    balances: Optional[dict[FundType, int]] = None
+    castle: Optional[DashboardCastle] = None
+    villages: Optional[List[DashboardVillage]] = None
@@ -1,7 +1,8 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 
 from pydantic import BaseModel, Field
 
+from src.app.constants import QUESTIONS_STATUS_READY
 from src.presentations.schemas.questions import QuestionRead
 
 
@@ -47,6 +48,7 @@ class NodeDetailedRead(BaseModel):
     reward_coins: Optional[int]
     reward_xp: Optional[int]
     questions: List[QuestionRead] = []
+    questions_status: Literal["ready", "pending"] = QUESTIONS_STATUS_READY
 
     class Config:
         from_attributes = True
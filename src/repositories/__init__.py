@@ -1,6 +1,7 @@
 from src.repositories.base import BaseRepository
 from src.repositories.buildings import BuildingRepository
 from src.repositories.experiences import ExperienceRepository
+from src.repositories.llm_cache import LLMCacheRepository
 from src.repositories.nodes import PassageNodeRepository
 from src.repositories.passages import PassageRepository
 from src.repositories.questions import QuestionRepository
@@ -14,6 +15,7 @@ __all__ = [
     "BaseRepository",
     "BuildingRepository",
     "ExperienceRepository",
+    "LLMCacheRepository",
     "PassageNodeRepository",
     "PassageRepository",
     "QuestionRepository",
@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from src.models.llm_cache import LLMCacheEntry
+from src.repositories.base import BaseRepository
+
+
+class LLMCacheRepository(BaseRepository[LLMCacheEntry]):
+    model = LLMCacheEntry
+
+    async def touch_many(self, keys: list[str], now: datetime) -> dict[str, dict[str, Any]]:
+        """Responses of the live entries among `keys`, recording the hits in the same statement."""
+        if not keys:
+            return {}
+        stmt = (
+            update(LLMCacheEntry)
+            .where(
+                LLMCacheEntry.key.in_(keys),
+                or_(LLMCacheEntry.expires_at.is_(None), LLMCacheEntry.expires_at > now),
+            )
+            .values(
+                last_accessed_at=now,
+                hit_count=LLMCacheEntry.hit_count + 1,
+            )
+            .returning(LLMCacheEntry.key, LLMCacheEntry.response)
+        )
+        result = await self._session.execute(stmt)
+        return {key: response for key, response in result.all()}
+
+    async def put(
+            self,
+            key: str,
+            namespace: str,
+            model: str,
+            response: dict[str, Any],
+            now: datetime,
+            expires_at: datetime | None,
+    ) -> None:
+        stmt = insert(LLMCacheEntry).values(
+            key=key,
+            namespace=namespace,
+            model=model,
+            response=response,
+            created_at=now,
+            last_accessed_at=now,
+            expires_at=expires_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LLMCacheEntry.key],
+            set_={
+                "response": stmt.excluded.response,
+                "last_accessed_at": stmt.excluded.last_accessed_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+        )
+        await self._session.execute(stmt)
+
+    async def delete_expired(self, now: datetime) -> int:
+        result = await self._session.execute(
+            delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= now)
+        )
+        return result.rowcount
+
+    async def delete_least_recently_used(self, keep: int) -> int:
+        survivors = (
+            select(LLMCacheEntry.key)
+            .order_by(LLMCacheEntry.last_accessed_at.desc())
+            .limit(keep)
+        )
+        result = await self._session.execute(
+            delete(LLMCacheEntry).where(LLMCacheEntry.key.not_in(survivors))
+        )
+        return result.rowcount
@@ -1,6 +1,75 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select, func, exists, and_
+
+from src.models.buildings import Building
+from src.models.node_progresses import UserNodeProgress
 from src.models.nodes import PassageNode
+from src.models.passages import Passage
+from src.models.questions import Question
+from src.models.user_villages import UserVillage
 from src.repositories.base import BaseRepository
 
 
 class PassageNodeRepository(BaseRepository[PassageNode]):
     model = PassageNode
+
+    async def get_generation_context(self, node_id: int) -> dict[str, Any] | None:
+        stmt = (
+            select(
+                PassageNode.id,
+                PassageNode.title,
+                PassageNode.content,
+                Passage.title.label("passage_title"),
+                Building.subject,
+            )
+            .join(Passage, Passage.id == PassageNode.passage_id)
+            .outerjoin(Building, Building.id == Passage.village_id)
+            .where(PassageNode.id == node_id)
+        )
+        result = await self._session.execute(stmt)
+        row = result.mappings().one_or_none()
+        return dict(row) if row else None
+
+    async def get_upcoming_nodes_without_questions(
+            self,
+            active_since: datetime,
+            per_user_limit: int,
+    ) -> list[int]:
+        active_users = (
+            select(UserNodeProgress.user_id)
+            .where(UserNodeProgress.created_at >= active_since)
+            .distinct()
+            .subquery()
+        )
+        ranked = (
+            select(
+                PassageNode.id.label("node_id"),
+                func.row_number().over(
+                    partition_by=UserVillage.user_id,
+                    order_by=(Passage.order_index, PassageNode.is_boss, PassageNode.id),
+                ).label("position"),
+            )
+            .select_from(UserVillage)
+            .join(active_users, active_users.c.user_id == UserVillage.user_id)
+            .join(Passage, Passage.village_id == UserVillage.village_id)
+            .join(
+                PassageNode,
+                and_(
+                    PassageNode.passage_id == Passage.id,
+                    PassageNode.user_id.is_(None),
+                )
+            )
+            .where(
+                ~exists().where(
+                    UserNodeProgress.user_id == UserVillage.user_id,
+                    UserNodeProgress.node_id == PassageNode.id,
+                ),
+                ~exists().where(Question.node_id == PassageNode.id),
+            )
+            .subquery()
+        )
+        stmt = select(ranked.c.node_id).where(ranked.c.position <= per_user_limit).distinct()
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
@@ -1,18 +1,68 @@
 from typing import Sequence
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, and_, bindparam
 from sqlalchemy.orm import selectinload
 
 from src.app.constants import BuildingType, SubjectEnum
+from src.app.roadmap import RoadmapNode, RoadmapPassage
 from src.models.buildings import Building
-from src.models.node_progresses import UserNodeProgress
 from src.models.nodes import PassageNode
 from src.models.passages import Passage
 from src.models.user_villages import UserVillage
 from src.repositories.base import BaseRepository
+from src.repositories.statements import hot_statement
 from src.repositories.utils_repositories import UtilsRepository
 
 
+@hot_statement
+def _village_passages():
+    return (
+        select(Passage)
+        .where(Passage.village_id == bindparam("village_id"))
+        .order_by(Passage.order_index.asc())
+    )
+
+
+@hot_statement
+def _village_roadmap():
+    return (
+        select(
+            Passage.id,
+            Passage.title,
+            Passage.order_index,
+            PassageNode.id.label("node_id"),
+            PassageNode.title.label("node_title"),
+            PassageNode.content.label("node_content"),
+            PassageNode.is_boss,
+            PassageNode.config,
+            PassageNode.pass_score,
+            PassageNode.reward_coins,
+        )
+        .outerjoin(
+            PassageNode,
+            and_(
+                PassageNode.passage_id == Passage.id,
+                PassageNode.user_id.is_(None),
+            )
+        )
+        .where(Passage.village_id == bindparam("village_id"))
+        .order_by(Passage.order_index.asc(), Passage.id.asc(), PassageNode.id.asc())
+    )
+
+
+@hot_statement
+def _current_village_id():
+    return (
+        select(UserVillage.village_id)
+        .join(Building, Building.id == UserVillage.village_id)
+        .where(
+            UserVillage.user_id == bindparam("user_id"),
+            Building.type == BuildingType.VILLAGE,
+            Building.subject == bindparam("subject"),
+        )
+    )
+
+
 class PassageRepository(BaseRepository[Passage], UtilsRepository):
     model = Passage
 
@@ -26,98 +76,36 @@ class PassageRepository(BaseRepository[Passage], UtilsRepository):
             self,
             village_id: int,
     ) -> Sequence[Passage]:
-        stmt = (
-            select(Passage)
-            .where(
-                Passage.village_id == village_id
+        result = await self._session.execute(_village_passages, {"village_id": village_id})
+        return result.scalars().all()
+
+    async def get_village_roadmap(self, village_id: int) -> list[RoadmapPassage]:
+        result = await self._session.execute(_village_roadmap, {"village_id": village_id})
+
+        passages: dict[int, RoadmapPassage] = {}
+        for row in result.mappings():
+            passage = passages.get(row["id"])
+            if passage is None:
+                passage = passages[row["id"]] = RoadmapPassage(
+                    id=row["id"],
+                    title=row["title"],
+                    order_index=row["order_index"],
+                )
+            if row["node_id"] is None:
+                continue
+            node = RoadmapNode(
+                id=row["node_id"],
+                title=row["node_title"],
+                content=row["node_content"],
+                config=row["config"],
+                pass_score=row["pass_score"],
+                reward_coins=row["reward_coins"],
             )
-            .order_by(Passage.order_index.asc())
-        )
-        return (await self._session.execute(stmt)).scalars().all()
-
-    async def get_roadmap(self, user_id, village_id):
-        stmt = select(Passage).where(Passage.village_id == village_id).order_by(Passage.order_index)
-        passages = (await self._session.execute(stmt)).scalars().all()
-        progress_stmt = select(UserNodeProgress).where(UserNodeProgress.user_id == user_id)
-        user_progress_list = (await self._session.execute(progress_stmt)).scalars().all()
-        completed_node_ids = {p.node_id for p in user_progress_list if p.correct_answer > 0 or p.accuracy >= 0}
-        response_passages = []
-        is_passage_unlocked = True
-        for passage in passages:
-            passage_status = "locked"
-            if is_passage_unlocked:
-                passage_status = "available"
-            passage_data = {
-                "id": passage.id,
-                "title": passage.title,
-                "order_index": passage.order_index,
-                "status": passage_status,
-                "nodes": [],
-                "boss": None
-            }
-
-            sorted_nodes = sorted(passage.nodes, key=lambda x: x.id)
-            is_node_unlocked = True if passage_status != "locked" else False
-            completed_nodes_count = 0
-
-            for node in sorted_nodes:
-                is_completed = node.id in completed_node_ids
-
-                node_dto = {
-                    "id": node.id,
-                    "title": node.title,
-                    "content": node.content,
-                    "is_completed": is_completed,
-                    "is_locked": not is_node_unlocked,
-                    "is_current": False
-                }
-                if not node_dto["is_locked"] and not is_completed:
-                    node_dto["is_current"] = True
-
-                passage_data["nodes"].append(node_dto)
-
-                if is_completed:
-                    completed_nodes_count += 1
-                else:
-                    is_node_unlocked = False
-
-            all_nodes_finished = (completed_nodes_count == len(passage_data["nodes"]))
-            is_boss_unlocked = (passage_status != "locked") and all_nodes_finished
-
-            boss_completed = False
-
-            if passage.boss:
-                boss_completed = passage.boss.id in completed_node_ids
-
-                boss_dto = {
-                    "id": passage.boss.id,
-                    "title": passage.boss.title,
-                    "content": passage.boss.content,
-                    "config": passage.boss.config,
-                    "is_completed": boss_completed,
-                    "is_locked": not is_boss_unlocked,
-                    "pass_score": passage.boss.pass_score,
-                    "reward_coins": passage.boss.reward_coins,
-                }
-                passage_data["boss"] = boss_dto
-            if passage.boss:
-                if boss_completed:
-                    passage_data["status"] = "completed"
-                    is_passage_unlocked = True
-                else:
-                    is_passage_unlocked = False
+            if row["is_boss"]:
+                passage.boss = node
             else:
-                if all_nodes_finished:
-                    passage_data["status"] = "completed"
-                    is_passage_unlocked = True
-                else:
-                    is_passage_unlocked = False
-            if passage_data["status"] == "locked":
-                is_passage_unlocked = False
-
-            response_passages.append(passage_data)
-
-        return response_passages
+                passage.nodes.append(node)
+        return list(passages.values())
 
     async def get_next_passages(
             self,
@@ -125,13 +113,8 @@ class PassageRepository(BaseRepository[Passage], UtilsRepository):
             subject: SubjectEnum
     ):
         user_current_village_id = await self._session.scalar(
-            select(UserVillage.village_id)
-            .join(Building, Building.id == UserVillage.village_id)
-            .where(
-                UserVillage.user_id == user_id,
-                Building.type == BuildingType.VILLAGE,
-                Building.subject == subject,
-            )
+            _current_village_id,
+            {"user_id": user_id, "subject": subject},
         )
         if user_current_village_id is None:
             user_current_village_id = await self._session.scalar(
@@ -1,22 +1,44 @@
 from typing import Sequence
 
-from sqlalchemy import select, asc
+from sqlalchemy import select, asc, func, bindparam
 
 from src.models.questions import Question
 from src.repositories.base import BaseRepository
+from src.repositories.statements import hot_statement
 from src.repositories.utils_repositories import UtilsRepository
 
 
+@hot_statement
+def _node_questions():
+    return (
+        select(Question)
+        .where(Question.node_id == bindparam("node_id"))
+        .order_by(asc(Question.order_index))
+    )
+
+
+@hot_statement
+def _count_node_questions():
+    return select(func.count()).select_from(Question).where(Question.node_id == bindparam("node_id"))
+
+
 class QuestionRepository(BaseRepository[Question], UtilsRepository):
     model = Question
 
     async def get_by_node_id(self, node_id: int) -> Sequence[Question]:
-        stmt = select(Question).where(Question.node_id == node_id).order_by(asc(Question.order_index))
+        result = await self._session.execute(_node_questions, {"node_id": node_id})
+        return result.scalars().all()
+
+    async def get_by_node_and_ids(self, node_id: int, question_ids: list[int]) -> Sequence[Question]:
+        if not question_ids:
+            return []
+        stmt = select(Question).where(
+            Question.node_id == node_id,
+            Question.id.in_(question_ids),
+        )
         result = await self._session.execute(stmt)
         return result.scalars().all()
 
     async def count_by_node_id(self, node_id: int) -> int:
-        from sqlalchemy import func
-        stmt = select(func.count()).select_from(Question).where(Question.node_id == node_id)
-        result = await self._session.execute(stmt)
+        result = await self._session.execute(_count_node_questions, {"node_id": node_id})
         return result.scalar() or 0
@@ -0,0 +1,18 @@
+from typing import Callable, TypeVar
+
+from sqlalchemy.sql import Executable
+
+StatementType = TypeVar("StatementType", bound=Executable)
+
+# name -> builder of every statement declared with @hot_statement (used by scripts/bench_statements.py)
+HOT_STATEMENTS: dict[str, Callable[[], Executable]] = {}
+
+
+def hot_statement(builder: Callable[[], StatementType]) -> StatementType:
+    """
+    Build a repository statement once at import time and register it.
+    Per-call values must be `bindparam`s, passed as the params of `session.execute`,
+    so each call skips rebuilding the construct and hits the compiled cache directly.
+    """
+    HOT_STATEMENTS[f"{builder.__module__.rsplit('.', 1)[-1]}.{builder.__name__.strip('_')}"] = builder
+    return builder()
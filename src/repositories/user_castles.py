@@ -1,107 +1,202 @@
-from datetime import datetime, timezone, date
-from typing import Any
+from datetime import date
+from typing import Any, AsyncIterator
 
-from sqlalchemy import select, update
+from sqlalchemy import select, update, case, func, and_, or_, bindparam, Date, Integer
 from sqlalchemy.orm import aliased
 
-from src.app.constants import BuildingType
+from src.app.constants import BuildingType, TapRejection
 from src.models.buildings import Building
 from src.models.user_castles import UserCastle
 from src.repositories.base import BaseRepository
+from src.repositories.statements import hot_statement
+from src.repositories.utils_repositories import accrued_treasure
+
+
+@hot_statement
+def _user_castle():
+    Next = aliased(Building)
+
+    return (
+        select(
+            UserCastle.id.label("user_castle_id"),
+            UserCastle.user_id,
+            UserCastle.treasure_amount,
+            UserCastle.last_collect_date,
+            UserCastle.taps_used_today,
+            UserCastle.last_tap_reset_date,
+
+            Building.id.label("castle_id"),
+            Building.title.label("castle_title"),
+            Building.svg.label("castle_svg"),
+            Building.treasure_capacity,
+            Building.speed_production_treasure,
+            Building.cost,
+
+            Building.next_building_id.label("next_castle_id"),
+            Next.title.label("next_castle_title"),
+        )
+        .join(Building, Building.id == UserCastle.castle_id)
+        .outerjoin(Next, Next.id == Building.next_building_id)
+        .where(
+            UserCastle.user_id == bindparam("user_id"),
+            Building.type == BuildingType.CASTLE,
+        )
+        .limit(1)
+    )
+
+
+@hot_statement
+def _castle_id():
+    return select(UserCastle.castle_id).where(UserCastle.user_id == bindparam("user_id"))
+
+
+@hot_statement
+def _collect_accrued_treasure():
+    locked = (
+        select(
+            UserCastle.id,
+            accrued_treasure(
+                UserCastle.treasure_amount,
+                UserCastle.last_collect_date,
+                Building.treasure_capacity,
+                Building.speed_production_treasure,
+            ).label("amount"),
+        )
+        .join(Building, Building.id == UserCastle.castle_id)
+        # binds of an UPDATE must not share a name with a column of the updated table
+        .where(UserCastle.user_id == bindparam("uid"))
+        .with_for_update(of=UserCastle)
+        .cte("locked")
+    )
+    return (
+        update(UserCastle)
+        .where(UserCastle.id == locked.c.id)
+        .values(
+            treasure_amount=0,
+            last_collect_date=case(
+                (locked.c.amount > 0, func.now()),
+                else_=UserCastle.last_collect_date,
+            ),
+        )
+        .returning(locked.c.amount)
+    )
+
+
+@hot_statement
+def _tap_reset_date():
+    return select(UserCastle.last_tap_reset_date).where(UserCastle.user_id == bindparam("user_id"))
+
+
+@hot_statement
+def _record_taps():
+    today = bindparam("today", type_=Date)
+    max_taps = bindparam("max_taps", type_=Integer)
+    locked = (
+        select(
+            UserCastle.id,
+            case(
+                (UserCastle.last_tap_reset_date == today, UserCastle.taps_used_today),
+                else_=0,
+            ).label("used"),
+        )
+        .where(
+            UserCastle.user_id == bindparam("uid"),
+            # taps flushed late (write-behind) never roll a counter that has moved to a later day back
+            or_(UserCastle.last_tap_reset_date.is_(None), UserCastle.last_tap_reset_date <= today),
+        )
+        .with_for_update()
+        .cte("locked")
+    )
+    return (
+        update(UserCastle)
+        .where(UserCastle.id == locked.c.id, locked.c.used < max_taps)
+        .values(
+            taps_used_today=locked.c.used + func.least(
+                bindparam("requested", type_=Integer),
+                max_taps - locked.c.used,
+            ),
+            last_tap_reset_date=today,
+        )
+        .returning(UserCastle.taps_used_today, locked.c.used)
+    )
 
 
 class UserCastleRepository(BaseRepository[UserCastle]):
     model = UserCastle
 
     async def get_user_castle(self, user_id: int) -> dict[str, Any] | None:
+        result = await self._session.execute(_user_castle, {"user_id": user_id})
+        row = result.mappings().one_or_none()
+        return dict(row) if row else None
+
+    async def get_castle_id(self, user_id: int) -> int | None:
+        return await self._session.scalar(_castle_id, {"user_id": user_id})
+
+    async def collect_accrued_treasure(self, user_id: int) -> int | None:
+        """
+        Lock the user's castle, move the accrued treasure out and reset the timer in one statement.
+        Returns the collected amount (0 if nothing accrued) or None if the user has no castle.
+        """
+        return await self._session.scalar(_collect_accrued_treasure, {"uid": user_id})
+
+    async def record_taps(
+            self,
+            user_id: int,
+            requested: int,
+            max_taps: int,
+            today: date,
+    ) -> tuple[int, int] | TapRejection:
+        """
+        Apply up to `requested` taps under a row lock, resetting the daily counter on a new day.
+        Returns (taps applied, taps used today), or why nothing was applied.
+        """
+        result = await self._session.execute(
+            _record_taps,
+            {"uid": user_id, "requested": requested, "max_taps": max_taps, "today": today},
+        )
+        row = result.one_or_none()
+        if row is None:
+            reset_date = (await self._session.execute(_tap_reset_date, {"user_id": user_id})).one_or_none()
+            if reset_date is None:
+                return TapRejection.NO_CASTLE
+            if reset_date[0] is not None and reset_date[0] > today:
+                return TapRejection.DAY_PASSED
+            return TapRejection.LIMIT_REACHED
+        used_now, used_before = row
+        return used_now - used_before, used_now
+
+    async def lock_for_upgrade(self, user_id: int) -> dict[str, Any] | None:
+        """Lock the user's castle row and return its next castle and price."""
         Next = aliased(Building)
 
         stmt = (
             select(
                 UserCastle.id.label("user_castle_id"),
-                UserCastle.user_id,
-                UserCastle.treasure_amount,
-                UserCastle.last_collect_date,
-                UserCastle.taps_used_today,
-                UserCastle.last_tap_reset_date,
-
-                Building.id.label("castle_id"),
-                Building.title.label("castle_title"),
-                Building.svg.label("castle_svg"),
-                Building.treasure_capacity,
-                Building.speed_production_treasure,
-                Building.cost,
-
-                Building.next_building_id.label("next_castle_id"),
-                Next.title.label("next_castle_title"),
+                UserCastle.castle_id,
+                Next.id.label("next_castle_id"),
+                Next.cost.label("next_castle_cost"),
             )
             .join(Building, Building.id == UserCastle.castle_id)
-            .outerjoin(Next, Next.id == Building.next_building_id)
-            .where(
-                UserCastle.user_id == user_id,
-                Building.type == BuildingType.CASTLE,
+            .outerjoin(
+                Next,
+                and_(
+                    Next.id == Building.next_building_id,
+                    Next.type == BuildingType.CASTLE,
+                )
             )
-            .limit(1)
+            .where(UserCastle.user_id == user_id)
+            .with_for_update(of=UserCastle)
         )
-
         result = await self._session.execute(stmt)
         row = result.mappings().one_or_none()
         return dict(row) if row else None
 
-    async def update_treasure(self, user_castle_id: int, treasure_amount: int) -> UserCastle | None:
-        user_castle = await self.get_by_id(user_castle_id)
-        if not user_castle:
-            return None
-
-        user_castle.treasure_amount = treasure_amount
-        await self._session.flush()
-        return user_castle
-
-    async def collect_treasure(self, user_castle_id: int) -> tuple[UserCastle | None, int]:
-        user_castle = await self.get_by_id(user_castle_id)
-        if not user_castle:
-            return None, 0
-
-        collected = user_castle.treasure_amount
-        user_castle.treasure_amount = 0
-        user_castle.last_collect_date = datetime.now(timezone.utc)
-        await self._session.flush()
-        return user_castle, collected
-
-    async def record_taps(self, user_castle_id: int, count: int) -> UserCastle | None:
-        user_castle = await self.get_by_id(user_castle_id)
-        if not user_castle:
-            return None
-
-        today = date.today()
-        if user_castle.last_tap_reset_date != today:
-            user_castle.taps_used_today = 0
-            user_castle.last_tap_reset_date = today
-
-        user_castle.taps_used_today += count
-        await self._session.flush()
-        return user_castle
-
-    async def get_taps_remaining(self, user_castle_id: int, max_taps: int) -> int:
-        user_castle = await self.get_by_id(user_castle_id)
-        if not user_castle:
-            return 0
-
-        today = date.today()
-        if user_castle.last_tap_reset_date != today:
-            return max_taps
-
-        return max(0, max_taps - user_castle.taps_used_today)
-
-    async def upgrade_castle(self, user_castle_id: int, new_castle_id: int) -> UserCastle | None:
-        user_castle = await self.get_by_id(user_castle_id)
-        if not user_castle:
-            return None
-
-        user_castle.castle_id = new_castle_id
-        user_castle.treasure_amount = 0
-        await self._session.flush()
-        return user_castle
+    async def upgrade_castle(self, user_castle_id: int, new_castle_id: int) -> None:
+        await self._session.execute(
+            update(UserCastle)
+            .where(UserCastle.id == user_castle_id)
+            .values(castle_id=new_castle_id, treasure_amount=0)
+        )
 
     async def migrate_users_to_castle(self, old_castle_id: int, new_castle_id: int):
         stmt = (
@@ -110,3 +205,18 @@ class UserCastleRepository(BaseRepository[UserCastle]):
             .values(castle_id=new_castle_id)
         )
         await self._session.execute(stmt)
+
+    async def stream_treasure_rows(self, chunk_size: int = 10_000) -> AsyncIterator[list[Any]]:
+        """Accrual inputs of every user castle, in chunks over a server-side cursor."""
+        result = await self._session.stream(
+            select(
+                UserCastle.treasure_amount,
+                UserCastle.last_collect_date,
+                Building.treasure_capacity,
+                Building.speed_production_treasure,
+            )
+            .join(Building, Building.id == UserCastle.castle_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.mappings().partitions():
+            yield rows
@@ -1,9 +1,26 @@
 from typing import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import select, or_, bindparam
 
 from src.models.node_progresses import UserNodeProgress
 from src.repositories.base import BaseRepository
+from src.repositories.statements import hot_statement
+
+
+@hot_statement
+def _completed_node_ids():
+    return (
+        select(UserNodeProgress.node_id)
+        .where(
+            UserNodeProgress.user_id == bindparam("user_id"),
+            UserNodeProgress.node_id.in_(bindparam("node_ids", expanding=True)),
+            or_(
+                UserNodeProgress.correct_answer > 0,
+                UserNodeProgress.accuracy >= 0,
+            ),
+        )
+        .distinct()
+    )
 
 
 class UserNodeProgressRepository(BaseRepository[UserNodeProgress]):
@@ -33,6 +50,19 @@ class UserNodeProgressRepository(BaseRepository[UserNodeProgress]):
         result = await self._session.execute(stmt)
         return list(result.scalars().all())
 
+    async def get_completed_node_ids(
+            self,
+            user_id: int,
+            node_ids: list[int],
+    ) -> set[int]:
+        if not node_ids:
+            return set()
+        result = await self._session.execute(
+            _completed_node_ids,
+            {"user_id": user_id, "node_ids": list(node_ids)},
+        )
+        return set(result.scalars().all())
+
     async def get_all_attempts(
             self,
             user_id: int,
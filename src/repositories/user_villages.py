@@ -1,51 +1,141 @@
-from datetime import datetime, timezone
-from typing import Any
+from typing import Any, AsyncIterator
 
-from sqlalchemy import select, update, and_
+from sqlalchemy import select, update, and_, case, func, bindparam
 from sqlalchemy.orm import aliased
 
-from src.app.constants import BuildingType
+from src.app.constants import BuildingType, SubjectEnum
 from src.models.buildings import Building
 from src.models.user_villages import UserVillage
 from src.repositories.base import BaseRepository
+from src.repositories.statements import hot_statement
+from src.repositories.utils_repositories import accrued_treasure
 
 
-class UserVillageRepository(BaseRepository[UserVillage]):
-    model = UserVillage
+@hot_statement
+def _user_villages():
+    Next = aliased(Building)
 
-    async def get_user_villages(self, user_id: int) -> list[dict[str, Any]]:
-        Next = aliased(Building)
+    return (
+        select(
+            UserVillage.id.label("user_village_id"),
+            UserVillage.user_id,
+            UserVillage.treasure_amount,
+            UserVillage.last_collect_date,
+            UserVillage.last_update_at,
 
-        stmt = (
-            select(
-                UserVillage.id.label("user_village_id"),
-                UserVillage.user_id,
-                UserVillage.treasure_amount,
-                UserVillage.last_collect_date,
-                UserVillage.last_update_at,
+            Building.id.label("village_id"),
+            Building.title.label("village_title"),
+            Building.svg.label("village_svg"),
+            Building.subject.label("village_subject"),
 
-                Building.id.label("village_id"),
-                Building.title.label("village_title"),
-                Building.svg.label("village_svg"),
-                Building.subject.label("village_subject"),
+            Building.next_building_id.label("next_building_id"),
+            Next.title.label("next_building_title"),
+
+            Building.treasure_capacity,
+            Building.speed_production_treasure,
+            Building.cost,
+        )
+        .join(Building, Building.id == UserVillage.village_id)
+        .outerjoin(Next, Next.id == Building.next_building_id)
+        .where(
+            UserVillage.user_id == bindparam("user_id"),
+            Building.type == BuildingType.VILLAGE,
+        )
+        .order_by(Building.subject.asc(), Building.id.asc())
+    )
+
+
+def _village_columns():
+    return (
+        UserVillage.id.label("user_village_id"),
+        UserVillage.user_id,
+        UserVillage.treasure_amount,
+        UserVillage.last_collect_date,
+        UserVillage.last_update_at,
+        Building.id.label("village_id"),
+        Building.title.label("village_title"),
+        Building.svg.label("village_svg"),
+        Building.subject.label("village_subject"),
+        Building.treasure_capacity,
+        Building.speed_production_treasure,
+        Building.cost,
+        Building.next_building_id,
+    )
+
+
+@hot_statement
+def _village_by_user():
+    return (
+        select(*_village_columns())
+        .join(Building, Building.id == UserVillage.village_id)
+        .where(
+            UserVillage.user_id == bindparam("user_id"),
+            UserVillage.village_id == bindparam("village_id"),
+        )
+    )
+
+
+@hot_statement
+def _village_by_user_subject():
+    return (
+        select(*_village_columns())
+        .join(
+            Building,
+            and_(
+                Building.id == UserVillage.village_id,
+                Building.subject == bindparam("subject"),
+            )
+        )
+        .where(UserVillage.user_id == bindparam("user_id"))
+    )
 
-                Building.next_building_id.label("next_building_id"),
-                Next.title.label("next_building_title"),
 
+@hot_statement
+def _village_ids():
+    return select(UserVillage.village_id).where(UserVillage.user_id == bindparam("user_id"))
+
+
+@hot_statement
+def _collect_accrued_treasure():
+    locked = (
+        select(
+            UserVillage.id,
+            accrued_treasure(
+                UserVillage.treasure_amount,
+                UserVillage.last_collect_date,
                 Building.treasure_capacity,
                 Building.speed_production_treasure,
-                Building.cost,
-            )
-            .join(Building, Building.id == UserVillage.village_id)
-            .outerjoin(Next, Next.id == Building.next_building_id)
-            .where(
-                UserVillage.user_id == user_id,
-                Building.type == BuildingType.VILLAGE,
-            )
-            .order_by(Building.subject.asc(), Building.id.asc())
+            ).label("amount"),
+        )
+        .join(Building, Building.id == UserVillage.village_id)
+        # binds of an UPDATE must not share a name with a column of the updated table
+        .where(
+            UserVillage.user_id == bindparam("uid"),
+            UserVillage.village_id == bindparam("vid"),
         )
+        .with_for_update(of=UserVillage)
+        .cte("locked")
+    )
+    return (
+        update(UserVillage)
+        .where(UserVillage.id == locked.c.id)
+        .values(
+            treasure_amount=0,
+            last_collect_date=case(
+                (locked.c.amount > 0, func.now()),
+                else_=UserVillage.last_collect_date,
+            ),
+            last_update_at=func.now(),
+        )
+        .returning(locked.c.amount)
+    )
 
-        result = await self._session.execute(stmt)
+
+class UserVillageRepository(BaseRepository[UserVillage]):
+    model = UserVillage
+
+    async def get_user_villages(self, user_id: int) -> list[dict[str, Any]]:
+        result = await self._session.execute(_user_villages, {"user_id": user_id})
         return [dict(r) for r in result.mappings().all()]
 
     async def get_village_by_user(
@@ -53,29 +143,10 @@ class UserVillageRepository(BaseRepository[UserVillage]):
             user_id: int,
             village_id: int,
     ) -> dict[str, Any] | None:
-        stmt = (
-            select(
-                UserVillage.id.label("user_village_id"),
-                UserVillage.user_id,
-                UserVillage.treasure_amount,
-                UserVillage.last_collect_date,
-                UserVillage.last_update_at,
-                Building.id.label("village_id"),
-                Building.title.label("village_title"),
-                Building.svg.label("village_svg"),
-                Building.subject.label("village_subject"),
-                Building.treasure_capacity,
-                Building.speed_production_treasure,
-                Building.cost,
-                Building.next_building_id,
-            )
-            .join(Building, Building.id == UserVillage.village_id)
-            .where(
-                UserVillage.user_id == user_id,
-                UserVillage.village_id == village_id
-            )
+        result = await self._session.execute(
+            _village_by_user,
+            {"user_id": user_id, "village_id": village_id},
         )
-        result = await self._session.execute(stmt)
         row = result.mappings().one_or_none()
         return dict(row) if row else None
 
@@ -84,66 +155,64 @@ class UserVillageRepository(BaseRepository[UserVillage]):
             user_id: int,
             subject: str,
     ) -> dict[str, Any] | None:
+        result = await self._session.execute(
+            _village_by_user_subject,
+            {"user_id": user_id, "subject": subject},
+        )
+        row = result.mappings().one_or_none()
+        return dict(row) if row else None
+
+    async def get_village_ids(self, user_id: int) -> set[int]:
+        result = await self._session.execute(_village_ids, {"user_id": user_id})
+        return set(result.scalars().all())
+
+    async def collect_accrued_treasure(self, user_id: int, village_id: int) -> int | None:
+        """
+        Lock the user's village, move the accrued treasure out and reset the timer in one statement.
+        Returns the collected amount (0 if nothing accrued) or None if the user has no such village.
+        """
+        return await self._session.scalar(
+            _collect_accrued_treasure,
+            {"uid": user_id, "vid": village_id},
+        )
+
+    async def lock_for_upgrade(self, user_id: int, subject: SubjectEnum) -> dict[str, Any] | None:
+        """Lock the user's village of `subject` and return its next village and price."""
+        Next = aliased(Building)
+
         stmt = (
             select(
                 UserVillage.id.label("user_village_id"),
-                UserVillage.user_id,
-                UserVillage.treasure_amount,
-                UserVillage.last_collect_date,
-                UserVillage.last_update_at,
-                Building.id.label("village_id"),
-                Building.title.label("village_title"),
-                Building.svg.label("village_svg"),
-                Building.subject.label("village_subject"),
-                Building.treasure_capacity,
-                Building.speed_production_treasure,
-                Building.cost,
-                Building.next_building_id,
+                UserVillage.village_id,
+                Next.id.label("next_village_id"),
+                Next.cost.label("next_village_cost"),
             )
-            .join(
-                Building,
+            .join(Building, Building.id == UserVillage.village_id)
+            .outerjoin(
+                Next,
                 and_(
-                    Building.id == UserVillage.village_id,
-                    Building.subject == subject
+                    Next.id == Building.next_building_id,
+                    Next.type == BuildingType.VILLAGE,
+                    Next.subject == subject,
                 )
             )
-            .where(UserVillage.user_id == user_id)
+            .where(
+                UserVillage.user_id == user_id,
+                Building.type == BuildingType.VILLAGE,
+                Building.subject == subject,
+            )
+            .with_for_update(of=UserVillage)
         )
         result = await self._session.execute(stmt)
         row = result.mappings().one_or_none()
         return dict(row) if row else None
 
-    async def update_treasure(
-            self, user_village_id: int, treasure_amount: int
-    ) -> UserVillage | None:
-        user_village = await self.get_by_id(user_village_id)
-        if not user_village:
-            return None
-        user_village.treasure_amount = treasure_amount
-        user_village.last_update_at = datetime.now(timezone.utc)
-        await self._session.flush()
-        return user_village
-
-    async def collect_treasure(self, user_village_id: int) -> tuple[UserVillage | None, int]:
-        user_village = await self.get_by_id(user_village_id)
-        if not user_village:
-            return None, 0
-
-        collected = user_village.treasure_amount
-        user_village.treasure_amount = 0
-        user_village.last_collect_date = datetime.now(timezone.utc)
-        await self._session.flush()
-        return user_village, collected
-
-    async def upgrade_village(self, user_village_id: int, new_village_id: int) -> UserVillage | None:
-        user_village = await self.get_by_id(user_village_id)
-        if not user_village:
-            return None
-
-        user_village.village_id = new_village_id
-        user_village.treasure_amount = 0
-        await self._session.flush()
-        return user_village
+    async def upgrade_village(self, user_village_id: int, new_village_id: int) -> None:
+        await self._session.execute(
+            update(UserVillage)
+            .where(UserVillage.id == user_village_id)
+            .values(village_id=new_village_id, treasure_amount=0)
+        )
 
     async def migrate_users_to_village(self, old_village_id: int, new_village_id: int):
         stmt = (
@@ -152,3 +221,18 @@ class UserVillageRepository(BaseRepository[UserVillage]):
             .values(village_id=new_village_id)
         )
         await self._session.execute(stmt)
+
+    async def stream_treasure_rows(self, chunk_size: int = 10_000) -> AsyncIterator[list[Any]]:
+        """Accrual inputs of every user village, in chunks over a server-side cursor."""
+        result = await self._session.stream(
+            select(
+                UserVillage.treasure_amount,
+                UserVillage.last_collect_date,
+                Building.treasure_capacity,
+                Building.speed_production_treasure,
+            )
+            .join(Building, Building.id == UserVillage.village_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.mappings().partitions():
+            yield rows
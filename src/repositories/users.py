@@ -1,7 +1,71 @@
-from sqlalchemy import select
+from sqlalchemy import select, bindparam, and_
+from sqlalchemy.orm import aliased
 
+from src.app.constants import BuildingType, FundType
+from src.models.buildings import Building
+from src.models.user_castles import UserCastle
+from src.models.user_villages import UserVillage
 from src.models.users import User
+from src.models.wallets import WalletBalance
 from src.repositories.base import BaseRepository
+from src.repositories.statements import hot_statement
+
+
+@hot_statement
+def _dashboard():
+    Castle = aliased(Building)
+    Village = aliased(Building)
+    villages = UserVillage.__table__.join(
+        Village,
+        and_(Village.id == UserVillage.village_id, Village.type == BuildingType.VILLAGE),
+    )
+    balances = [
+        select(WalletBalance.balance)
+        .where(WalletBalance.user_id == User.id, WalletBalance.fund_type == fund_type)
+        .scalar_subquery()
+        .label(f"balance_{fund_type.value}")
+        for fund_type in FundType
+    ]
+
+    return (
+        select(
+            User.id,
+            User.email,
+            User.full_name,
+            User.current_score,
+            User.target_score,
+            User.exam_date,
+            User.has_onboard,
+            User.is_admin,
+            *balances,
+
+            UserCastle.id.label("user_castle_id"),
+            UserCastle.treasure_amount.label("castle_treasure_amount"),
+            UserCastle.last_collect_date.label("castle_last_collect_date"),
+            UserCastle.taps_used_today,
+            UserCastle.last_tap_reset_date,
+            Castle.id.label("castle_id"),
+            Castle.title.label("castle_title"),
+            Castle.svg.label("castle_svg"),
+            Castle.treasure_capacity.label("castle_treasure_capacity"),
+            Castle.speed_production_treasure.label("castle_speed_production_treasure"),
+
+            UserVillage.id.label("user_village_id"),
+            UserVillage.treasure_amount,
+            UserVillage.last_collect_date,
+            Village.id.label("village_id"),
+            Village.title.label("village_title"),
+            Village.svg.label("village_svg"),
+            Village.subject.label("village_subject"),
+            Village.treasure_capacity,
+            Village.speed_production_treasure,
+        )
+        .outerjoin(UserCastle, UserCastle.user_id == User.id)
+        .outerjoin(Castle, and_(Castle.id == UserCastle.castle_id, Castle.type == BuildingType.CASTLE))
+        .outerjoin(villages, UserVillage.user_id == User.id)
+        .where(User.id == bindparam("user_id"))
+        .order_by(Village.subject.asc(), Village.id.asc())
+    )
 
 
 class UserRepository(BaseRepository[User]):
@@ -19,3 +83,12 @@ class UserRepository(BaseRepository[User]):
         user.has_onboard = True
         await self._session.flush()
         return user
+
+    async def get_dashboard_rows(self, user_id: int) -> list[dict]:
+        """
+        Profile, balances, castle and villages in one round trip: one row per village
+        (a single row with null village columns when there are none), the user, balance
+        and castle columns repeated on each. Empty when the user does not exist.
+        """
+        result = await self._session.execute(_dashboard, {"user_id": user_id})
+        return [dict(row) for row in result.mappings().all()]
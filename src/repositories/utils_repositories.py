@@ -1,4 +1,4 @@
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func, case, cast, and_, Integer
 
 
 class UtilsRepository:
@@ -100,3 +100,25 @@ class UtilsRepository:
                 .where(self.model.id == item_id)
                 .values(order_index=new_index)
             )
+
+
+def accrued_treasure(treasure_amount, last_collect_date, capacity, production_rate):
+    """
+    SQL version of the collector's accrual: stored amount plus whole units produced
+    since the last collect (production_rate is per hour), capped at capacity.
+    """
+    hours_elapsed = func.greatest(
+        func.extract("epoch", func.now() - last_collect_date) / 3600.0,
+        0,
+    )
+    produced = case(
+        (
+            and_(production_rate > 0, last_collect_date.is_not(None)),
+            func.floor(production_rate * hours_elapsed),
+        ),
+        else_=0,
+    )
+    return cast(
+        func.least(func.greatest(func.coalesce(treasure_amount, 0), 0) + produced, capacity),
+        Integer,
+    )
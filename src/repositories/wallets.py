@@ -1,53 +1,103 @@
-from sqlalchemy import select, func, update
+from sqlalchemy import select, func, update, literal, cast, bindparam
 from sqlalchemy.dialects.postgresql import insert
 
 from src.app.constants import FundType
-from src.models.wallets import Wallet
+from src.models.wallets import Wallet, WalletBalance
 from src.repositories.base import BaseRepository
+from src.repositories.statements import hot_statement
+
+
+@hot_statement
+def _balances():
+    return (
+        select(WalletBalance.fund_type, WalletBalance.balance)
+        .where(WalletBalance.user_id == bindparam("user_id"))
+    )
+
+
+@hot_statement
+def _balance():
+    return (
+        select(WalletBalance.balance)
+        .where(
+            WalletBalance.user_id == bindparam("user_id"),
+            WalletBalance.fund_type == bindparam("fund_type"),
+        )
+    )
 
 
 class WalletRepository(BaseRepository[Wallet]):
+    """
+    `wallets` is the append-only ledger, `wallet_balances` holds the running totals.
+    add_funds/deduct_funds write both in a single CTE statement, so the ledger and
+    the balance can never diverge and each call is one round trip.
+    """
     model = Wallet
 
     async def get_by_user_id(self, user_id: int) -> list[dict]:
-        stmt = (
-            select(Wallet.fund_type, func.sum(Wallet.fund))
-            .where(Wallet.user_id == user_id)
-            .group_by(Wallet.fund_type)
-        )
-        result = await self._session.execute(stmt)
+        result = await self._session.execute(_balances, {"user_id": user_id})
         return [
             {"fund_type": row[0], "fund": row[1]}
             for row in result.all()
         ]
 
     async def get_balance(self, user_id: int, fund_type: FundType) -> int:
-        stmt = (
-            select(func.coalesce(func.sum(Wallet.fund), 0))
-            .where(Wallet.user_id == user_id, Wallet.fund_type == fund_type)
+        result = await self._session.execute(
+            _balance,
+            {"user_id": user_id, "fund_type": fund_type},
         )
-        result = await self._session.execute(stmt)
         return result.scalar() or 0
 
-    async def add_funds(self, user_id: int, amount: int, fund_type: FundType) -> Wallet:
-        """Add funds to user's wallet. Creates wallet entry if not exists."""
-        stmt = (
+    async def add_funds(self, user_id: int, amount: int, fund_type: FundType) -> int:
+        """Add funds to user's wallet. Returns the new balance."""
+        ledger = (
             insert(Wallet)
             .values(user_id=user_id, fund=amount, fund_type=fund_type)
-            .returning(Wallet)
+            .cte("ledger")
+        )
+        stmt = insert(WalletBalance).values(user_id=user_id, fund_type=fund_type, balance=amount)
+        stmt = (
+            stmt.on_conflict_do_update(
+                index_elements=[WalletBalance.user_id, WalletBalance.fund_type],
+                set_={
+                    "balance": WalletBalance.balance + stmt.excluded.balance,
+                    "updated_at": func.now(),
+                },
+            )
+            .returning(WalletBalance.balance)
+            .add_cte(ledger)
         )
         result = await self._session.execute(stmt)
-        return result.scalar()
+        return result.scalar_one()
 
-    async def deduct_funds(self, user_id: int, amount: int, fund_type: FundType) -> bool:
-        """Deduct funds from user's wallet. Returns False if insufficient balance."""
-        current_balance = await self.get_balance(user_id, fund_type)
-        if current_balance < amount:
-            return False
-
-        # Add negative transaction
-        await self.add_funds(user_id, -amount, fund_type)
-        return True
+    async def deduct_funds(self, user_id: int, amount: int, fund_type: FundType) -> int | None:
+        """Deduct funds from user's wallet. Returns the new balance, or None if insufficient balance."""
+        debited = (
+            update(WalletBalance)
+            .where(
+                WalletBalance.user_id == user_id,
+                WalletBalance.fund_type == fund_type,
+                WalletBalance.balance >= amount,
+            )
+            .values(balance=WalletBalance.balance - amount, updated_at=func.now())
+            .returning(WalletBalance.balance)
+            .cte("debited")
+        )
+        # negative transaction is written only if the guarded update matched
+        ledger = (
+            insert(Wallet)
+            .from_select(
+                [Wallet.user_id, Wallet.fund, Wallet.fund_type],
+                select(
+                    literal(user_id),
+                    literal(-amount),
+                    cast(literal(fund_type, Wallet.fund_type.type), Wallet.fund_type.type),
+                ).select_from(debited),
+            )
+            .cte("ledger")
+        )
+        stmt = select(debited.c.balance).add_cte(ledger)
+        return await self._session.scalar(stmt)
 
     async def has_sufficient_funds(self, user_id: int, amount: int, fund_type: FundType) -> bool:
         balance = await self.get_balance(user_id, fund_type)
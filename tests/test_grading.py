@@ -0,0 +1,28 @@
+import pytest
+
+from src.app.grading import GRADERS
+from src.presentations.schemas.submits import FillGapSubmit, HighlightSubmit
+
+
+@pytest.mark.parametrize(
+    ("correct", "answer", "points"),
+    [
+        ("Photosynthesis", "photosynthesis", 1.0),
+        ("Photosynthesis", "  PHOTOSYNTHESIS \n", 1.0),
+        (" Straße ", "STRASSE", 1.0),
+        ("Photosynthesis", "photo synthesis", 0.0),
+    ],
+)
+def test_fill_gap_compares_normalized(correct, answer, points):
+    grader = GRADERS["fill_gap"]
+    key = grader.compile({"question": "q", "correct_answer": correct, "explanation": "e"})
+    assert grader.grade(FillGapSubmit(answer=answer), key) == points
+
+
+def test_highlight_compares_normalized():
+    grader = GRADERS["highlight"]
+    key = grader.compile({
+        "passage": "p", "question": "q", "correct_phrase": "The Industrial Revolution", "explanation": "e",
+    })
+    assert grader.grade(HighlightSubmit(selected_phrase=" the industrial revolution"), key) == 1.0
+    assert grader.grade(HighlightSubmit(selected_phrase="industrial revolution"), key) == 0.0
@@ -0,0 +1,119 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.app.treasure import (
+    AccumulatedTreasure,
+    EconomySummary,
+    TreasureColumns,
+    accrue_batch,
+    accrue_one,
+    epoch_us,
+)
+
+NOW = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def _batch_one(current: int, capacity: int, rate: int, last_collect: datetime | None, now: datetime = NOW):
+    columns = TreasureColumns()
+    columns.append(current, capacity, rate, last_collect)
+    amounts, minutes = accrue_batch(columns, now)
+    return AccumulatedTreasure(current_amount=amounts[0], time_to_full_minutes=minutes[0])
+
+
+@pytest.mark.parametrize(
+    ("current", "capacity", "rate", "last_collect", "expected"),
+    [
+        # never collected: nothing accrues, time to full from the stored amount
+        (0, 100, 10, None, AccumulatedTreasure(0, 600)),
+        (40, 100, 10, None, AccumulatedTreasure(40, 360)),
+        # zero or negative rate: stored amount capped, never full
+        (50, 100, 0, NOW - timedelta(hours=5), AccumulatedTreasure(50, 0)),
+        (150, 100, -1, NOW - timedelta(hours=5), AccumulatedTreasure(100, 0)),
+        (-5, 100, 0, None, AccumulatedTreasure(-5, 0)),
+        # over capacity or negative stored amounts are clamped before accruing
+        (150, 100, 10, NOW, AccumulatedTreasure(100, 0)),
+        (-20, 100, 10, NOW, AccumulatedTreasure(0, 600)),
+        # whole hours
+        (0, 100, 10, NOW - timedelta(hours=3), AccumulatedTreasure(30, 420)),
+        (0, 100, 10, NOW - timedelta(hours=30), AccumulatedTreasure(100, 0)),
+        # partial units are floored
+        (0, 100, 10, NOW - timedelta(minutes=5, seconds=59), AccumulatedTreasure(0, 600)),
+        (0, 100, 10, NOW - timedelta(minutes=6), AccumulatedTreasure(1, 594)),
+        # a collect date in the future accrues nothing
+        (10, 100, 10, NOW + timedelta(hours=1), AccumulatedTreasure(10, 540)),
+        # zero capacity
+        (0, 0, 10, NOW - timedelta(hours=1), AccumulatedTreasure(0, 0)),
+    ],
+)
+def test_edge_cases(current, capacity, rate, last_collect, expected):
+    assert accrue_one(current, capacity, rate, last_collect, now=NOW) == expected
+    assert _batch_one(current, capacity, rate, last_collect) == expected
+
+
+@pytest.mark.parametrize("microseconds", [0, 1, 359_999_999, 360_000_000, 360_000_001, 3_600_000_000 * 7 + 1])
+def test_microsecond_boundaries(microseconds):
+    last_collect = NOW - timedelta(microseconds=microseconds)
+    for rate in (1, 7, 10, 60, 9999):
+        assert _batch_one(0, 10 ** 6, rate, last_collect) == accrue_one(0, 10 ** 6, rate, last_collect, now=NOW)
+
+
+def test_epoch_us_is_exact():
+    value = datetime(2262, 4, 11, 23, 47, 16, 854775, tzinfo=timezone.utc)
+    assert epoch_us(value) == 9223372036854775
+    assert epoch_us(None) is None
+
+
+def _random_building(rng: random.Random, now: datetime) -> tuple[int, int, int, datetime | None]:
+    capacity = rng.choice([0, 1, 7, 300, 1000, rng.randint(0, 10 ** 6)])
+    current = rng.choice([0, capacity, capacity + rng.randint(1, 50), -rng.randint(1, 50), rng.randint(0, capacity)])
+    rate = rng.choice([0, -1, 1, 3, 7, 60, rng.randint(1, 10 ** 4)])
+    last_collect = rng.choice([
+        None,
+        now,
+        now + timedelta(microseconds=rng.randint(1, 10 ** 9)),
+        now - timedelta(microseconds=rng.randint(0, 10 ** 6)),
+        now - timedelta(seconds=rng.randint(0, 30 * 86400), microseconds=rng.randint(0, 999_999)),
+        now - timedelta(hours=rng.randint(0, 500)),
+    ])
+    return current, capacity, rate, last_collect
+
+
+@pytest.mark.parametrize("seed", [1, 7, 2026])
+def test_batch_matches_scalar(seed):
+    rng = random.Random(seed)
+    buildings = [_random_building(rng, NOW) for _ in range(20_000)]
+    columns = TreasureColumns()
+    for building in buildings:
+        columns.append(*building)
+
+    amounts, minutes = accrue_batch(columns, NOW)
+
+    for building, amount, minute in zip(buildings, amounts, minutes):
+        assert accrue_one(*building, now=NOW) == AccumulatedTreasure(amount, minute), building
+
+
+def test_from_rows_matches_append():
+    rows = [
+        {"treasure_amount": 5, "treasure_capacity": 50, "speed_production_treasure": 3, "last_collect_date": NOW},
+        {"treasure_amount": 0, "treasure_capacity": 10, "speed_production_treasure": 0, "last_collect_date": None},
+    ]
+    columns = TreasureColumns.from_rows(rows)
+    assert columns.current_amount == [5, 0]
+    assert columns.last_collect_us == [epoch_us(NOW), None]
+    assert len(columns) == 2
+
+
+def test_economy_summary():
+    columns = TreasureColumns()
+    columns.append(0, 100, 10, NOW - timedelta(hours=30))  # full
+    columns.append(0, 100, 10, NOW - timedelta(hours=3))  # 30, 420 minutes to full
+    columns.append(0, 100, 0, None)  # never fills
+    summary = EconomySummary()
+    summary.add(columns, *accrue_batch(columns, NOW))
+
+    result = summary.as_dict()
+    assert (result["buildings"], result["stored"], result["accrued"], result["full"]) == (3, 0, 130, 1)
+    assert result["time_to_full"]["le_720m"] == 1
+    assert sum(result["time_to_full"].values()) == 1